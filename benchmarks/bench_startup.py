@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+StockScan startup benchmark
+Measures how long a fresh `python stockscan.py ...` process takes to get
+going and checks that heavy optional libraries (yfinance, pandas, numpy,
+pyarrow, aiohttp) are not imported on startup.
+
+Times are reported as overhead over a bare `python -c pass` and compared
+with benchmarks/startup_baseline.json. Exits with status 1 on a regression.
+
+Usage:
+    python benchmarks/bench_startup.py              # compare with the baseline
+    python benchmarks/bench_startup.py --update     # record a new baseline
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+
+# Libraries that must only be imported by the code paths that need them
+HEAVY_MODULES = ["yfinance", "pandas", "numpy", "pyarrow", "aiohttp"]
+
+# Scenario name -> command (run from the repository root)
+SCENARIOS = {
+    "import stockscan": [sys.executable, "-c", "import stockscan"],
+    "stockscan.py help": [sys.executable, "stockscan.py", "help"],
+    "stockscan.py list commodities": [sys.executable, "stockscan.py", "list", "commodities"]
+}
+
+
+def time_command(command, runs: int) -> float:
+    """Median wall time of a command in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def heavy_imports() -> list:
+    """Heavy modules loaded by `import stockscan`"""
+    code = ("import json, sys, stockscan; "
+            f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StockScan startup benchmark")
+    parser.add_argument("--runs", type=int, default=15, help="Runs per scenario (default: 15)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown over the baseline, 0.5 = 50%% (default: 0.5)")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    failed = False
+
+    loaded = heavy_imports()
+    if loaded:
+        print(f"FAIL  heavy modules imported on startup: {', '.join(loaded)}")
+        failed = True
+    else:
+        print(f"ok    no heavy modules imported on startup ({', '.join(HEAVY_MODULES)})")
+
+    interpreter = time_command([sys.executable, "-c", "pass"], args.runs)
+    print(f"      python -c pass: {interpreter:.1f} ms\n")
+
+    results = {name: round(max(time_command(command, args.runs) - interpreter, 0.0), 1)
+               for name, command in SCENARIOS.items()}
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    for name, overhead in results.items():
+        previous = baseline.get(name)
+        if previous is None or args.update:
+            print(f"      {name:32} {overhead:7.1f} ms")
+            continue
+        limit = previous * (1 + args.tolerance) + 5
+        status = "ok  " if overhead <= limit else "FAIL"
+        failed = failed or overhead > limit
+        print(f"{status}  {name:32} {overhead:7.1f} ms  (baseline {previous:.1f} ms, limit {limit:.1f} ms)")
+
+    if args.update:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {os.path.relpath(BASELINE_FILE, ROOT)}")
+
+    sys.exit(1 if failed and not args.update else 0)
+
+
+if __name__ == "__main__":
+    main()
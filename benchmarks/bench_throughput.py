@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+StockScan throughput benchmark
+Runs the lookup and export paths end to end against the local stand-in
+server (benchmarks/standin.py), so no network access is needed:
+
+  crypto lookups       get_crypto_price, cold cache and then cached
+  stock lookups        get_stock_price, cold cache and then cached
+  symbol search        Binance symbol list download + prefix/fuzzy search
+  export_data_mode     the interactive export menu, 1m crypto candles to CSV
+  bulk fetch           stockscan_exporter.fetch_crypto_bulk_data, 5m candles
+
+Each scenario runs in a fresh process and reports its throughput
+(lookups/sec or candles/sec) and peak RSS. Results are compared with
+benchmarks/throughput_baseline.json; the script exits with status 1 when
+throughput drops or memory grows beyond the tolerance.
+
+Usage:
+    python benchmarks/bench_throughput.py              # compare with the baseline
+    python benchmarks/bench_throughput.py --update     # record a new baseline
+    python benchmarks/bench_throughput.py --only crypto_lookups
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+BASELINE_FILE = os.path.join(BENCH_DIR, "throughput_baseline.json")
+
+# Fixed workload (changing it invalidates the baseline)
+LOOKUPS = 300
+SEARCHES = 2000
+EXPORT_RANGE = ("2024-01-01", "2024-01-15")      # 1m candles: 21,601 (end date included)
+BULK_RANGE = ("2023-01-01", "2024-01-01")        # 5m candles: 105,121
+CRYPTO_SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT"]
+STOCK_SYMBOLS = ["AAPL", "MSFT", "GLD", "RELIANCE.NS"]
+CRYPTO_TIMEFRAMES = ["1m", "5m", "15m", "1h", "4h", "1d", "3d", "1w"]
+STOCK_TIMEFRAMES = ["1d", "1wk", "1mo"]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (0 where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _queries(count: int, stocks: bool) -> list:
+    rng = random.Random(7)
+    queries = []
+    for _ in range(count):
+        date = f"2024-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}"
+        if stocks:
+            queries.append((rng.choice(STOCK_SYMBOLS), date, rng.choice(STOCK_TIMEFRAMES)))
+        else:
+            time_str = f"{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '37'])}"
+            queries.append((rng.choice(CRYPTO_SYMBOLS), date, time_str, rng.choice(CRYPTO_TIMEFRAMES)))
+    return queries
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
+
+
+def run_crypto_lookups() -> dict:
+    import stockscan
+    queries = _queries(LOOKUPS, stocks=False)
+    results = {}
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        for symbol, date, time_str, timeframe in queries:
+            result = stockscan.get_crypto_price(symbol, date, time_str, timeframe)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        results[f"{label} lookups/sec"] = _rate(len(queries), time.perf_counter() - start)
+    return results
+
+
+def run_stock_lookups() -> dict:
+    import stockscan
+    queries = _queries(LOOKUPS, stocks=True)
+    results = {}
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        for symbol, date, timeframe in queries:
+            result = stockscan.get_stock_price(symbol, date, None, timeframe)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        results[f"{label} lookups/sec"] = _rate(len(queries), time.perf_counter() - start)
+    return results
+
+
+def run_symbol_search() -> dict:
+    import stockscan_core
+    start = time.perf_counter()
+    index = stockscan_core.get_symbol_index(refresh=True)
+    download = time.perf_counter() - start
+    rng = random.Random(7)
+    names = index.names
+    texts = [rng.choice(names)[:rng.randint(2, 6)] for _ in range(SEARCHES // 2)]
+    texts += [name[:-1] + "X" for name in rng.sample(names, SEARCHES // 2)]  # misspelled
+    start = time.perf_counter()
+    for text in texts:
+        index.search(text, limit=10)
+    return {"symbols": len(names), "list download ms": round(download * 1000, 1),
+            "searches/sec": _rate(len(texts), time.perf_counter() - start)}
+
+
+def run_export_data_mode() -> dict:
+    import stockscan
+    start_date, end_date = EXPORT_RANGE
+    # Market, symbol, dates, timeframe 1m, no offset, CSV, no further exports
+    answers = iter(["1", "BTCUSDT", start_date, end_date, "2", "", "1", "n"])
+    original_input = builtins.input
+    builtins.input = lambda prompt="": next(answers)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            stockscan.export_data_mode()
+        seconds = time.perf_counter() - start
+    finally:
+        builtins.input = original_input
+    path = os.path.join("exports", f"BTCUSDT_1m_{start_date}_to_{end_date}.csv")
+    with open(path, encoding="utf-8") as f:
+        candles = sum(1 for _ in f) - 1
+    return {"candles": candles, "candles/sec": _rate(candles, seconds)}
+
+
+def run_bulk_fetch() -> dict:
+    import stockscan_exporter
+    start_date, end_date = BULK_RANGE
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = stockscan_exporter.fetch_crypto_bulk_data("ETHUSDT", start_date, end_date, "5m")
+    seconds = time.perf_counter() - start
+    if isinstance(data, dict):
+        raise RuntimeError(data["error"])
+    return {"candles": len(data), "candles/sec": _rate(len(data), seconds)}
+
+
+SCENARIOS = {
+    "crypto_lookups": run_crypto_lookups,
+    "stock_lookups": run_stock_lookups,
+    "symbol_search": run_symbol_search,
+    "export_data_mode": run_export_data_mode,
+    "bulk_fetch": run_bulk_fetch
+}
+
+# Metrics where a higher number is better (everything else is informational, except peak RSS)
+THROUGHPUT_SUFFIXES = ("/sec",)
+
+
+def run_child(name: str):
+    """Run one scenario in this (fresh) process and print its results as JSON"""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from standin import start_standin, point_stockscan_at
+    point_stockscan_at(start_standin())
+    results = SCENARIOS[name]()
+    results["peak RSS MB"] = peak_rss_mb()
+    print(json.dumps(results))
+
+
+def run_scenario(name: str) -> dict:
+    """Run a scenario in a fresh process with an empty cache"""
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update({
+            "STOCKSCAN_CACHE_DIR": os.path.join(workdir, "cache"),
+            "STOCKSCAN_STREAM": "0",
+            "PYTHONPATH": ROOT
+        })
+        for name_to_drop in ("STOCKSCAN_METRICS_FILE", "STOCKSCAN_METRICS_PORT"):
+            env.pop(name_to_drop, None)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name],
+                                cwd=workdir, env=env, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{output.stderr.strip()}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def compare(metric: str, value: float, previous, tolerance: float):
+    """Status text and whether the value regressed against the baseline"""
+    if previous is None or not isinstance(value, (int, float)):
+        return "    ", False
+    if metric.endswith(THROUGHPUT_SUFFIXES):
+        limit = previous * (1 - tolerance)
+        failed = value < limit
+    elif metric == "peak RSS MB":
+        limit = previous * (1 + tolerance) + 10
+        failed = value > limit
+    else:
+        return "    ", False
+    return ("FAIL" if failed else "ok  "), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StockScan throughput benchmark")
+    parser.add_argument("--only", choices=list(SCENARIOS), action="append", help="Run only these scenarios")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scenario, best one counts (default: 3)")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed throughput drop / memory growth, 0.3 = 30%% (default: 0.3)")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--child", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    failed = False
+    results = dict(baseline) if args.update and args.only else {}
+    for name in args.only or list(SCENARIOS):
+        runs = [run_scenario(name) for _ in range(max(args.runs, 1))]
+        # Best throughput and lowest memory over the runs (less noise than the mean)
+        best = {}
+        for metric in runs[0]:
+            values = [run[metric] for run in runs]
+            best[metric] = min(values) if metric == "peak RSS MB" else max(values)
+        results[name] = best
+
+        print(name)
+        for metric, value in best.items():
+            previous = None if args.update else baseline.get(name, {}).get(metric)
+            status, regressed = compare(metric, value, previous, args.tolerance)
+            failed = failed or regressed
+            suffix = f"  (baseline {previous})" if previous is not None and status.strip() else ""
+            print(f"{status}  {metric:24} {value:>12}{suffix}")
+        print()
+
+    if args.update:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {os.path.relpath(BASELINE_FILE, ROOT)}")
+
+    sys.exit(1 if failed and not args.update else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+StockScan stand-in market data server
+A local HTTP server that answers the Binance and Yahoo Finance endpoints
+StockScan uses, in the same JSON layout the real services return:
+
+  /api/v3/klines, /api/v3/ticker/price, /api/v3/exchangeInfo   (Binance)
+  /v8/finance/chart/<symbol>, /v7/finance/spark                (Yahoo Finance)
+
+Prices are a fixed function of time and symbol, so every run replays
+exactly the same responses for the same requests, for any date range and
+any number of symbols - benchmarks need no network access and their
+numbers stay comparable between runs.
+
+Usage:
+    python benchmarks/standin.py --port 8765    # serve until Ctrl+C
+
+    from standin import start_standin, point_stockscan_at
+    point_stockscan_at(start_standin())         # in-process
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import argparse
+import calendar
+import json
+import math
+import threading
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+from urllib.parse import urlsplit, parse_qsl
+
+# Binance interval lengths (months are handled separately)
+INTERVAL_MS = {
+    "1s": 1000, "1m": 60000, "3m": 180000, "5m": 300000, "15m": 900000, "30m": 1800000,
+    "1h": 3600000, "2h": 7200000, "4h": 14400000, "6h": 21600000, "8h": 28800000,
+    "12h": 43200000, "1d": 86400000, "3d": 259200000, "1w": 604800000
+}
+WEEK_ANCHOR_MS = 4 * 86400000  # Binance weeks start on Monday, epoch day 0 was a Thursday
+
+# Listed pairs: every base against every quote, about as many as Binance lists
+BASE_ASSETS = ["BTC", "ETH", "BNB", "SOL", "XRP", "DOGE", "ADA", "AVAX", "DOT", "LINK", "LTC", "TRX",
+               "MATIC", "ATOM", "NEAR", "UNI", "ETC", "FIL", "APT", "ARB", "OP", "INJ", "SUI", "SEI"]
+BASE_ASSETS += [f"ALT{i}" for i in range(300)]
+QUOTE_ASSETS = ["USDT", "BTC", "ETH", "BNB", "FDUSD", "EUR"]
+
+# Yahoo daily candles open at 09:30 New York time (14:30 UTC in winter)
+YAHOO_OPEN_OFFSET_S = 14 * 3600 + 1800
+KLINES_MAX_LIMIT = 1000
+
+
+def price_at(symbol: str, t_ms: int) -> float:
+    """Deterministic price of a symbol at a time"""
+    seed = zlib.crc32(symbol.encode()) % 1000
+    noise = ((t_ms // 1000 * 2654435761 + seed) % 10007) / 10007
+    return 50.0 + seed / 10 + 10 * math.sin(t_ms / 3.6e6 / 24 + seed) + noise
+
+
+def _month_start(t_ms: int, months_ahead: int = 0) -> int:
+    dt = datetime.fromtimestamp(t_ms / 1000, timezone.utc)
+    month = dt.month - 1 + months_ahead
+    year = dt.year + month // 12
+    return calendar.timegm((year, month % 12 + 1, 1, 0, 0, 0)) * 1000
+
+
+def kline_open_times(interval: str, start_ms: int, end_ms: int, limit: int) -> List[int]:
+    """Open times of the candles Binance returns for a /klines request"""
+    times = []
+    if interval == "1M":
+        t = _month_start(start_ms)
+        if t < start_ms:
+            t = _month_start(start_ms, 1)
+        while t <= end_ms and len(times) < limit:
+            times.append(t)
+            t = _month_start(t, 1)
+        return times
+    step = INTERVAL_MS[interval]
+    anchor = WEEK_ANCHOR_MS if interval == "1w" else 0
+    t = -(-(start_ms - anchor) // step) * step + anchor
+    while t <= end_ms and len(times) < limit:
+        times.append(t)
+        t += step
+    return times
+
+
+def klines(symbol: str, interval: str, start_ms: int, end_ms: int, limit: int) -> List[list]:
+    """A /api/v3/klines response body"""
+    rows = []
+    for t in kline_open_times(interval, start_ms, end_ms, limit):
+        close_time = (_month_start(t, 1) if interval == "1M" else t + INTERVAL_MS[interval]) - 1
+        o, c = price_at(symbol, t), price_at(symbol, close_time)
+        volume = (t // 1000 % 97) + 1.5
+        rows.append([t, f"{o:.8f}", f"{max(o, c) * 1.001:.8f}", f"{min(o, c) * 0.999:.8f}", f"{c:.8f}",
+                     f"{volume:.8f}", close_time, f"{volume * c:.8f}", 100, f"{volume / 2:.8f}",
+                     f"{volume * c / 2:.8f}", "0"])
+    return rows
+
+
+def exchange_info() -> Dict[str, Any]:
+    """A trimmed /api/v3/exchangeInfo response body"""
+    symbols = []
+    for base in BASE_ASSETS:
+        for quote in QUOTE_ASSETS:
+            if base == quote:
+                continue
+            symbols.append({
+                "symbol": base + quote, "status": "TRADING", "baseAsset": base, "quoteAsset": quote,
+                "isSpotTradingAllowed": True, "isMarginTradingAllowed": False,
+                "orderTypes": ["LIMIT", "MARKET"], "permissions": ["SPOT"]
+            })
+    return {"timezone": "UTC", "serverTime": 0, "rateLimits": [], "exchangeFilters": [], "symbols": symbols}
+
+
+LISTED = {entry["symbol"] for entry in exchange_info()["symbols"]}
+
+
+def yahoo_chart(symbol: str, query: Dict[str, str], now_ms: int) -> Dict[str, Any]:
+    """A /v8/finance/chart/<symbol> response body (daily candles on weekdays)"""
+    meta = {"currency": "USD", "symbol": symbol, "exchangeName": "NMS", "instrumentType": "EQUITY",
+            "exchangeTimezoneName": "America/New_York", "gmtoffset": -18000, "timezone": "EST",
+            "regularMarketPrice": round(price_at(symbol, now_ms), 2),
+            "previousClose": round(price_at(symbol, now_ms - 86400000), 2)}
+    if "period1" not in query:
+        return {"chart": {"result": [{"meta": meta}], "error": None}}
+
+    period1, period2 = int(query["period1"]), int(query["period2"])
+    day = -(-(period1 - YAHOO_OPEN_OFFSET_S) // 86400) * 86400 + YAHOO_OPEN_OFFSET_S
+    timestamps = []
+    while day < period2:
+        if (day // 86400 + 3) % 7 < 5:  # Monday to Friday
+            timestamps.append(day)
+        day += 86400
+    result = {"meta": meta, "indicators": {"quote": [{
+        "open": [round(price_at(symbol, t * 1000), 4) for t in timestamps],
+        "high": [round(price_at(symbol, t * 1000) * 1.01, 4) for t in timestamps],
+        "low": [round(price_at(symbol, t * 1000) * 0.99, 4) for t in timestamps],
+        "close": [round(price_at(symbol, (t + 23400) * 1000), 4) for t in timestamps],
+        "volume": [1000000 + t % 5000 for t in timestamps]
+    }]}}
+    if timestamps:
+        result["timestamp"] = timestamps
+    return {"chart": {"result": [result], "error": None}}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes - without this every
+    # keep-alive response would wait for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: Any):
+        data = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        path = parts.path
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+
+        if path.endswith("/klines"):
+            symbol = query.get("symbol", "")
+            if symbol not in LISTED:
+                return self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+            limit = min(int(query.get("limit", 500)), KLINES_MAX_LIMIT)
+            end_ms = min(int(query.get("endTime", now_ms)), now_ms)
+            return self._send(200, klines(symbol, query["interval"], int(query.get("startTime", 0)), end_ms, limit))
+        if path.endswith("/ticker/price"):
+            if "symbol" in query:
+                if query["symbol"] not in LISTED:
+                    return self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+                return self._send(200, {"symbol": query["symbol"], "price": f"{price_at(query['symbol'], now_ms):.8f}"})
+            wanted = json.loads(query["symbols"]) if "symbols" in query else sorted(LISTED)
+            if any(symbol not in LISTED for symbol in wanted):
+                return self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+            return self._send(200, [{"symbol": s, "price": f"{price_at(s, now_ms):.8f}"} for s in wanted])
+        if path.endswith("/exchangeInfo"):
+            return self._send(200, exchange_info())
+        if "/finance/chart/" in path:
+            return self._send(200, yahoo_chart(path.rsplit("/", 1)[-1], query, now_ms))
+        if path.endswith("/finance/spark"):
+            results = [{"symbol": s, "response": [yahoo_chart(s, {}, now_ms)["chart"]["result"][0]]}
+                       for s in query.get("symbols", "").split(",") if s]
+            return self._send(200, {"spark": {"result": results, "error": None}})
+        self._send(404, {"error": "Not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_standin(port: int = 0) -> str:
+    """Serve from a daemon thread; returns the base URL (e.g. http://127.0.0.1:8765)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stockscan-standin", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def point_stockscan_at(base_url: str):
+    """Send StockScan's Binance and Yahoo requests to the stand-in server"""
+    import stockscan_core
+    import stockscan_exporter
+    stockscan_core.BINANCE_BASE = f"{base_url}/api/v3"
+    stockscan_core.YAHOO_CHART_BASE = f"{base_url}/v8/finance/chart"
+    stockscan_core.YAHOO_SPARK_BASE = f"{base_url}/v7/finance/spark"
+    stockscan_exporter.BINANCE_BASE = f"{base_url}/api/v3"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StockScan stand-in market data server")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StandInHandler)
+    print(f"Serving stand-in Binance/Yahoo endpoints at http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+StockScan stand-in stream server
+A local ws:// server that speaks the part of Binance's combined stream
+endpoint StockScan uses, so stockscan_stream.PriceStream can be checked
+without network access:
+
+  handshake    RFC 6455 upgrade of GET /stream?streams=btcusdt@trade/...
+  updates      trade, aggTrade, kline and miniTicker events for every stream
+  subscribe    {"method": "SUBSCRIBE", "params": [...], "id": n} (and UNSUBSCRIBE)
+  ping/pong    a ping every PING_INTERVAL seconds; the client must answer
+  close        the server ends every session after --session seconds (as
+               Binance does after 24 hours), so the client has to reconnect
+
+Prices come from the same deterministic function as benchmarks/standin.py.
+
+Usage:
+    python benchmarks/ws_standin.py --port 8766     # serve until Ctrl+C
+    python benchmarks/ws_standin.py --check         # run a PriceStream against it
+
+    from ws_standin import start_ws_standin, point_stream_at
+    point_stream_at(start_ws_standin().url)         # in-process
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, parse_qsl
+
+from standin import price_at
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONTINUATION, OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x8, 0x9, 0xA
+
+PING_INTERVAL = 0.5
+CLOSE_GOING_AWAY = 1001
+
+
+class StreamStats:
+    """Counters the check (and anyone curious) can read while the server runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"connections": 0, "updates": 0, "pings": 0, "pongs": 0,
+                       "subscribes": 0, "unsubscribes": 0, "server_closes": 0, "client_closes": 0}
+
+    def add(self, name: str, count: int = 1):
+        with self._lock:
+            self.counts[name] += count
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+def stream_event(stream: str, t_ms: int) -> Optional[Dict[str, Any]]:
+    """Combined-stream message of a stream name at a time (None for unknown kinds)"""
+    symbol, _, kind = stream.partition("@")
+    symbol = symbol.upper()
+    price = f"{price_at(symbol, t_ms):.2f}"
+    if kind in ("trade", "aggTrade"):
+        data = {"e": kind, "E": t_ms, "s": symbol, "p": price, "q": "1.00", "T": t_ms}
+    elif kind.startswith("kline_"):
+        data = {"e": "kline", "E": t_ms, "s": symbol,
+                "k": {"t": t_ms - t_ms % 60000, "i": kind[6:], "c": price, "x": False}}
+    elif kind == "miniTicker":
+        data = {"e": "24hrMiniTicker", "E": t_ms, "s": symbol, "c": price}
+    else:
+        return None
+    return {"stream": stream, "data": data}
+
+
+def encode_frame(opcode: int, payload: bytes = b"", fin: bool = True) -> bytes:
+    """One unmasked frame (servers never mask)"""
+    first = (0x80 if fin else 0) | opcode
+    length = len(payload)
+    if length < 126:
+        return struct.pack("!BB", first, length) + payload
+    if length < 65536:
+        return struct.pack("!BBH", first, 126, length) + payload
+    return struct.pack("!BBQ", first, 127, length) + payload
+
+
+class StreamHandler(socketserver.BaseRequestHandler):
+    """One client connection: handshake, then updates until the session ends"""
+
+    def setup(self):
+        self.buffer = b""
+        self.send_lock = threading.Lock()
+
+    def send(self, opcode: int, payload: bytes = b"", fin: bool = True):
+        with self.send_lock:
+            self.request.sendall(encode_frame(opcode, payload, fin))
+
+    def handshake(self) -> Optional[List[str]]:
+        """Answer the upgrade request; returns the requested streams, or None if refused"""
+        while b"\r\n\r\n" not in self.buffer:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return None
+            self.buffer += chunk
+        head, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+        lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        request = lines[0].split()
+        key = headers.get("sec-websocket-key")
+        if (len(request) < 2 or request[0] != "GET" or not key
+                or headers.get("upgrade", "").lower() != "websocket"
+                or headers.get("sec-websocket-version") != "13"):
+            self.request.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return None
+        parts = urlsplit(request[1])
+        if parts.path != "/stream":
+            self.request.sendall(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            return None
+        # A slow upgrade leaves the client "connecting" for a while
+        time.sleep(self.server.handshake_delay)
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.request.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n"
+            "\r\n"
+        ).encode())
+        streams = dict(parse_qsl(parts.query)).get("streams", "")
+        return [stream for stream in streams.split("/") if stream]
+
+    def read_frames(self) -> List[tuple]:
+        """Complete (opcode, payload) client frames received so far (unmasked)"""
+        frames = []
+        while len(self.buffer) >= 2:
+            opcode = self.buffer[0] & 0x0F
+            masked = self.buffer[1] & 0x80
+            length = self.buffer[1] & 0x7F
+            offset = 2
+            if length == 126:
+                if len(self.buffer) < 4:
+                    break
+                length = struct.unpack("!H", self.buffer[2:4])[0]
+                offset = 4
+            elif length == 127:
+                if len(self.buffer) < 10:
+                    break
+                length = struct.unpack("!Q", self.buffer[2:10])[0]
+                offset = 10
+            if not masked:
+                raise ValueError("Client frames must be masked")
+            if len(self.buffer) < offset + 4 + length:
+                break
+            key = self.buffer[offset:offset + 4]
+            payload = bytes(b ^ key[i % 4] for i, b in enumerate(self.buffer[offset + 4:offset + 4 + length]))
+            self.buffer = self.buffer[offset + 4 + length:]
+            frames.append((opcode, payload))
+        return frames
+
+    def handle(self):
+        server = self.server
+        streams = self.handshake()
+        if streams is None:
+            return
+        server.stats.add("connections")
+        self.request.settimeout(server.update_interval)
+        session_end = time.monotonic() + server.session
+        next_ping = time.monotonic()
+        count = 0
+        try:
+            while time.monotonic() < session_end and not server.closing.is_set():
+                if time.monotonic() >= next_ping:
+                    self.send(OP_PING, str(count).encode())
+                    server.stats.add("pings")
+                    next_ping += PING_INTERVAL
+                now_ms = int(time.time() * 1000)
+                for stream in list(streams):
+                    event = stream_event(stream, now_ms)
+                    if event is None:
+                        continue
+                    message = json.dumps(event).encode()
+                    if count % 4 == 0:
+                        # Every fourth message arrives fragmented, as proxies may split them
+                        self.send(OP_TEXT, message[:16], fin=False)
+                        self.send(OP_CONTINUATION, message[16:])
+                    else:
+                        self.send(OP_TEXT, message)
+                    count += 1
+                    server.stats.add("updates")
+
+                try:
+                    chunk = self.request.recv(65536)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    return
+                self.buffer += chunk
+                for opcode, payload in self.read_frames():
+                    if opcode == OP_PONG:
+                        server.stats.add("pongs")
+                    elif opcode == OP_CLOSE:
+                        server.stats.add("client_closes")
+                        self.send(OP_CLOSE, payload[:2])
+                        return
+                    elif opcode == OP_TEXT:
+                        request = json.loads(payload)
+                        if request.get("method") == "SUBSCRIBE":
+                            streams += [s for s in request.get("params", []) if s not in streams]
+                            server.stats.add("subscribes")
+                        elif request.get("method") == "UNSUBSCRIBE":
+                            streams = [s for s in streams if s not in request.get("params", [])]
+                            server.stats.add("unsubscribes")
+                        self.send(OP_TEXT, json.dumps({"result": None, "id": request.get("id")}).encode())
+
+            # Session over - say goodbye and wait briefly for the client's close frame
+            self.send(OP_CLOSE, struct.pack("!H", CLOSE_GOING_AWAY))
+            server.stats.add("server_closes")
+            self.request.settimeout(1.0)
+            self.request.recv(4096)
+        except (OSError, ValueError):
+            pass
+
+
+class StreamServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, session: float, update_interval: float):
+        super().__init__(address, StreamHandler)
+        self.session = session
+        self.update_interval = update_interval
+        self.stats = StreamStats()
+        self.closing = threading.Event()
+        self.handshake_delay = 0.0
+
+
+def start_ws_standin(port: int = 0, session: float = 3.0, update_interval: float = 0.05) -> StreamServer:
+    """Serve from a daemon thread; the server's url attribute is e.g. ws://127.0.0.1:8766"""
+    server = StreamServer(("127.0.0.1", port), session, update_interval)
+    server.url = f"ws://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="stockscan-ws-standin", daemon=True).start()
+    return server
+
+
+def point_stream_at(base_url: str):
+    """Open StockScan's price streams at the stand-in server"""
+    import stockscan_stream
+    stockscan_stream.BINANCE_STREAM_BASE = base_url
+
+
+def _wait(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def check(session: float = 2.0) -> bool:
+    """
+    Run a PriceStream against a fresh stand-in and check that its PriceTable
+    follows the updates through a subscribe, pings and a server close, then
+    that pairs added while connecting are subscribed and that the stream
+    stays within max_symbols.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import stockscan_stream
+
+    server = start_ws_standin(session=session)
+    stockscan_stream.BACKOFF_BASE = 0.1
+    stream = stockscan_stream.PriceStream(["BTCUSDT"], base_url=server.url).start()
+    results = []
+
+    def expect(name: str, passed: bool):
+        results.append(passed)
+        print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+
+    try:
+        first = stream.table.wait_for("BTCUSDT", 2.0)
+        expect("first trade reaches the table", first is not None)
+        if first is not None:
+            expected = float(f"{price_at('BTCUSDT', first['trade_time']):.2f}")
+            expect("price matches the stand-in", first["price"] == expected)
+        expect("connected", stream.connected)
+
+        stream.subscribe(["ethusdt"])
+        expect("subscribe adds a pair without reconnecting",
+               stream.table.wait_for("ETHUSDT", 2.0) is not None and stream.reconnects == 0)
+
+        expect("pings are answered", _wait(lambda: server.stats.snapshot()["pongs"] > 0, 2.0))
+
+        before = stream.table.get("BTCUSDT")["trade_time"]
+        expect("reconnects after the server closes the session",
+               _wait(lambda: stream.reconnects >= 1 and stream.connected, session + 3.0))
+        expect("updates resume after reconnecting", _wait(
+            lambda: (stream.table.get("BTCUSDT")["trade_time"] > before
+                     and stream.table.get("ETHUSDT")["trade_time"] > before), 2.0))
+        expect("both pairs subscribed again",
+               server.stats.snapshot()["connections"] >= 2 and set(stream.symbols) == {"BTCUSDT", "ETHUSDT"})
+    finally:
+        stream.stop()
+        server.closing.set()
+        server.shutdown()
+
+    print(f"  server: {server.stats.snapshot()}")
+    print(f"  client: reconnects={stream.reconnects} last_error={stream.last_error!r}")
+
+    # Slow handshake, at most two pairs
+    server = start_ws_standin(session=60.0)
+    server.handshake_delay = 0.5
+    stream = stockscan_stream.PriceStream(["BTCUSDT"], base_url=server.url, max_symbols=2).start()
+    try:
+        time.sleep(0.2)
+        stream.subscribe(["XRPUSDT"])
+        expect("pair added while connecting gets trades",
+               stream.table.wait_for("XRPUSDT", 2.0) is not None and stream.reconnects == 0)
+        stream.price("BTCUSDT")
+        stream.subscribe(["SOLUSDT"])
+        expect("third pair drops the least recently asked one",
+               stream.symbols == ["BTCUSDT", "SOLUSDT"] and stream.table.get("XRPUSDT") is None)
+        expect("dropped pair is unsubscribed", _wait(lambda: server.stats.snapshot()["unsubscribes"] == 1, 2.0))
+        time.sleep(0.3)
+        expect("no trades of the dropped pair reach the table",
+               stream.table.wait_for("SOLUSDT", 2.0) is not None and stream.table.get("XRPUSDT") is None)
+    finally:
+        stream.stop()
+        server.closing.set()
+        server.shutdown()
+
+    print(f"  server: {server.stats.snapshot()}")
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StockScan stand-in stream server")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on (default: 8766)")
+    parser.add_argument("--session", type=float, default=60.0,
+                        help="Seconds before the server closes each connection (default: 60)")
+    parser.add_argument("--check", action="store_true",
+                        help="Run a PriceStream against an in-process server and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        print("Checking PriceStream against the stand-in stream server")
+        sys.exit(0 if check() else 1)
+
+    server = StreamServer(("127.0.0.1", args.port), args.session, 0.05)
+    print(f"Serving a stand-in Binance stream at ws://127.0.0.1:{args.port}/stream")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,9 @@ Licensed under the MIT License
 import sys
 import os
 import argparse
+from contextlib import ExitStack
 from datetime import datetime, timedelta
+from time import perf_counter
 from typing import Optional, Dict, Any, List
 
 # Try to import requests, provide helpful error if not available
@@ -25,181 +27,20 @@ except ImportError:
     print("Or: python -m pip install requests\n")
     sys.exit(1)
 
-# Try to import yfinance for stock/commodity exports
-try:
-    import yfinance as yf
-    YFINANCE_AVAILABLE = True
-except ImportError:
-    YFINANCE_AVAILABLE = False
-
-# ANSI Color Codes (Purple Theme)
-PURPLE = '\033[95m'
-BRIGHT_PURPLE = '\033[1;35m'
-CYAN = '\033[96m'
-GREEN = '\033[92m'
-YELLOW = '\033[93m'
-RED = '\033[91m'
-BOLD = '\033[1m'
-RESET = '\033[0m'
-DIM = '\033[2m'
-
-# API Configuration
-BINANCE_BASE = "https://api.binance.com/api/v3"
-FINNHUB_BASE = "https://finnhub.io/api/v1"
-FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY", "")
-ALPHAVANTAGE_BASE = "https://www.alphavantage.co/query"
-ALPHAVANTAGE_API_KEY = os.getenv("ALPHAVANTAGE_API_KEY", "demo")
-
-# Commodity ETF Symbols (130+ commodity ETFs)
-COMMODITY_ETFS = {
-    # Precious Metals - Gold
-    "GLD": "SPDR Gold Shares",
-    "IAU": "iShares Gold Trust",
-    "GLDM": "SPDR Gold MiniShares",
-    "SGOL": "abrdn Physical Gold Shares",
-    "BAR": "GraniteShares Gold Trust",
-    "AAAU": "Goldman Sachs Physical Gold",
-    "OUNZ": "VanEck Merk Gold Trust",
-    "GLDL": "Goldman Sachs ActiveBeta Gold",
-    "IAUM": "iShares Gold Trust Micro",
-    "AAAU": "Perth Mint Physical Gold",
-    
-    # Precious Metals - Silver
-    "SLV": "iShares Silver Trust",
-    "SIVR": "abrdn Physical Silver Shares",
-    "PSLV": "Sprott Physical Silver Trust",
-    "SLVP": "iShares MSCI Global Silver Miners",
-    
-    # Precious Metals - Platinum & Palladium
-    "PPLT": "abrdn Physical Platinum Shares",
-    "PALL": "abrdn Physical Palladium Shares",
-    
-    # Precious Metals - Multi-Metal
-    "GLTR": "abrdn Physical Precious Metals Basket",
-    "DBP": "Invesco DB Precious Metals Fund",
-    
-    # Energy - Crude Oil
-    "USO": "United States Oil Fund",
-    "UCO": "ProShares Ultra Bloomberg Crude Oil",
-    "DBO": "Invesco DB Oil Fund",
-    "USL": "United States 12 Month Oil Fund",
-    "SCO": "ProShares UltraShort Bloomberg Crude Oil",
-    "BNO": "United States Brent Oil Fund",
-    "DNO": "United States Short Oil Fund",
-    "OILK": "ProShares K-1 Free Crude Oil Strategy",
-    "OLEM": "iShares Commodities Select Strategy",
-    "USO": "United States Oil Fund LP",
-    
-    # Energy - Natural Gas
-    "UNG": "United States Natural Gas Fund",
-    "BOIL": "ProShares Ultra Bloomberg Natural Gas",
-    "KOLD": "ProShares UltraShort Bloomberg Natural Gas",
-    "UNL": "United States 12 Month Natural Gas Fund",
-    "GAZ": "iPath Series B Bloomberg Natural Gas",
-    "GASL": "Direxion Daily Natural Gas Related Bull 3X",
-    "GASX": "Direxion Daily Natural Gas Related Bear 3X",
-    
-    # Energy - Gasoline & Heating Oil
-    "UGA": "United States Gasoline Fund",
-    "UHN": "United States Heating Oil Fund",
-    
-    # Energy - Broad Energy
-    "DBE": "Invesco DB Energy Fund",
-    "IXC": "iShares Global Energy ETF",
-    "XLE": "Energy Select Sector SPDR Fund",
-    "VDE": "Vanguard Energy ETF",
-    "IYE": "iShares U.S. Energy ETF",
-    
-    # Agriculture - Grains
-    "CORN": "Teucrium Corn Fund",
-    "WEAT": "Teucrium Wheat Fund",
-    "SOYB": "Teucrium Soybean Fund",
-    "OATS": "Teucrium Oat Fund",
-    "RICE": "Teucrium Rice Fund",
-    "WEAT": "Teucrium Wheat Fund",
-    "CANE": "Teucrium Sugar Fund",
-    
-    # Agriculture - Soft Commodities
-    "JO": "iPath Series B Bloomberg Coffee",
-    "NIB": "iPath Bloomberg Cocoa",
-    "SGG": "iPath Series B Bloomberg Sugar",
-    "BAL": "iPath Bloomberg Cotton",
-    "WOOD": "iShares Global Timber & Forestry ETF",
-    "CUT": "Invesco MSCI Global Timber ETF",
-    
-    # Agriculture - Livestock
-    "COW": "iPath Series B Bloomberg Livestock",
-    
-    # Agriculture - Broad Agriculture
-    "DBA": "Invesco DB Agriculture Fund",
-    "TAGS": "Teucrium Agricultural Fund",
-    "RJA": "Elements Rogers International Commodity Agriculture",
-    "MOO": "VanEck Agribusiness ETF",
-    "VEGI": "iShares MSCI Global Agriculture Producers",
-    "PAGG": "Invesco Global Agriculture ETF",
-    "FTAG": "First Trust Indxx Global Agriculture ETF",
-    
-    # Industrial Metals - Copper
-    "CPER": "United States Copper Index Fund",
-    "JJC": "iPath Series B Bloomberg Copper",
-    "COPX": "Global X Copper Miners ETF",
-    
-    # Industrial Metals - Aluminum
-    "JJU": "iPath Series B Bloomberg Aluminum",
-    
-    # Industrial Metals - Nickel
-    "JJN": "iPath Series B Bloomberg Nickel",
-    
-    # Industrial Metals - Broad Base Metals
-    "DBB": "Invesco DB Base Metals Fund",
-    "PICK": "iShares MSCI Global Metals & Mining Producers",
-    "XME": "SPDR S&P Metals & Mining ETF",
-    
-    # Broad Commodity Baskets
-    "DBC": "Invesco DB Commodity Index Tracking Fund",
-    "PDBC": "Invesco Optimum Yield Diversified Commodity",
-    "GSG": "iShares S&P GSCI Commodity-Indexed Trust",
-    "USCI": "United States Commodity Index Fund",
-    "GCC": "WisdomTree Continuous Commodity Index Fund",
-    "RJI": "Elements Rogers International Commodity Index",
-    "COMT": "iShares Commodities Select Strategy ETF",
-    "CMDY": "iShares Bloomberg Roll Select Commodity Strategy",
-    "BCI": "abrdn Bloomberg All Commodity Strategy K-1 Free",
-    "FTGC": "First Trust Global Tactical Commodity Strategy",
-    "COMB": "GraniteShares Bloomberg Commodity Broad Strategy",
-    
-    # Uranium & Nuclear
-    "URA": "Global X Uranium ETF",
-    "URNM": "Sprott Uranium Miners ETF",
-    "NLR": "VanEck Uranium+Nuclear Energy ETF",
-    "HURA": "Horizons Global Uranium Index ETF",
-    
-    # Carbon Credits
-    "KRBN": "KraneShares Global Carbon Strategy ETF",
-    "KEUA": "KraneShares European Carbon Allowance Strategy",
-    
-    # Leveraged & Inverse Commodity ETFs
-    "UGL": "ProShares Ultra Gold",
-    "GLL": "ProShares UltraShort Gold",
-    "AGQ": "ProShares Ultra Silver",
-    "ZSL": "ProShares UltraShort Silver",
-    "UGLD": "VelocityShares 3x Long Gold ETN",
-    "DGLD": "VelocityShares 3x Inverse Gold ETN",
-    "USLV": "VelocityShares 3x Long Silver ETN",
-    "DSLV": "VelocityShares 3x Inverse Silver ETN",
-    "BOIL": "ProShares Ultra Bloomberg Natural Gas",
-    "KOLD": "ProShares UltraShort Bloomberg Natural Gas",
-    "UCO": "ProShares Ultra Bloomberg Crude Oil",
-    "SCO": "ProShares UltraShort Bloomberg Crude Oil",
-    "WTIU": "ProShares Ultra Bloomberg WTI Crude Oil",
-    "WTID": "ProShares UltraShort Bloomberg WTI Crude Oil",
-    
-    # Specialty Commodities
-    "PLTM": "GraniteShares Platinum Trust",
-    "PALL": "abrdn Physical Palladium Shares ETF",
-    "WITE": "ETRACS Bloomberg Commodity Index Total Return ETN",
-    "DJCI": "ETRACS Bloomberg Commodity Index Total Return ETN",
-}
+# The lookups live in stockscan_core so the other commands can import them
+# without running this script a second time; `import stockscan` still works
+import stockscan_core
+from stockscan_core import (
+    YFINANCE_AVAILABLE, PURPLE, BRIGHT_PURPLE, CYAN, GREEN, YELLOW, RED, BOLD, RESET, DIM, COMMODITY_ETFS,
+    get_crypto_price, get_stock_price, get_live_crypto_price, get_live_stock_price,
+    list_crypto_symbols, list_stock_symbols, fetch_yahoo_export_columns
+)
+from stockscan_klines import iter_kline_pages, kline_columns
+from stockscan_writers import open_export_writer, has_checkpoint, available_formats, EXPORT_FORMATS
+from stockscan_resample import Resampler, base_timeframe, format_offset, parse_offset, truncate_columns, skip_columns
+from stockscan_timeindex import zone_day_start_ms
+from stockscan_stream import start_stream, STREAM_ENABLED
+from stockscan_metrics import start_metrics_server, METRICS_PORT
 
 
 def print_banner():
@@ -277,8 +118,38 @@ def print_usage():
   python stockscan.py commodity USO 2024-01-10 --timeframe 1wk
   python stockscan.py commodity CORN 2024-01-15 --timeframe 1mo
 
+  {GREEN}# Look up many symbols/times from a CSV or JSONL file{RESET}
+  python stockscan.py batch trades.csv results.csv
+  python stockscan.py batch trades.jsonl results.jsonl --market stock
+
+  {GREEN}# Price of every USDT pair / commodity ETF at one moment, as one table{RESET}
+  python stockscan.py snapshot crypto 2024-01-15 14:30 --timeframe 1m
+  python stockscan.py snapshot commodities 2024-01-15 snapshot.csv
+  python stockscan.py snapshot stocks 2024-01-15 --file watchlist.txt
+
+  {GREEN}# Biggest movers of a whole universe between two dates{RESET}
+  python stockscan.py scan crypto 2024-01-01 2024-03-31 --top 15
+  python stockscan.py scan commodities 2024-01-01 2024-06-30 --by range
+  python stockscan.py scan stocks 2024-01-01 2024-06-30 --file watchlist.txt --output scan.csv
+
+  {GREEN}# Watch live prices of many symbols (one request per refresh){RESET}
+  python stockscan.py watch crypto BTCUSDT ETHUSDT SOLUSDT --interval 2
+  python stockscan.py watch stocks AAPL MSFT TSLA RELIANCE.NS
+  python stockscan.py watch crypto --file watchlist.txt
+  python stockscan.py watch crypto BTCUSDT ETHUSDT --stream
+
+  {GREEN}# Build 5m, 1h and 1d candles from a 1m export (no download){RESET}
+  python stockscan.py resample exports/BTCUSDT_1m_2024-01-01_to_2024-01-31.csv 5m,1h,1d
+  python stockscan.py resample exports/BTCUSDT_1m_2024-01-01_to_2024-01-31.csv 1d --offset 8h
+
+  {GREEN}# Serve lookups, live prices and exports as a JSON API{RESET}
+  python stockscan.py serve --port 8080
+  curl "http://127.0.0.1:8080/crypto?symbol=BTCUSDT&date=2024-01-15&time=14:30&timeframe=1h"
+
   {GREEN}# List all available symbols{RESET}
   python stockscan.py list crypto
+  python stockscan.py list crypto --quote BTC --limit 0
+  python stockscan.py list crypto --search eth
   python stockscan.py list stocks
   python stockscan.py list commodities
 
@@ -320,786 +191,6 @@ def print_usage():
     print(usage)
 
 
-def get_crypto_price(symbol: str, date_str: str, time_str: Optional[str] = None, timeframe: str = "5m") -> Dict[str, Any]:
-    """
-    Get crypto price from Binance at specific time using OHLCV candle logic.
-    Finds the candle that CONTAINS the requested time and returns its CLOSE price.
-    
-    Args:
-        symbol: Trading pair (e.g., BTCUSDT)
-        date_str: Date in YYYY-MM-DD format
-        time_str: Optional time in HH:MM format (default: 00:00)
-        timeframe: Candle interval - 1m, 5m, 15m, 1h, 1d (default: 1m)
-    
-    Returns:
-        Dict with price data or error
-    """
-    try:
-        # Parse datetime
-        if time_str:
-            dt_str = f"{date_str} {time_str}"
-            dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-        else:
-            dt = datetime.strptime(date_str, "%Y-%m-%d")
-        
-        # Check if future
-        if dt > datetime.now():
-            return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
-        
-        # For weekly/monthly timeframes, check if the period has completed
-        if timeframe in ["1w", "1M"]:
-            if timeframe == "1w":
-                end_dt = dt + timedelta(days=7)
-                period_name = "week"
-            else:  # 1M
-                end_dt = dt + timedelta(days=30)
-                period_name = "month"
-            
-            if end_dt > datetime.now():
-                return {"error": f"The {period_name} period starting from {date_str} has not completed yet.\nEnd date would be {end_dt.strftime('%Y-%m-%d')}, which is in the future.\nPlease choose an earlier date or use a shorter timeframe."}
-        
-        # Convert to milliseconds for Binance
-        target_timestamp_ms = int(dt.timestamp() * 1000)
-        
-        # Calculate time window based on timeframe
-        timeframe_ms = {
-            "1s": 1000,
-            "1m": 60000,
-            "3m": 180000,
-            "5m": 300000,
-            "15m": 900000,
-            "30m": 1800000,
-            "1h": 3600000,
-            "2h": 7200000,
-            "4h": 14400000,
-            "6h": 21600000,
-            "8h": 28800000,
-            "12h": 43200000,
-            "1d": 86400000,
-            "3d": 259200000,
-            "1w": 604800000,
-            "1M": 2592000000
-        }
-        
-        interval = timeframe if timeframe in timeframe_ms else "1m"
-        window = timeframe_ms[interval]
-        
-        # For intraday timeframes (under 1d), fetch 1-minute candles and aggregate
-        # This allows starting from ANY arbitrary time
-        intraday_timeframes = ['1s', '1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h']
-        
-        if interval in intraday_timeframes:
-            # Fetch 1-minute candles to aggregate into custom period
-            start_time = target_timestamp_ms
-            end_time = target_timestamp_ms + window
-            
-            url = f"{BINANCE_BASE}/klines"
-            params = {
-                "symbol": symbol,
-                "interval": "1m",  # Fetch 1-minute candles
-                "startTime": start_time,
-                "endTime": end_time,
-                "limit": 1500  # Max limit
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                return {"error": "No data available for this time.\nThe crypto asset may not have existed yet, or data is unavailable."}
-            
-            # Aggregate the 1-minute candles into one
-            opens = [float(candle[1]) for candle in data]
-            highs = [float(candle[2]) for candle in data]
-            lows = [float(candle[3]) for candle in data]
-            closes = [float(candle[4]) for candle in data]
-            volumes = [float(candle[5]) for candle in data]
-            
-            # Create aggregated candle
-            target_candle = [
-                data[0][0],  # Open time (first candle)
-                opens[0],  # First open
-                max(highs),  # Highest high
-                min(lows),  # Lowest low
-                closes[-1],  # Last close
-                sum(volumes),  # Total volume
-                data[-1][6]  # Close time (last candle)
-            ]
-            
-            candle_open_time = dt
-            candle_close_time = datetime.fromtimestamp(end_time / 1000)
-            
-        elif interval in ["1w", "1M"]:
-            # For weekly/monthly timeframes, start from exact date and go forward
-            start_time = target_timestamp_ms
-            end_time = target_timestamp_ms + window
-            
-            url = f"{BINANCE_BASE}/klines"
-            params = {
-                "symbol": symbol,
-                "interval": interval,
-                "startTime": start_time,
-                "endTime": end_time,
-                "limit": 1
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                return {"error": "No data available for this time.\nThe crypto asset may not have existed yet, or data is unavailable."}
-            
-            target_candle = data[0]
-            
-            # Calculate actual period
-            candle_open_time = dt  # Start from requested date
-            candle_close_time = dt + timedelta(milliseconds=window)
-        else:
-            # For daily and above (3d), use standard Binance candles
-            url = f"{BINANCE_BASE}/klines"
-            params = {
-                "symbol": symbol,
-                "interval": interval,
-                "startTime": target_timestamp_ms - (window * 2),  # Fetch candles before
-                "endTime": target_timestamp_ms + (window * 2),    # and after target time
-                "limit": 10
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()            
-            if not data:
-                return {"error": "No data available for this time.\nThe crypto asset may not have existed yet, or data is unavailable."}
-            
-            # Find the candle that CONTAINS the target time
-            # Candle structure: [open_time, open, high, low, close, volume, close_time, ...]
-            target_candle = None
-            for candle in data:
-                candle_open_time_ms = candle[0]
-                candle_close_time_ms = candle[6]
-                
-                # Check if target time falls within this candle
-                if candle_open_time_ms <= target_timestamp_ms < candle_close_time_ms:
-                    target_candle = candle
-                    break
-            
-            # If no exact match, use the closest candle
-            if not target_candle:
-                target_candle = min(data, key=lambda c: abs(c[0] - target_timestamp_ms))
-            
-            # Extract candle data
-            candle_open_time = datetime.fromtimestamp(target_candle[0] / 1000)
-            candle_close_time = datetime.fromtimestamp(target_candle[6] / 1000)
-        
-        # Check if candle crosses midnight (spans two different dates)
-        crosses_midnight = candle_open_time.date() != candle_close_time.date()
-        midnight_note = None
-        
-        if crosses_midnight:
-            # Calculate time in each day
-            start_date = candle_open_time.date()
-            end_date = candle_close_time.date()
-            
-            # Time until midnight from start
-            midnight_of_start = datetime.combine(start_date, datetime.max.time()).replace(microsecond=0) + timedelta(seconds=1)
-            time_in_first_day = (midnight_of_start - candle_open_time).total_seconds()
-            
-            # Time from midnight in next day
-            time_in_second_day = (candle_close_time - midnight_of_start).total_seconds()
-            
-            # Convert to readable format with hours and minutes
-            def seconds_to_readable(seconds):
-                if seconds < 60:
-                    return f"{int(seconds)} second(s)"
-                elif seconds < 3600:
-                    minutes = int(seconds / 60)
-                    return f"{minutes} minute(s)"
-                else:
-                    hours = int(seconds / 3600)
-                    remaining_seconds = seconds % 3600
-                    minutes = int(remaining_seconds / 60)
-                    
-                    if minutes > 0:
-                        return f"{hours} hour(s) {minutes} minute(s)"
-                    else:
-                        return f"{hours} hour(s)"
-            
-            midnight_note = f"{seconds_to_readable(time_in_first_day)} from {start_date.strftime('%Y-%m-%d')}, {seconds_to_readable(time_in_second_day)} from {end_date.strftime('%Y-%m-%d')}"
-        
-        result = {
-            "symbol": symbol,
-            "market": "Crypto (Binance)",
-            "requested_time": dt.strftime("%Y-%m-%d %H:%M UTC"),
-            "timeframe": interval,
-            "candle_start": candle_open_time.strftime("%Y-%m-%d %H:%M UTC"),
-            "candle_end": candle_close_time.strftime("%Y-%m-%d %H:%M UTC"),
-            "open": float(target_candle[1]),
-            "high": float(target_candle[2]),
-            "low": float(target_candle[3]),
-            "close": float(target_candle[4]),  # This is the price at that time
-            "volume": float(target_candle[5]),
-            "crosses_midnight": crosses_midnight,
-            "midnight_note": midnight_note
-        }
-        
-        return result
-    
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Failed to fetch data from Binance: {str(e)}"}
-    except ValueError as e:
-        return {"error": f"Invalid date/time format: {str(e)}"}
-    except Exception as e:
-        return {"error": f"Unexpected error: {str(e)}"}
-
-
-def get_stock_price(symbol: str, date_str: str, time_str: Optional[str] = None, timeframe: str = "1d") -> Dict[str, Any]:
-    """
-    Get stock price at specific date using OHLCV candle logic.
-    Supports multiple timeframes with full historical data.
-    
-    Args:
-        symbol: Stock symbol (e.g., AAPL, RELIANCE.NS)
-        date_str: Date in YYYY-MM-DD format
-        time_str: Ignored for stocks (not used)
-        timeframe: Candle interval - 1d, 1wk, 1mo (default: 1d)
-    
-    Returns:
-        Dict with price data or error
-    """
-    # Try Yahoo Finance (supports all timeframes, no API key needed!)
-    result = get_stock_price_yahoo(symbol, date_str, time_str, timeframe)
-    if "error" not in result:
-        return result
-    
-    # Pass through specific error messages
-    error_msg = result["error"]
-    if any(phrase in error_msg for phrase in [
-        "has not completed yet",
-        "may not have existed",
-        "No data found",
-        "No trading data",
-        "Incomplete data",
-        "No price data",
-        "Future price data"
-    ]):
-        return result
-    
-    # If Yahoo Finance failed for other reasons, return the original error with context
-    return {
-        "error": result["error"] + "\n\nPlease check the symbol and date, or try a different timeframe."
-    }
-
-
-def get_stock_price_yahoo(symbol: str, date_str: str, time_str: Optional[str] = None, timeframe: str = "1d") -> Dict[str, Any]:
-    """
-    Get stock price from Yahoo Finance (no API key needed!)
-    Supports multiple timeframes: 1d (daily), 1wk (weekly), 1mo (monthly)
-    """
-    try:
-        # Parse date
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        
-        # Check if future
-        if dt > datetime.now():
-            return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
-        
-        # For weekly/monthly timeframes, check if the period has completed
-        if timeframe in ["1wk", "1mo"]:
-            if timeframe == "1wk":
-                end_dt = dt + timedelta(days=7)
-                period_name = "week"
-            else:  # 1mo
-                end_dt = dt + timedelta(days=30)
-                period_name = "month"
-            
-            if end_dt > datetime.now():
-                return {"error": f"The {period_name} period starting from {date_str} has not completed yet.\nEnd date would be {end_dt.strftime('%Y-%m-%d')}, which is in the future.\nPlease choose an earlier date or use a shorter timeframe."}
-        
-        # Map timeframe to Yahoo Finance interval
-        interval_map = {
-            "1d": "1d",
-            "1wk": "1wk",
-            "1mo": "1mo"
-        }
-        
-        interval = interval_map.get(timeframe, "1d")
-        
-        # For weekly/monthly timeframes, fetch DAILY data and aggregate
-        if timeframe in ["1wk", "1mo"]:
-            # Fetch daily data for the period
-            # Add buffer days before to handle holidays/weekends at start
-            start_dt = dt - timedelta(days=5)  # Go back 5 days to catch the requested date
-            
-            # Calculate end date based on timeframe
-            # Add extra days to account for weekends and holidays
-            if timeframe == "1wk":
-                end_dt = dt + timedelta(days=14)  # Fetch 2 weeks to ensure we get 7 calendar days of data
-            else:  # 1mo
-                end_dt = dt + timedelta(days=40)  # Fetch 40 days to ensure we get 30 calendar days of data
-            
-            period1 = int(start_dt.timestamp())
-            period2 = int(end_dt.timestamp())
-            
-            # Fetch DAILY data (not weekly/monthly)
-            fetch_interval = "1d"
-        else:
-            # Daily - use old logic
-            days_before = 7
-            days_after = 1
-            
-            start_dt = dt - timedelta(days=days_before)
-            end_dt = dt + timedelta(days=days_after)
-            
-            period1 = int(start_dt.timestamp())
-            period2 = int(end_dt.timestamp())
-            fetch_interval = interval
-        
-        # Yahoo Finance API endpoint
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        params = {
-            "period1": period1,
-            "period2": period2,
-            "interval": fetch_interval,
-            "events": "history"
-        }
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Check for errors
-        if "chart" not in data or "result" not in data["chart"]:
-            return {"error": "Invalid response from Yahoo Finance"}
-        
-        result = data["chart"]["result"]
-        if not result or len(result) == 0:
-            return {"error": f"No data found for symbol {symbol}.\nThe stock/commodity may not have existed at that time, or data is unavailable.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
-        
-        quote = result[0]
-        
-        if "timestamp" not in quote or "indicators" not in quote:
-            return {"error": "Invalid data format from Yahoo Finance.\nThe stock/commodity may not have existed at that time, or data is unavailable.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
-        
-        timestamps = quote["timestamp"]
-        indicators = quote["indicators"]["quote"][0]
-        
-        if not timestamps or not indicators:
-            return {"error": "No price data available.\nThe stock/commodity may not have existed at that time, or data is unavailable.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
-        
-        # Find the data for our target period
-        if timeframe in ["1wk", "1mo"]:
-            # For weekly/monthly, aggregate daily data into one candle
-            if not timestamps or len(timestamps) == 0:
-                return {"error": "No price data available for this period"}
-            
-            # Calculate the end date for the period (inclusive)
-            if timeframe == "1wk":
-                period_end_date = (dt + timedelta(days=6)).date()  # 7 days total (day 0 to day 6)
-            else:  # 1mo
-                period_end_date = (dt + timedelta(days=29)).date()  # 30 days total (day 0 to day 29)
-            
-            # Filter timestamps to only include dates within the requested period
-            filtered_indices = []
-            
-            for i, ts in enumerate(timestamps):
-                ts_date = datetime.fromtimestamp(ts).date()
-                # Include if date is >= requested date AND <= period end date (inclusive)
-                if dt.date() <= ts_date <= period_end_date:
-                    filtered_indices.append(i)
-            
-            if not filtered_indices:
-                return {"error": "No trading data available for the requested period.\nThe stock/commodity may not have existed at that time, or data is unavailable."}
-            
-            # Aggregate only the filtered daily candles
-            opens = [indicators["open"][i] for i in filtered_indices if indicators["open"][i] is not None]
-            highs = [indicators["high"][i] for i in filtered_indices if indicators["high"][i] is not None]
-            lows = [indicators["low"][i] for i in filtered_indices if indicators["low"][i] is not None]
-            closes = [indicators["close"][i] for i in filtered_indices if indicators["close"][i] is not None]
-            volumes = [indicators["volume"][i] for i in filtered_indices if indicators["volume"][i] is not None]
-            
-            if not opens or not closes:
-                return {"error": "Incomplete data for this period.\nThe stock/commodity may not have existed at that time, or data is unavailable."}
-            
-            # Create aggregated candle
-            open_price = opens[0]  # First open
-            high_price = max(highs)  # Highest high
-            low_price = min(lows)  # Lowest low
-            close_price = closes[-1]  # Last close
-            volume = sum(volumes)  # Total volume
-            
-            # Show the FULL requested period (not just trading days)
-            # This shows the complete 7-day or 30-day period
-            candle_start_date = dt.strftime("%Y-%m-%d")
-            if timeframe == "1wk":
-                candle_end_date = (dt + timedelta(days=6)).strftime("%Y-%m-%d")
-                expected_period_days = 7
-            else:  # 1mo
-                candle_end_date = (dt + timedelta(days=29)).strftime("%Y-%m-%d")
-                expected_period_days = 30
-            
-            # Calculate missing days (holidays/weekends)
-            trading_days = len(filtered_indices)
-            missing_days = expected_period_days - trading_days
-            
-            # Store missing days info for display
-            if missing_days > 0:
-                result_missing_days = missing_days
-            else:
-                result_missing_days = None
-        else:
-            # Daily - find the closest date to our target
-            target_ts = int(dt.timestamp())
-            closest_idx = 0
-            min_diff = float('inf')
-            
-            for i, ts in enumerate(timestamps):
-                # Convert timestamp to date and compare
-                ts_date = datetime.fromtimestamp(ts).date()
-                target_date = dt.date()
-                
-                # Daily - exact match preferred
-                if ts_date == target_date:
-                    closest_idx = i
-                    break
-                
-                diff = abs(ts - target_ts)
-                if diff < min_diff and ts <= target_ts + 86400:  # Within 1 day after
-                    min_diff = diff
-                    closest_idx = i
-            
-            candle_start_date = datetime.fromtimestamp(timestamps[closest_idx]).strftime("%Y-%m-%d")
-            candle_end_date = None  # Not used for daily
-            result_missing_days = None  # Not used for daily
-            
-            open_price = indicators["open"][closest_idx]
-            high_price = indicators["high"][closest_idx]
-            low_price = indicators["low"][closest_idx]
-            close_price = indicators["close"][closest_idx]
-            volume = indicators["volume"][closest_idx]
-        
-        # Check for None values
-        if None in [open_price, high_price, low_price, close_price, volume]:
-            return {"error": f"Incomplete data for {date_str}.\nMarket may have been closed, or the stock/commodity may not have existed at that time."}
-        
-        # Map timeframe to display name
-        timeframe_display = {
-            "1d": "Daily",
-            "1wk": "Weekly",
-            "1mo": "Monthly"
-        }
-        
-        result = {
-            "symbol": symbol,
-            "market": "Stocks (Yahoo Finance)",
-            "requested_date": date_str,
-            "candle_start_date": candle_start_date,
-            "candle_end_date": candle_end_date,
-            "timeframe": timeframe_display.get(timeframe, "Daily"),
-            "open": float(open_price),
-            "high": float(high_price),
-            "low": float(low_price),
-            "close": float(close_price),
-            "volume": float(volume),
-            "missing_days": result_missing_days
-        }
-        
-        # Add note if date was adjusted (only for daily)
-        if timeframe == "1d" and candle_start_date != date_str:
-            result["note"] = f"Market was closed on {date_str}. Showing closest trading day."
-        
-        return result
-    
-    except requests.exceptions.RequestException as e:
-        error_str = str(e)
-        if "400" in error_str or "Bad Request" in error_str:
-            return {"error": f"No data available for {symbol} on {date_str}.\nThe stock/commodity may not have existed at that time, or data is unavailable for this date range.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
-        return {"error": f"Failed to fetch from Yahoo Finance: {str(e)}"}
-    except (KeyError, IndexError, TypeError) as e:
-        return {"error": f"Error parsing Yahoo Finance data.\nThe stock/commodity may not have existed at that time, or data format is unexpected.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
-    except ValueError as e:
-        return {"error": f"Invalid date format: {str(e)}"}
-    except Exception as e:
-        return {"error": f"Yahoo Finance error: {str(e)}"}
-
-
-def get_stock_price_alphavantage(symbol: str, date_str: str, time_str: Optional[str] = None) -> Dict[str, Any]:
-    """Get stock price from Alpha Vantage API"""
-    try:
-        # Parse date
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        
-        # Check if future
-        if dt > datetime.now():
-            return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
-        
-        # Fetch daily time series
-        url = ALPHAVANTAGE_BASE
-        params = {
-            "function": "TIME_SERIES_DAILY",
-            "symbol": symbol,
-            "apikey": ALPHAVANTAGE_API_KEY,
-            "outputsize": "compact"  # Last 100 days
-        }
-        
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Check for API errors
-        if "Error Message" in data:
-            return {"error": f"Invalid symbol or API error: {data['Error Message']}"}
-        
-        if "Note" in data:
-            return {"error": "API rate limit reached. Please wait a minute or get a free API key."}
-        
-        if "Time Series (Daily)" not in data:
-            return {"error": "No data available from Alpha Vantage."}
-        
-        time_series = data["Time Series (Daily)"]
-        
-        # Find the exact date or closest date
-        if date_str in time_series:
-            candle_data = time_series[date_str]
-            candle_date = date_str
-        else:
-            # Find closest date (market might be closed on requested date)
-            available_dates = sorted(time_series.keys(), reverse=True)
-            closest_date = None
-            for d in available_dates:
-                if d <= date_str:
-                    closest_date = d
-                    break
-            
-            if not closest_date:
-                return {"error": f"No data available for {date_str}. Market may not have been open."}
-            
-            candle_data = time_series[closest_date]
-            candle_date = closest_date
-        
-        result = {
-            "symbol": symbol,
-            "market": "Stocks (Alpha Vantage)",
-            "requested_date": date_str,
-            "candle_date": candle_date,
-            "timeframe": "Daily",
-            "open": float(candle_data["1. open"]),
-            "high": float(candle_data["2. high"]),
-            "low": float(candle_data["3. low"]),
-            "close": float(candle_data["4. close"]),
-            "volume": float(candle_data["5. volume"])
-        }
-        
-        # Add note if time was provided or date was adjusted
-        if time_str:
-            result["note"] = "Stocks use daily data on free tier. Time parameter ignored."
-        elif candle_date != date_str:
-            result["note"] = f"Market was closed on {date_str}. Showing closest trading day."
-        
-        return result
-    
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Failed to fetch from Alpha Vantage: {str(e)}"}
-    except ValueError as e:
-        return {"error": f"Invalid date format: {str(e)}"}
-    except Exception as e:
-        return {"error": f"Alpha Vantage error: {str(e)}"}
-
-
-def get_stock_price_finnhub(symbol: str, date_str: str, time_str: Optional[str] = None) -> Dict[str, Any]:
-    """Get stock price from Finnhub API"""
-    if not FINNHUB_API_KEY:
-        return {"error": "FINNHUB_API_KEY not set."}
-    
-    try:
-        # Parse date
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        
-        # Check if future
-        if dt > datetime.now():
-            return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
-        
-        # Convert to unix timestamp (start of day)
-        timestamp = int(dt.timestamp())
-        
-        # Fetch candle data (daily) - get a few days around target
-        url = f"{FINNHUB_BASE}/stock/candle"
-        params = {
-            "symbol": symbol,
-            "resolution": "D",
-            "from": timestamp - (86400 * 3),  # 3 days before
-            "to": timestamp + (86400 * 3),    # 3 days after
-            "token": FINNHUB_API_KEY
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("s") != "ok" or not data.get("c"):
-            return {"error": "No data available for this date. Stock may not have existed yet."}
-        
-        # Find the candle for the target date
-        target_candle_idx = None
-        target_ts = timestamp
-        min_diff = float('inf')
-        
-        for i, candle_ts in enumerate(data["t"]):
-            # Check if this candle is for the target date
-            candle_date = datetime.fromtimestamp(candle_ts).date()
-            target_date = dt.date()
-            
-            if candle_date == target_date:
-                target_candle_idx = i
-                break
-            
-            # Track closest if exact match not found
-            diff = abs(candle_ts - target_ts)
-            if diff < min_diff:
-                min_diff = diff
-                target_candle_idx = i
-        
-        if target_candle_idx is None:
-            return {"error": "No data available for this date."}
-        
-        idx = target_candle_idx
-        candle_date = datetime.fromtimestamp(data["t"][idx]).strftime("%Y-%m-%d")
-        
-        result = {
-            "symbol": symbol,
-            "market": "Stocks (Finnhub)",
-            "requested_date": date_str,
-            "candle_date": candle_date,
-            "timeframe": "Daily",
-            "open": float(data["o"][idx]),
-            "high": float(data["h"][idx]),
-            "low": float(data["l"][idx]),
-            "close": float(data["c"][idx]),
-            "volume": float(data["v"][idx])
-        }
-        
-        # Add note if time was provided
-        if time_str:
-            result["note"] = "Stocks use daily data on free tier. Time parameter ignored."
-        
-        return result
-    
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Failed to fetch from Finnhub: {str(e)}"}
-    except ValueError as e:
-        return {"error": f"Invalid date format: {str(e)}"}
-    except Exception as e:
-        return {"error": f"Finnhub error: {str(e)}"}
-
-
-def list_crypto_symbols(limit: int = 50) -> List[str]:
-    """List available crypto symbols from Binance"""
-    try:
-        url = f"{BINANCE_BASE}/exchangeInfo"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        symbols = []
-        for symbol_info in data.get("symbols", []):
-            if (symbol_info.get("quoteAsset") == "USDT" and 
-                symbol_info.get("status") == "TRADING" and
-                symbol_info.get("isSpotTradingAllowed")):
-                symbols.append(symbol_info.get("symbol"))
-        
-        return sorted(symbols)[:limit]
-    
-    except Exception as e:
-        print(f"{RED}Error fetching crypto symbols: {e}{RESET}")
-        return []
-
-
-def list_stock_symbols(limit: int = 50) -> List[str]:
-    """List available stock symbols from Finnhub"""
-    if not FINNHUB_API_KEY:
-        print(f"{RED}FINNHUB_API_KEY not set. Get free key at: https://finnhub.io/register{RESET}")
-        return []
-    
-    try:
-        url = f"{FINNHUB_BASE}/stock/symbol"
-        params = {
-            "exchange": "US",
-            "token": FINNHUB_API_KEY
-        }
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        symbols = [stock["symbol"] for stock in data if stock.get("symbol")]
-        return sorted(symbols)[:limit]
-    
-    except Exception as e:
-        print(f"{RED}Error fetching stock symbols: {e}{RESET}")
-        return []
-
-
-def get_live_crypto_price(symbol: str) -> Dict[str, Any]:
-    """Get current live price for crypto from Binance"""
-    try:
-        url = f"{BINANCE_BASE}/ticker/price"
-        params = {"symbol": symbol}
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        return {
-            "symbol": symbol,
-            "price": float(data['price']),
-            "timestamp": datetime.now(),
-            "source": "Binance",
-            "delay_note": "The current price may have a 1-2 minute delay"
-        }
-    except Exception as e:
-        return {"error": f"Failed to fetch live price: {str(e)}"}
-
-
-def get_live_stock_price(symbol: str) -> Dict[str, Any]:
-    """Get current live price for stock from Yahoo Finance"""
-    try:
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        params = {"interval": "1m", "range": "1d"}
-        headers = {"User-Agent": "Mozilla/5.0"}
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if "chart" not in data or "result" not in data["chart"]:
-            return {"error": "Invalid response from Yahoo Finance"}
-        
-        result = data["chart"]["result"]
-        if not result or len(result) == 0:
-            return {"error": f"No data found for symbol {symbol}"}
-        
-        quote = result[0]
-        meta = quote.get("meta", {})
-        
-        current_price = meta.get("regularMarketPrice") or meta.get("previousClose")
-        
-        if current_price is None:
-            return {"error": "Could not retrieve current price"}
-        
-        return {
-            "symbol": symbol,
-            "price": float(current_price),
-            "timestamp": datetime.now(),
-            "source": "Yahoo Finance",
-            "delay_note": "The current price may have a ~15 minute delay"
-        }
-    except Exception as e:
-        return {"error": f"Failed to fetch live price: {str(e)}"}
-
 
 def print_live_price(live_data: Dict[str, Any], market_type: str):
     """Print live price in a formatted way"""
@@ -1435,10 +526,306 @@ def show_more_options_menu(result: Dict[str, Any], symbol: str, market_type: str
             print(f"{RED}⚠ Invalid choice! Please enter 1, 2, or 3{RESET}")
 
 
+def export_candles(market_type: str, symbol: str, start_date: str, end_date: str, timeframe: str,
+                   fmt: str = "csv") -> Optional[str]:
+    """
+    Download candles for a date range and stream them to a file in exports/.
+    Each fetched page is written straight to disk, and the file only appears
+    under its final name once the export has finished.
+    
+    Args:
+        market_type: 'CRYPTO', 'STOCK', or 'COMMODITY'
+        symbol: Asset symbol (e.g., BTCUSDT, AAPL, GLD)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format (inclusive)
+        timeframe: Candle interval
+        fmt: Output format - csv, parquet, arrow, or npz (default: csv)
+    
+    Returns:
+        Path of the exported file, or None if nothing was exported
+    """
+    print(f"{CYAN}Fetching data for {symbol} from {start_date} to {end_date}...{RESET}\n")
+    
+    filepath = None
+    try:
+        # Parse dates
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+        
+        # Check if future
+        if start_dt > datetime.now() or end_dt > datetime.now():
+            print(f"{RED}✗ Error: Cannot fetch future data{RESET}")
+            return None
+        
+        # Add +1 day to end_date to make it inclusive (unless it's today)
+        fetch_end_dt = end_dt
+        if end_dt.date() < datetime.now().date():
+            fetch_end_dt = end_dt + timedelta(days=1)
+        
+        # Generate filename
+        filename = f"{symbol}_{timeframe}_{start_date}_to_{end_date}.{EXPORT_FORMATS[fmt]}"
+        filepath = os.path.join("exports", filename)
+        
+        if market_type == 'CRYPTO':
+            # Crypto export using Binance
+            # Convert to milliseconds
+            start_ms = int(start_dt.timestamp() * 1000)
+            end_ms = int(fetch_end_dt.timestamp() * 1000)
+            
+            # CSV exports can resume from a checkpoint if a previous run was interrupted
+            resume_key = {"symbol": symbol, "timeframe": timeframe, "start_date": start_date, "end_date": end_date}
+            
+            with open_export_writer(filepath, fmt, resume_key=resume_key) as writer:
+                if writer.resume_after is not None:
+                    resume_time = datetime.fromtimestamp(writer.resume_after / 1000).strftime("%Y-%m-%d %H:%M:%S")
+                    print(f"{YELLOW}↻ Resuming previous export: {writer.rows_written} candles already saved (up to {resume_time}){RESET}")
+                    start_ms = writer.resume_after + 1
+                
+                # Fetch data from Binance (1000-candle windows fetched in parallel)
+                url = f"{stockscan_core.BINANCE_BASE}/klines"
+                
+                for data in iter_kline_pages(url, symbol, timeframe, start_ms, end_ms):
+                    writer.write_page(kline_columns(data))
+                    
+                    print(f"{GREEN}Fetched {writer.rows_written} candles...{RESET}")
+        
+        else:
+            # Stock/Commodity export using Yahoo Finance
+            columns, tz = fetch_yahoo_export_columns(symbol, start_date, fetch_end_dt.strftime("%Y-%m-%d"), timeframe)
+            
+            with open_export_writer(filepath, fmt, tz=tz) as writer:
+                writer.write_page(columns)
+                if writer.rows_written:
+                    print(f"{GREEN}Fetched {writer.rows_written} candles...{RESET}")
+        
+        total_rows = writer.rows_written
+        if not total_rows:
+            print(f"{RED}✗ No data found for {symbol}{RESET}")
+            return None
+        
+        print(f"{GREEN}✓ Total: {total_rows} candles fetched{RESET}\n")
+        
+        # Calculate expected vs actual days for daily timeframe
+        excluded_days_msg = ""
+        if timeframe in ['1d'] and market_type in ['STOCK', 'COMMODITY']:
+            # Calculate expected trading days (weekends/holidays have no candle)
+            total_days = (end_dt - start_dt).days + 1
+            excluded_days = total_days - total_rows
+            
+            if excluded_days > 0:
+                excluded_days_msg = f" ({excluded_days} day(s) excluded: weekends/holidays)"
+        
+        print(f"{GREEN}✓ Data exported successfully!{RESET}")
+        print(f"{CYAN}File:{RESET} {filepath}")
+        print(f"{CYAN}Rows:{RESET} {total_rows}{excluded_days_msg}")
+        print(f"{CYAN}Symbol:{RESET} {symbol}")
+        print(f"{CYAN}Timeframe:{RESET} {timeframe}\n")
+        
+        return filepath
+    
+    except requests.exceptions.RequestException as e:
+        print(f"{RED}✗ Error fetching data: {str(e)}{RESET}")
+        _print_resume_hint(filepath)
+        return None
+    except Exception as e:
+        print(f"{RED}✗ Unexpected error: {str(e)}{RESET}")
+        _print_resume_hint(filepath)
+        return None
+    except KeyboardInterrupt:
+        _print_resume_hint(filepath)
+        raise
+
+
+# Timeframes an export can download, coarsest first (the rest are resampled locally)
+CRYPTO_EXPORT_BASES = ['1d', '12h', '8h', '6h', '4h', '2h', '1h', '30m', '15m', '5m', '3m', '1m', '1s']
+STOCK_EXPORT_BASES = ['1d']
+
+
+def export_timeframes(market_type: str, symbol: str, start_date: str, end_date: str, timeframes: List[str],
+                      fmt: str = "csv", offset_ms: int = 0) -> List[str]:
+    """
+    Export several timeframes of one symbol from a single download.
+    
+    The finest candles needed are fetched once and every requested
+    timeframe is written in the same pass, the coarser ones resampled
+    locally. A single timeframe without an offset is a plain export_candles
+    call. Like there, an interrupted crypto CSV export resumes where it
+    stopped: each file keeps its own checkpoint and the download restarts
+    at the earliest candle one of them still needs.
+    
+    Args:
+        market_type: 'CRYPTO', 'STOCK', or 'COMMODITY'
+        symbol: Asset symbol (e.g., BTCUSDT, AAPL, GLD)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format (inclusive)
+        timeframes: Candle intervals to export
+        fmt: Output format - csv, parquet, arrow, or npz (default: csv)
+        offset_ms: Shift of the resampled candles' start (e.g., 8h = days start at 08:00)
+    
+    Returns:
+        Paths of the exported files
+    """
+    if len(timeframes) == 1 and not offset_ms:
+        filepath = export_candles(market_type, symbol, start_date, end_date, timeframes[0], fmt)
+        return [filepath] if filepath else []
+    
+    bases = CRYPTO_EXPORT_BASES if market_type == 'CRYPTO' else STOCK_EXPORT_BASES
+    base = base_timeframe(timeframes, bases, offset_ms)
+    if base is None:
+        print(f"{RED}✗ Error: {', '.join(timeframes)}{format_offset(offset_ms)} cannot be built from one download{RESET}")
+        return []
+    
+    print(f"{CYAN}Fetching {base} data for {symbol} from {start_date} to {end_date}...{RESET}")
+    derived = [tf for tf in timeframes if tf != base]
+    if derived:
+        print(f"{DIM}{', '.join(derived)} will be built from the {base} candles{RESET}")
+    print()
+    
+    filepaths = {}
+    try:
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+        
+        if start_dt > datetime.now() or end_dt > datetime.now():
+            print(f"{RED}✗ Error: Cannot fetch future data{RESET}")
+            return []
+        
+        # Same range as a single export: candles opening up to the day after end_date
+        fetch_end_dt = end_dt
+        if end_dt.date() < datetime.now().date():
+            fetch_end_dt = end_dt + timedelta(days=1)
+        start_ms = int(start_dt.timestamp() * 1000)
+        end_ms = int(fetch_end_dt.timestamp() * 1000)
+        
+        if market_type == 'CRYPTO':
+            pages, tz = None, None
+        else:
+            columns, tz = fetch_yahoo_export_columns(symbol, start_date, (fetch_end_dt + timedelta(days=40)).strftime("%Y-%m-%d"), base)
+            pages = [columns]
+            # Daily candles open at midnight exchange time and yfinance's end date is exclusive
+            start_ms = zone_day_start_ms(start_dt.date(), tz)
+            end_ms = zone_day_start_ms(fetch_end_dt.date(), tz) - 1
+        
+        resamplers = {tf: Resampler(tf, offset_ms, tz, start_ms=start_ms, end_ms=end_ms) for tf in derived}
+        
+        # The last resampled candles are fetched completely, even past end_date
+        fetch_to_ms = max([end_ms] + [r.bucket(end_ms)[1] for r in resamplers.values()])
+        fetch_to_ms = min(fetch_to_ms, int(datetime.now().timestamp() * 1000))
+        
+        labels = {tf: tf if tf == base else tf + format_offset(offset_ms) for tf in timeframes}
+        for tf in timeframes:
+            filepaths[tf] = os.path.join("exports", f"{symbol}_{labels[tf]}_{start_date}_to_{end_date}.{EXPORT_FORMATS[fmt]}")
+        
+        fetched = 0
+        with ExitStack() as stack:
+            writers = {}
+            for tf, filepath in filepaths.items():
+                # Crypto CSV exports can resume from a checkpoint if a previous run was interrupted
+                resume_key = None
+                if market_type == 'CRYPTO':
+                    resume_key = {"symbol": symbol, "timeframe": labels[tf], "start_date": start_date, "end_date": end_date}
+                writers[tf] = stack.enter_context(open_export_writer(filepath, fmt, resume_key=resume_key, tz=tz))
+            
+            # A resampled file restarts at the bucket after its last saved candle
+            fetch_from_ms = end_ms
+            for tf, writer in writers.items():
+                if writer.resume_after is None:
+                    fetch_from_ms = start_ms
+                elif tf == base:
+                    fetch_from_ms = min(fetch_from_ms, writer.resume_after + 1)
+                else:
+                    resamplers[tf].start_ms = resamplers[tf].bucket(writer.resume_after)[1] + 1
+                    fetch_from_ms = min(fetch_from_ms, resamplers[tf].start_ms)
+            resumed = [f"{tf}: {writer.rows_written}" for tf, writer in writers.items() if writer.resume_after is not None]
+            if resumed:
+                resume_time = datetime.fromtimestamp(fetch_from_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{YELLOW}↻ Resuming previous export: candles already saved ({', '.join(resumed)}), continuing from {resume_time}{RESET}")
+            
+            if pages is None:
+                pages = (kline_columns(data) for data in iter_kline_pages(f"{stockscan_core.BINANCE_BASE}/klines", symbol, base, fetch_from_ms, fetch_to_ms))
+            
+            for columns in pages:
+                if base in writers:
+                    page = truncate_columns(columns, end_ms)
+                    if writers[base].resume_after is not None:
+                        page = skip_columns(page, writers[base].resume_after)
+                    writers[base].write_page(page)
+                for tf, resampler in resamplers.items():
+                    writers[tf].write_page(resampler.push(columns))
+                fetched += len(columns["open_time"])
+                if market_type == 'CRYPTO':
+                    print(f"{GREEN}Fetched {fetched} {base} candles...{RESET}")
+            for tf, resampler in resamplers.items():
+                writers[tf].write_page(resampler.flush())
+        
+        if not fetched:
+            print(f"{RED}✗ No data found for {symbol}{RESET}")
+            return []
+        
+        print(f"{GREEN}✓ Total: {fetched} {base} candles fetched{RESET}\n")
+        print(f"{GREEN}✓ Data exported successfully!{RESET}")
+        exported = []
+        for tf in timeframes:
+            if writers[tf].rows_written:
+                exported.append(filepaths[tf])
+                print(f"{CYAN}{tf:>4}:{RESET} {filepaths[tf]} {DIM}({writers[tf].rows_written} rows){RESET}")
+        print(f"{CYAN}Symbol:{RESET} {symbol}\n")
+        return exported
+    
+    except requests.exceptions.RequestException as e:
+        print(f"{RED}✗ Error fetching data: {str(e)}{RESET}")
+        _print_resume_hint(*filepaths.values())
+        return []
+    except Exception as e:
+        print(f"{RED}✗ Unexpected error: {str(e)}{RESET}")
+        _print_resume_hint(*filepaths.values())
+        return []
+    except KeyboardInterrupt:
+        _print_resume_hint(*filepaths.values())
+        raise
+
+
+def _print_resume_hint(*filepaths: Optional[str]):
+    """Tell the user an interrupted export can be continued"""
+    if any(filepath and has_checkpoint(filepath) for filepath in filepaths):
+        print(f"{YELLOW}ℹ Progress was saved. Run the same export again to resume where it stopped.{RESET}")
+
+
+def ask_export_format() -> Optional[str]:
+    """Ask which file format to export (CSV or a typed columnar format)"""
+    available = available_formats()
+    
+    print(f"\n{CYAN}Output formats:{RESET}")
+    print(f"  {GREEN}[1]{RESET}  CSV      - Text, opens in Excel (default)")
+    print(f"  {GREEN}[2]{RESET}  Parquet  - Typed columns, compact {DIM}(needs pyarrow){RESET}")
+    print(f"  {GREEN}[3]{RESET}  Arrow    - Arrow IPC, memory-mappable {DIM}(needs pyarrow){RESET}")
+    print(f"  {GREEN}[4]{RESET}  NumPy    - .npz typed arrays {DIM}(needs numpy){RESET}\n")
+    
+    format_map = {
+        '': 'csv',
+        '1': 'csv',
+        '2': 'parquet',
+        '3': 'arrow',
+        '4': 'npz'
+    }
+    
+    fmt_choice = input(f"{CYAN}Select format (1-4, Enter for CSV):{RESET} ").strip()
+    if fmt_choice not in format_map:
+        print(f"{RED}⚠ Invalid choice!{RESET}")
+        return None
+    
+    fmt = format_map[fmt_choice]
+    if fmt not in available:
+        library = "numpy" if fmt == "npz" else "pyarrow"
+        print(f"{RED}✗ Error: '{library}' library not installed{RESET}")
+        print(f"{YELLOW}Install it with: pip install {library}{RESET}")
+        return None
+    
+    return fmt
+
+
 def export_data_mode():
     """Export data mode - download bulk historical data to CSV"""
-    import csv
-    import os
     
     # Show export banner
     print(f"\n{CYAN}{'═' * 70}{RESET}")
@@ -1559,12 +946,21 @@ def export_data_mode():
                 '16': '1M'
             }
             
-            tf_choice = input(f"{CYAN}Select timeframe (1-16):{RESET} ").strip()
-            if tf_choice not in timeframe_map:
+            tf_choice = input(f"{CYAN}Select timeframe(s) (1-16, e.g. 2,4,7 for several):{RESET} ").strip()
+            tf_choices = [c.strip() for c in tf_choice.split(',')]
+            if not all(c in timeframe_map for c in tf_choices):
                 print(f"{RED}⚠ Invalid choice!{RESET}")
                 continue
             
-            timeframe = timeframe_map[tf_choice]
+            timeframes = list(dict.fromkeys(timeframe_map[c] for c in tf_choices))
+            
+            # Optional anchor offset for candles built locally (e.g. 8h = days start at 08:00 UTC)
+            offset_choice = input(f"{CYAN}Candle offset (e.g. 8h, 30m; Enter for none):{RESET} ").strip()
+            try:
+                offset_ms = parse_offset(offset_choice)
+            except ValueError as e:
+                print(f"{RED}⚠ {e}{RESET}")
+                continue
         else:
             # Stocks and Commodities
             print(f"\n{CYAN}Available timeframes:{RESET}")
@@ -1578,172 +974,25 @@ def export_data_mode():
                 '3': '1mo'
             }
             
-            tf_choice = input(f"{CYAN}Select timeframe (1-3):{RESET} ").strip()
-            if tf_choice not in timeframe_map:
+            tf_choice = input(f"{CYAN}Select timeframe(s) (1-3, e.g. 1,2,3 for several):{RESET} ").strip()
+            tf_choices = [c.strip() for c in tf_choice.split(',')]
+            if not all(c in timeframe_map for c in tf_choices):
                 print(f"{RED}⚠ Invalid choice!{RESET}")
                 continue
             
-            timeframe = timeframe_map[tf_choice]
+            timeframes = list(dict.fromkeys(timeframe_map[c] for c in tf_choices))
+            offset_ms = 0
+        
+        # Get output format
+        fmt = ask_export_format()
+        if not fmt:
+            continue
         
         # Fetch and export data
         print(f"\n{CYAN}{'─' * 70}{RESET}\n")
-        print(f"{CYAN}Fetching data for {symbol} from {start_date} to {end_date}...{RESET}\n")
         
-        try:
-            all_data = []
-            
-            # Parse dates
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-            
-            # Check if future
-            if start_dt > datetime.now() or end_dt > datetime.now():
-                print(f"{RED}✗ Error: Cannot fetch future data{RESET}")
-                continue
-            
-            # Add +1 day to end_date to make it inclusive (unless it's today)
-            fetch_end_dt = end_dt
-            added_day = False
-            if end_dt.date() < datetime.now().date():
-                fetch_end_dt = end_dt + timedelta(days=1)
-                added_day = True
-            
-            if market_type == 'CRYPTO':
-                # Crypto export using Binance
-                # Convert to milliseconds
-                start_ms = int(start_dt.timestamp() * 1000)
-                end_ms = int(fetch_end_dt.timestamp() * 1000)
-                
-                # Fetch data from Binance
-                url = f"{BINANCE_BASE}/klines"
-                params = {
-                    "symbol": symbol,
-                    "interval": timeframe,
-                    "startTime": start_ms,
-                    "endTime": end_ms,
-                    "limit": 1000
-                }
-                
-                while True:
-                    response = requests.get(url, params=params, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if not data:
-                        break
-                    
-                    # Process each candle
-                    for candle in data:
-                        candle_data = {
-                            "timestamp": datetime.fromtimestamp(candle[0] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-                            "open": float(candle[1]),
-                            "high": float(candle[2]),
-                            "low": float(candle[3]),
-                            "close": float(candle[4]),
-                            "volume": float(candle[5]),
-                            "close_time": datetime.fromtimestamp(candle[6] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-                        }
-                        all_data.append(candle_data)
-                    
-                    # Check if we got all data
-                    if len(data) < 1000:
-                        break
-                    
-                    # Update start time for next batch
-                    params["startTime"] = data[-1][0] + 1
-                    
-                    print(f"{GREEN}Fetched {len(all_data)} candles...{RESET}")
-            
-            else:
-                # Stock/Commodity export using Yahoo Finance
-                import yfinance as yf
-                
-                # Map timeframe to yfinance interval
-                interval_map = {
-                    '1d': '1d',
-                    '1wk': '1wk',
-                    '1mo': '1mo'
-                }
-                
-                interval = interval_map[timeframe]
-                
-                # Fetch data with adjusted end date
-                ticker = yf.Ticker(symbol)
-                df = ticker.history(start=start_date, end=fetch_end_dt.strftime("%Y-%m-%d"), interval=interval)
-                
-                if df.empty:
-                    print(f"{RED}✗ No data found for {symbol}{RESET}")
-                    continue
-                
-                # Convert to list of dicts
-                for index, row in df.iterrows():
-                    candle_data = {
-                        "timestamp": index.strftime("%Y-%m-%d %H:%M:%S"),
-                        "open": float(row['Open']),
-                        "high": float(row['High']),
-                        "low": float(row['Low']),
-                        "close": float(row['Close']),
-                        "volume": float(row['Volume']),
-                        "close_time": index.strftime("%Y-%m-%d %H:%M:%S"),
-                    }
-                    all_data.append(candle_data)
-                
-                print(f"{GREEN}Fetched {len(all_data)} candles...{RESET}")
-            
-            if not all_data:
-                print(f"{RED}✗ No data found{RESET}")
-                continue
-            
-            print(f"{GREEN}✓ Total: {len(all_data)} candles fetched{RESET}\n")
-            
-            # Calculate expected vs actual days for daily timeframe
-            excluded_days_msg = ""
-            if timeframe in ['1d'] and market_type in ['STOCK', 'COMMODITY']:
-                # Calculate expected trading days
-                total_days = (end_dt - start_dt).days + 1
-                actual_days = len(all_data)
-                
-                # Check if we got data for the end date (means it was a trading day)
-                last_data_date = datetime.strptime(all_data[-1]['timestamp'].split()[0], "%Y-%m-%d").date()
-                end_date_included = (last_data_date == end_dt.date())
-                
-                # If we added a day and got the end date data, adjust expected days
-                if added_day and end_date_included:
-                    # End date was a trading day, so our +1 worked correctly
-                    excluded_days = total_days - actual_days
-                else:
-                    # End date was not a trading day (holiday/weekend) or we didn't add a day
-                    excluded_days = total_days - actual_days
-                
-                if excluded_days > 0:
-                    excluded_days_msg = f" ({excluded_days} day(s) excluded: weekends/holidays)"
-            
-            # Create exports directory
-            os.makedirs("exports", exist_ok=True)
-            
-            # Generate filename
-            filename = f"{symbol}_{timeframe}_{start_date}_to_{end_date}.csv"
-            filepath = os.path.join("exports", filename)
-            
-            # Export to CSV
-            with open(filepath, 'w', newline='') as csvfile:
-                fieldnames = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                writer.writerows(all_data)
-            
-            print(f"{GREEN}✓ Data exported successfully!{RESET}")
-            print(f"{CYAN}File:{RESET} {filepath}")
-            print(f"{CYAN}Rows:{RESET} {len(all_data)}{excluded_days_msg}")
-            print(f"{CYAN}Symbol:{RESET} {symbol}")
-            print(f"{CYAN}Timeframe:{RESET} {timeframe}\n")
-            
-        except requests.exceptions.RequestException as e:
-            print(f"{RED}✗ Error fetching data: {str(e)}{RESET}")
-            continue
-        except Exception as e:
-            print(f"{RED}✗ Unexpected error: {str(e)}{RESET}")
+        filepaths = export_timeframes(market_type, symbol, start_date, end_date, timeframes, fmt, offset_ms)
+        if not filepaths:
             continue
         
         # Ask if user wants to export more
@@ -2038,15 +1287,18 @@ def interactive_mode():
                 
                 # Show more options menu if result is valid
                 if "error" not in result:
+                    if STREAM_ENABLED:
+                        # Subscribe now so the live price is already streamed when asked for
+                        start_stream([symbol.upper()])
                     choice = show_more_options_menu(result, symbol.upper(), "CRYPTO")
                     
                     if choice == '1':
                         # Check live price
-                        live_data = get_live_crypto_price(symbol.upper())
+                        live_data = get_live_crypto_price(symbol.upper(), stream_wait=1.0)
                         print_live_price(live_data, "CRYPTO")
                     elif choice == '2':
                         # Compare with current price
-                        live_data = get_live_crypto_price(symbol.upper())
+                        live_data = get_live_crypto_price(symbol.upper(), stream_wait=1.0)
                         print_price_comparison(result, live_data, "CRYPTO")
                 
                 # Ask if they want to check another
@@ -2191,6 +1443,9 @@ def interactive_mode():
 
 def main():
     """Main entry point"""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    
     # If no arguments, start interactive mode
     if len(sys.argv) == 1:
         interactive_mode()
@@ -2235,6 +1490,70 @@ def main():
     # List command
     list_parser = subparsers.add_parser('list', help='List symbols')
     list_parser.add_argument('market', choices=['crypto', 'stocks', 'commodities'], help='Market to list')
+    list_parser.add_argument('--limit', '-n', type=int, default=50, help='Max symbols shown, 0 for all (default: 50)')
+    list_parser.add_argument('--quote', '-q', default='USDT', help="Crypto quote asset, 'any' for all (default: USDT)")
+    list_parser.add_argument('--search', '-s', help='Find crypto symbols by prefix or similar spelling (e.g., eth, SOLUSTD)')
+    list_parser.add_argument('--refresh', action='store_true', help='Download the crypto symbol list again')
+    
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Look up many queries from a CSV/JSONL file')
+    batch_parser.add_argument('input', help='CSV or JSONL file with market, symbol, date, time, timeframe columns')
+    batch_parser.add_argument('output', nargs='?', help='Result file, .csv or .jsonl (default: exports/<input>_results.csv)')
+    batch_parser.add_argument('--market', '-m', choices=['crypto', 'stock', 'commodity'], default='crypto',
+                              help='Market for rows without a market column (default: crypto)')
+    
+    # Snapshot command
+    snapshot_parser = subparsers.add_parser('snapshot', help='Price of a whole universe of symbols at one date/time')
+    snapshot_parser.add_argument('universe', choices=['crypto', 'commodities', 'stocks'],
+                                 help='All crypto pairs of a quote asset, all commodity ETFs, or stocks from --file')
+    snapshot_parser.add_argument('date', help='Date (YYYY-MM-DD)')
+    snapshot_parser.add_argument('time', nargs='?', help='Time (HH:MM, crypto only, optional)')
+    snapshot_parser.add_argument('output', nargs='?',
+                                 help='Result file, .csv or .jsonl (default: exports/snapshot_<universe>_<date>.csv)')
+    snapshot_parser.add_argument('--timeframe', '-t', help='Candle timeframe (default: 5m for crypto, 1d otherwise)')
+    snapshot_parser.add_argument('--quote', '-q', default='USDT', help="Crypto quote asset, 'any' for all (default: USDT)")
+    snapshot_parser.add_argument('--file', '-f', help='Look up the symbols in this file instead (one per line)')
+    snapshot_parser.add_argument('--workers', '-w', type=int, help='Symbols downloaded at the same time (default: 16)')
+    
+    # Scan command
+    scan_parser = subparsers.add_parser('scan', help='Biggest movers of a universe between two dates')
+    scan_parser.add_argument('universe', choices=['crypto', 'commodities', 'stocks'],
+                             help='All crypto pairs of a quote asset, all commodity ETFs, or stocks from --file')
+    scan_parser.add_argument('start', help='Start date (YYYY-MM-DD)')
+    scan_parser.add_argument('end', help='End date (YYYY-MM-DD)')
+    scan_parser.add_argument('--top', '-n', type=int, default=10, help='Symbols shown in each direction (default: 10)')
+    scan_parser.add_argument('--by', '-b', choices=['change', 'range', 'volume'], default='change',
+                             help='Rank by %% change, %% range or volume ratio (default: change)')
+    scan_parser.add_argument('--quote', '-q', default='USDT', help="Crypto quote asset, 'any' for all (default: USDT)")
+    scan_parser.add_argument('--file', '-f', help='Scan the symbols in this file instead (one per line)')
+    scan_parser.add_argument('--output', '-o', help='Also write every result to a .csv or .jsonl file')
+    scan_parser.add_argument('--workers', '-w', type=int, help='Symbols downloaded at the same time (default: 16)')
+    
+    # Watch command
+    watch_parser = subparsers.add_parser('watch', help='Live price table for many symbols')
+    watch_parser.add_argument('market', choices=['crypto', 'stocks', 'commodities'], help='Market to watch')
+    watch_parser.add_argument('symbols', nargs='*', help='Symbols to watch (e.g., BTCUSDT ETHUSDT)')
+    watch_parser.add_argument('--file', '-f', help='Read more symbols from a file (one per line)')
+    watch_parser.add_argument('--interval', '-i', type=float, default=None,
+                              help='Seconds between refreshes (default: 5)')
+    watch_parser.add_argument('--count', '-c', type=int, help='Stop after this many refreshes')
+    watch_parser.add_argument('--stream', action='store_true',
+                              help='Crypto only: follow Binance trade streams instead of polling')
+    
+    # Resample command
+    resample_parser = subparsers.add_parser('resample', help='Build coarser timeframes from a crypto export file')
+    resample_parser.add_argument('input', help='Export file (.csv, .parquet, .arrow or .npz)')
+    resample_parser.add_argument('timeframes', help='Comma-separated target timeframes (e.g., 5m,1h,1d)')
+    resample_parser.add_argument('--offset', '-o', default='',
+                                 help='Shift candle starts, e.g. 8h for days starting at 08:00 UTC')
+    resample_parser.add_argument('--format', '-f', choices=list(EXPORT_FORMATS), dest='fmt',
+                                 help='Output format (default: same as the input)')
+    
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Answer lookups, live prices and exports over HTTP')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', '-p', type=int, default=8080, help='Port to listen on (default: 8080)')
+    serve_parser.add_argument('--quiet', '-q', action='store_true', help="Don't log each request")
     
     # Help command
     subparsers.add_parser('help', help='Show help')
@@ -2265,17 +1584,170 @@ def main():
                 result['commodity_name'] = COMMODITY_ETFS[args.symbol.upper()]
             print_stock_result(result)
         
+        elif args.command == 'batch':
+            from stockscan_batch import run_batch
+            
+            if not os.path.exists(args.input):
+                print(f"{RED}✗ Error: File not found: {args.input}{RESET}\n")
+                return
+            
+            output = args.output
+            if not output:
+                stem = os.path.splitext(os.path.basename(args.input))[0]
+                output = os.path.join("exports", f"{stem}_results.csv")
+            
+            print(f"{CYAN}Looking up queries from {args.input}...{RESET}")
+            count, failed = run_batch(args.input, output, args.market)
+            print(f"{GREEN}✓ {count - failed} of {count} lookups answered{RESET}")
+            if failed:
+                print(f"{YELLOW}⚠ {failed} rows have an error (see the 'error' column){RESET}")
+            print(f"{CYAN}File:{RESET} {output}\n")
+        
+        elif args.command == 'snapshot':
+            from stockscan_snapshot import run_snapshot, universe_symbols, default_output, UNIVERSES, SNAPSHOT_WORKERS
+            from stockscan_watch import read_watchlist
+            
+            time_str, output = args.time, args.output
+            if time_str and not time_str[:1].isdigit():
+                # "snapshot commodities 2024-01-15 out.csv" - no time given
+                time_str, output = None, time_str
+            if time_str and args.universe != 'crypto':
+                print(f"{YELLOW}⚠ Time is ignored for {args.universe} (daily candles){RESET}")
+                time_str = None
+            
+            if args.file:
+                if not os.path.exists(args.file):
+                    print(f"{RED}✗ Error: File not found: {args.file}{RESET}\n")
+                    return
+                symbols = read_watchlist(args.file)
+            else:
+                quote = None if args.quote.lower() == 'any' else args.quote.upper()
+                try:
+                    symbols = universe_symbols(args.universe, quote)
+                except ValueError as e:
+                    print(f"{RED}✗ Error: {e}{RESET}\n")
+                    return
+            if not symbols:
+                print(f"{RED}✗ Error: No symbols to look up{RESET}\n")
+                return
+            
+            output = output or default_output(args.universe, args.date, time_str)
+            when = f"{args.date} {time_str}" if time_str else args.date
+            print(f"{CYAN}Looking up {len(symbols)} {args.universe} symbols at {when}...{RESET}")
+            started = perf_counter()
+            count, failed = run_snapshot(UNIVERSES[args.universe], symbols, output, args.date, time_str,
+                                         args.timeframe, args.workers or SNAPSHOT_WORKERS)
+            print(f"{GREEN}✓ {count - failed} of {count} symbols priced in {perf_counter() - started:.1f}s{RESET}")
+            if failed:
+                print(f"{YELLOW}⚠ {failed} rows have an error (see the 'error' column){RESET}")
+            print(f"{CYAN}File:{RESET} {output}\n")
+        
+        elif args.command == 'scan':
+            from stockscan_scan import run_scan, top_movers, write_scan, print_movers
+            from stockscan_snapshot import universe_symbols, UNIVERSES, SNAPSHOT_WORKERS
+            from stockscan_watch import read_watchlist
+            
+            if args.file:
+                if not os.path.exists(args.file):
+                    print(f"{RED}✗ Error: File not found: {args.file}{RESET}\n")
+                    return
+                symbols = read_watchlist(args.file)
+            else:
+                quote = None if args.quote.lower() == 'any' else args.quote.upper()
+                try:
+                    symbols = universe_symbols(args.universe, quote)
+                except ValueError as e:
+                    print(f"{RED}✗ Error: {e}{RESET}\n")
+                    return
+            if not symbols:
+                print(f"{RED}✗ Error: No symbols to scan{RESET}\n")
+                return
+            
+            market = UNIVERSES[args.universe]
+            print(f"{CYAN}Scanning {len(symbols)} {args.universe} symbols from {args.start} to {args.end}...{RESET}")
+            started = perf_counter()
+            try:
+                results = run_scan(market, symbols, args.start, args.end, args.workers or SNAPSHOT_WORKERS)
+            except ValueError as e:
+                print(f"{RED}✗ Error: {e}{RESET}\n")
+                return
+            failed = sum(1 for r in results if "error" in r)
+            print(f"{GREEN}✓ {len(results) - failed} of {len(results)} symbols scanned in {perf_counter() - started:.1f}s{RESET}\n")
+            
+            top, bottom = top_movers(results, args.top, args.by)
+            names = {"change": ("TOP GAINERS", "TOP LOSERS"), "range": ("WIDEST RANGE", "NARROWEST RANGE"),
+                     "volume": ("VOLUME UP MOST", "VOLUME DOWN MOST")}[args.by]
+            print_movers(names[0], top, market)
+            if bottom:
+                print_movers(names[1], bottom, market)
+            if failed:
+                print(f"{YELLOW}⚠ {failed} symbols had no data for these dates{' (see the output file)' if args.output else ''}{RESET}")
+            if args.output:
+                write_scan(results, args.output)
+                print(f"{CYAN}File:{RESET} {args.output}")
+            print()
+        
+        elif args.command == 'watch':
+            from stockscan_watch import run_watch, read_watchlist, WATCH_INTERVAL, STREAM_REDRAW_INTERVAL
+            
+            symbols = list(args.symbols)
+            if args.file:
+                if not os.path.exists(args.file):
+                    print(f"{RED}✗ Error: File not found: {args.file}{RESET}\n")
+                    return
+                symbols += read_watchlist(args.file)
+            if not symbols:
+                print(f"{RED}✗ Error: No symbols to watch{RESET}\n")
+                return
+            
+            print(f"\n{BOLD}{BRIGHT_PURPLE}LIVE {args.market.upper()} WATCHLIST{RESET}\n")
+            if args.stream and args.market != 'crypto':
+                print(f"{YELLOW}⚠ --stream is only available for crypto, polling instead{RESET}")
+            interval = args.interval or (STREAM_REDRAW_INTERVAL if args.stream else WATCH_INTERVAL)
+            run_watch(args.market, symbols, interval, args.count, stream=args.stream)
+            print()
+        
+        elif args.command == 'resample':
+            from stockscan_resample import resample_file
+            
+            if not os.path.exists(args.input):
+                print(f"{RED}✗ Error: File not found: {args.input}{RESET}\n")
+                return
+            
+            timeframes = [tf.strip() for tf in args.timeframes.split(',') if tf.strip()]
+            try:
+                written = resample_file(args.input, timeframes, parse_offset(args.offset), args.fmt)
+            except ValueError as e:
+                print(f"{RED}✗ Error: {e}{RESET}\n")
+                return
+            
+            print(f"{GREEN}✓ Resampled {args.input}{RESET}")
+            for tf, filepath in written.items():
+                print(f"{CYAN}{tf:>4}:{RESET} {filepath}")
+            print()
+        
+        elif args.command == 'serve':
+            from stockscan_server import serve
+            
+            serve(args.host, args.port, args.quiet)
+        
         elif args.command == 'list':
+            limit = args.limit if args.limit > 0 else None
             if args.market == 'crypto':
-                print(f"\n{CYAN}Available Crypto Symbols (first 50):{RESET}\n")
-                symbols = list_crypto_symbols()
+                quote = None if args.quote.lower() == 'any' else args.quote.upper()
+                if args.search:
+                    print(f"\n{CYAN}Crypto Symbols matching '{args.search}':{RESET}\n")
+                else:
+                    shown = f"first {limit}" if limit else "all"
+                    print(f"\n{CYAN}Available Crypto Symbols ({quote or 'all'} pairs, {shown}):{RESET}\n")
+                symbols = list_crypto_symbols(limit, quote, args.search, args.refresh)
                 for i, symbol in enumerate(symbols, 1):
                     print(f"  {i:2d}. {symbol}")
                 print(f"\n{DIM}Total: {len(symbols)} symbols shown{RESET}\n")
             
             elif args.market == 'stocks':
-                print(f"\n{CYAN}Available Stock Symbols (first 50):{RESET}\n")
-                symbols = list_stock_symbols()
+                print(f"\n{CYAN}Available Stock Symbols ({f'first {limit}' if limit else 'all'}):{RESET}\n")
+                symbols = list_stock_symbols(limit)
                 for i, symbol in enumerate(symbols, 1):
                     print(f"  {i:2d}. {symbol}")
                 print(f"\n{DIM}Total: {len(symbols)} symbols shown{RESET}\n")
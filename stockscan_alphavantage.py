@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+StockScan Alpha Vantage Cache - Daily series downloaded once, looked up locally
+The free Alpha Vantage tier allows only a handful of requests per day, so
+instead of one request per lookup the symbol's whole daily series is
+downloaded once and kept on disk next to the candle cache, indexed by date.
+Every later lookup for that symbol is answered from the stored series.
+
+Past daily candles never change: a stored series answers any date up to its
+last trading day however old it is. Only a date after that makes StockScan
+download the series again, at most once per symbol per day. A series
+downloaded while its last trading day was still running holds an unfinished
+candle for that day, so that day is never answered from it for longer than
+UNSETTLED_REFRESH seconds - after that the series is downloaded again.
+
+Free keys are refused the full series ("outputsize=full" is premium-only)
+and get the last 100 days instead. Once a key was refused, or a symbol's
+stored series is a compact one, later downloads ask for the compact series
+directly instead of spending a call on the refusal every time.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import calendar
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+
+from stockscan_cache import CACHE_DIR, CACHE_ENABLED
+from stockscan_http import http_get
+from stockscan_metrics import count_cache
+from stockscan_timeindex import TimeIndex
+
+SERIES_DIR = os.path.join(CACHE_DIR, "alphavantage")
+
+# Response keys of TIME_SERIES_DAILY, in candle order
+SERIES_KEY = "Time Series (Daily)"
+VALUE_KEYS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
+
+# Seconds a series with an unfinished last candle is reused before downloading it again
+UNSETTLED_REFRESH = 15 * 60
+
+# Stock symbols (AAPL, BRK-B, RELIANCE.BSE, ^GSPC) - also the series file name, so no
+# path separators and no leading dot
+SYMBOL_PATTERN = re.compile(r"[A-Z0-9^=_-][A-Z0-9.^=_-]*")
+
+
+class AlphaVantageError(Exception):
+    """Alpha Vantage answered with an error or rate limit message instead of data"""
+
+
+class DailySeries:
+    """
+    One symbol's daily candles, sorted by date.
+
+    Args:
+        dates: YYYY-MM-DD strings in ascending order
+        rows: Matching (open, high, low, close, volume) rows
+        fetched_at: Epoch seconds when the series was downloaded
+        full: False if Alpha Vantage only sent the recent ("compact") part
+    """
+
+    def __init__(self, dates: List[str], rows: List[Tuple[float, ...]], fetched_at: float, full: bool = True):
+        self.dates = dates
+        self.rows = rows
+        self.fetched_at = fetched_at
+        self.full = full
+        self.index = TimeIndex(dates)
+
+    @classmethod
+    def from_response(cls, data: Dict[str, Any], full: bool = True,
+                      fetched_at: Optional[float] = None) -> "DailySeries":
+        """Build the series from a raw TIME_SERIES_DAILY response"""
+        series = data[SERIES_KEY]
+        dates = sorted(series)
+        rows = [tuple(float(series[day][key]) for key in VALUE_KEYS) for day in dates]
+        return cls(dates, rows, time.time() if fetched_at is None else fetched_at, full)
+
+    @property
+    def last_date(self) -> Optional[str]:
+        return self.dates[-1] if self.dates else None
+
+    def settled(self) -> bool:
+        """
+        False if the series was downloaded before its last trading day ended
+        (00:00 UTC of the next day, after every exchange's close), so that
+        day's candle may still change.
+        """
+        if self.last_date is None:
+            return True
+        day_end = calendar.timegm(datetime.strptime(self.last_date, "%Y-%m-%d").timetuple()) + 86400
+        return self.fetched_at >= day_end
+
+    def covers(self, date_str: str) -> bool:
+        """True if the series has the final candle for a date (no need to download it again)"""
+        if self.last_date is None:
+            return False
+        return date_str < self.last_date or (date_str == self.last_date and self.settled())
+
+    def recently_fetched(self) -> bool:
+        """
+        True if downloading again would not give newer data yet: the same day
+        for a settled series, UNSETTLED_REFRESH seconds for an unfinished one.
+        """
+        if self.settled():
+            return self.fetched_today()
+        return time.time() - self.fetched_at < UNSETTLED_REFRESH
+
+    def fetched_today(self) -> bool:
+        return datetime.fromtimestamp(self.fetched_at).date() == datetime.now().date()
+
+    def candle(self, date_str: str, earliest: Optional[str] = None) -> Optional[Tuple[str, Tuple[float, ...]]]:
+        """(date, row) of the last trading day at or before date_str (not before earliest), or None"""
+        next_day = (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        i = self.index.trading_day(date_str, next_day, earliest)
+        if i is None:
+            return None
+        return self.dates[i], self.rows[i]
+
+    def to_json(self) -> Dict[str, Any]:
+        """Compact form saved on disk"""
+        return {"fetched_at": self.fetched_at, "full": self.full, "dates": self.dates,
+                "rows": [list(row) for row in self.rows]}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "DailySeries":
+        return cls(data["dates"], [tuple(row) for row in data["rows"]], data["fetched_at"], data["full"])
+
+
+_series = {}
+_locks = {}
+# API keys Alpha Vantage refused the full series for (free keys)
+_compact_keys = set()
+_locks_lock = threading.Lock()
+
+
+def _check_symbol(symbol: str) -> str:
+    """The upper-case symbol, or AlphaVantageError if it could point outside SERIES_DIR"""
+    symbol = symbol.upper()
+    if not SYMBOL_PATTERN.fullmatch(symbol) or ".." in symbol:
+        raise AlphaVantageError(f"Invalid symbol '{symbol}'")
+    return symbol
+
+
+def _series_file(symbol: str) -> str:
+    return os.path.join(SERIES_DIR, f"{_check_symbol(symbol)}.json")
+
+
+def _read_file(symbol: str) -> Optional[DailySeries]:
+    """The series saved on disk, or None"""
+    if not CACHE_ENABLED:
+        return None
+    try:
+        with open(_series_file(symbol), encoding="utf-8") as f:
+            return DailySeries.from_json(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_file(symbol: str, series: DailySeries):
+    """Atomically save a series (best effort)"""
+    if not CACHE_ENABLED:
+        return
+    try:
+        os.makedirs(SERIES_DIR, exist_ok=True)
+        path = _series_file(symbol)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(series.to_json(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _symbol_lock(symbol: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(symbol, threading.Lock())
+
+
+def download_daily_series(url: str, symbol: str, api_key: str, full: bool = True) -> DailySeries:
+    """
+    Download a symbol's whole daily series (or the last 100 days where the
+    key is not allowed the full one).
+
+    A key that was refused the full series is remembered for the rest of the
+    process and goes straight to the compact one, so a download costs one of
+    the few daily calls of a free key instead of two.
+
+    Args:
+        full: Ask for the full series first (False: compact only)
+
+    Raises:
+        AlphaVantageError: Alpha Vantage sent a message instead of data
+        requests.exceptions.RequestException: The request failed
+    """
+    data = {}
+    outputsizes = ("full", "compact") if full and api_key not in _compact_keys else ("compact",)
+    for outputsize in outputsizes:
+        params = {"function": "TIME_SERIES_DAILY", "symbol": symbol, "apikey": api_key, "outputsize": outputsize}
+        response = http_get(url, params=params, timeout=15)
+        response.raise_for_status()
+        data = response.json()
+        if SERIES_KEY in data:
+            if outputsize == "compact" and len(outputsizes) == 2:
+                # Full refused but compact allowed: a free key
+                _compact_keys.add(api_key)
+            return DailySeries.from_response(data, full=outputsize == "full")
+        if "Error Message" in data:
+            raise AlphaVantageError(f"Invalid symbol or API error: {data['Error Message']}")
+        if "Note" in data:
+            raise AlphaVantageError("API rate limit reached. Please wait a minute or get a free API key.")
+        # "Information": premium-only option or daily limit - the compact series may still be allowed
+    message = data.get("Information")
+    raise AlphaVantageError(message or "No data available from Alpha Vantage.")
+
+
+def load_daily_series(url: str, symbol: str, api_key: str, date_str: str) -> DailySeries:
+    """
+    Return a daily series that can answer date_str, from memory or disk when
+    possible, else downloaded (at most once per symbol per day, or every
+    UNSETTLED_REFRESH seconds while the stored last candle is unfinished).
+
+    Args:
+        url: Alpha Vantage query endpoint
+        symbol: Stock symbol (e.g., IBM)
+        api_key: Alpha Vantage API key
+        date_str: Date the lookup needs (YYYY-MM-DD)
+
+    Raises:
+        AlphaVantageError: For a symbol that can't be a stock symbol
+        AlphaVantageError, requests.exceptions.RequestException: If a download
+            was needed and failed
+    """
+    symbol = _check_symbol(symbol)
+    with _symbol_lock(symbol):
+        series = _series.get(symbol) or _read_file(symbol)
+        if series is not None:
+            _series[symbol] = series
+            if series.covers(date_str) or series.recently_fetched():
+                count_cache("alphavantage", True)
+                return series
+        count_cache("alphavantage", False)
+
+        # A stored compact series means the key only gets compact ones
+        fresh = download_daily_series(url, symbol, api_key, full=series is None or series.full)
+        _series[symbol] = fresh
+    _write_file(symbol, fresh)
+    return fresh
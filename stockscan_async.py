@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+StockScan Async - asyncio versions of the price lookups
+Mirrors get_crypto_price, get_stock_price, get_live_crypto_price and
+get_live_stock_price and returns the same result dicts, but all network I/O
+runs on the event loop through one pooled aiohttp session, so thousands of
+lookups can be in flight on a single thread. Candles go through the same
+local candle cache as the synchronous lookups; its SQLite calls run on the
+loop's default executor so they never block the loop.
+
+The lookups take the same shortcuts as the synchronous ones: crypto windows
+inside a range index in memory (stockscan_rangeindex) are answered from it,
+live crypto prices come from the price stream when the pair is streamed, and
+daily stock lookups are hedged between Yahoo Finance and Finnhub
+(stockscan_hedge), with Alpha Vantage as the last resort. Finnhub and Alpha
+Vantage are asked through their synchronous clients on the executor.
+
+    import asyncio
+    import stockscan_async
+
+    async def main():
+        async with stockscan_async.AsyncClient() as client:
+            results = await asyncio.gather(
+                client.get_crypto_price("BTCUSDT", "2024-01-15", "14:30", "1h"),
+                client.get_stock_price("AAPL", "2024-01-15"),
+            )
+
+    asyncio.run(main())
+
+Needs the 'aiohttp' library (pip install aiohttp).
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import asyncio
+import functools
+import time
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+import stockscan_core
+from stockscan_cache import get_store
+from stockscan_hedge import hedged_call_async
+from stockscan_http import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from stockscan_klines import INTERVAL_MS, KLINES_PAGE_LIMIT, kline_windows, kline_tuples
+from stockscan_metrics import observe_request, count_cache
+from stockscan_rangeindex import cached_aggregate
+from stockscan_ratelimit import get_limiter, RateLimited
+from stockscan_stream import get_stream, streamed_price
+from stockscan_symbols import check_symbol
+
+# Errors that mean "the request failed" (the sync lookups catch RequestException)
+FETCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, RateLimited) if AIOHTTP_AVAILABLE else ()
+
+
+async def run_blocking(fn: Callable[..., Any], *args) -> Any:
+    """Run a blocking call (SQLite, a synchronous lookup) on the loop's default executor"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+
+class AsyncClient:
+    """
+    Async market data client with one pooled aiohttp session.
+
+    Concurrent lookups that need the same missing candle range share one
+    download. Requests draw on the same per-host rate limits as the
+    synchronous lookups (see stockscan_ratelimit).
+
+    Use as "async with AsyncClient() as client:" or call close() when done.
+
+    Args:
+        pool_size: Max open connections per host
+        timeout: Request timeout in seconds
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("The async API needs the 'aiohttp' library. Install it with: pip install aiohttp")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = None
+        self._inflight = {}
+        # Downloads finished per series, to notice one landing while the gaps were being read
+        self._filled = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Create the session lazily so it binds to the running event loop"""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0, limit_per_host=self.pool_size),
+                # Per-socket timeouts: time spent queued for a free connection does not count
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Any:
+        """
+        GET a URL and decode the JSON body (raises on HTTP errors).
+        Waits for the host's rate limit budget and retries 429/418 answers.
+        """
+        if params:
+            params = {key: str(value) for key, value in params.items()}
+        parts = urlsplit(url)
+        limiter = get_limiter(parts.hostname or parts.netloc)
+
+        attempt = 0
+        while True:
+            wait = limiter.reserve(parts.path, params)
+            if wait:
+                await asyncio.sleep(wait)
+
+            started = time.perf_counter()
+            try:
+                async with self._get_session().get(url, params=params, headers=headers) as response:
+                    body = await response.read()
+                    observe_request(limiter.host, parts.path, time.perf_counter() - started,
+                                    response.status, len(body))
+                    limiter.record(response.status, response.headers)
+                    delay = limiter.retry_delay(response.status, response.headers, attempt)
+                    if delay is None:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                observe_request(limiter.host, parts.path, time.perf_counter() - started, type(e).__name__)
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _kline_page(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[list]:
+        """Fetch one raw /klines page with open times in [start_ms, end_ms]"""
+        params = {
+            "symbol": symbol,
+            "interval": interval,
+            "startTime": start_ms,
+            "endTime": end_ms,
+            "limit": KLINES_PAGE_LIMIT
+        }
+        return await self.get_json(f"{stockscan_core.BINANCE_BASE}/klines", params=params)
+
+    async def _fetch_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[tuple]:
+        """Fetch every kline in [start_ms, end_ms], all 1000-candle windows at once"""
+        if interval in INTERVAL_MS:
+            pages = await asyncio.gather(*(
+                self._kline_page(symbol, interval, w_start, w_end)
+                for w_start, w_end in kline_windows(interval, start_ms, end_ms)
+            ))
+        else:
+            # 1M candles have no fixed length, page through them in order
+            pages = []
+            while start_ms <= end_ms:
+                page = await self._kline_page(symbol, interval, start_ms, end_ms)
+                if not page:
+                    break
+                pages.append(page)
+                if len(page) < KLINES_PAGE_LIMIT:
+                    break
+                start_ms = page[-1][0] + 1
+
+        candles = []
+        for page in pages:
+            if candles:
+                page = [c for c in page if c[0] > candles[-1][0]]
+            candles.extend(page)
+        return kline_tuples(candles)
+
+    async def _fetch_yahoo_chart(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[tuple]:
+        """Fetch Yahoo Finance chart candles with timestamps in [start_ms, end_ms]"""
+        url, params, headers = stockscan_core.yahoo_chart_request(symbol, interval, start_ms, end_ms)
+        return stockscan_core.parse_yahoo_chart(await self.get_json(url, params=params, headers=headers), interval)
+
+    async def _fill_gap(self, key: tuple, fetch_fn: Callable[[int, int], Awaitable[List[tuple]]]) -> List[tuple]:
+        """Download one missing range into the cache, returning its still-open candles"""
+        source, symbol, interval, gap_start, gap_end = key
+        try:
+            candles = await fetch_fn(gap_start, gap_end)
+            return await run_blocking(get_store().put, source, symbol, interval, candles, gap_start, gap_end)
+        finally:
+            self._inflight.pop(key, None)
+            self._filled[key[:3]] = self._filled.get(key[:3], 0) + 1
+
+    async def _cached_fetch(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                            fetch_fn: Callable[[int, int], Awaitable[List[tuple]]],
+                            limit: Optional[int] = None, max_age_ms: Optional[int] = None) -> List[tuple]:
+        """Async counterpart of CandleStore.fetch: download only missing gaps, once"""
+        store = get_store()
+        series = (source, symbol, interval)
+        if max_age_ms is not None and not any(key[:3] == series for key in self._inflight):
+            await run_blocking(store.expire, source, symbol, interval, max_age_ms)
+        while True:
+            filled = self._filled.get(series, 0)
+            gaps = await run_blocking(store.missing_ranges, source, symbol, interval, start_ms, end_ms)
+            if self._filled.get(series, 0) != filled:
+                # A download of this series finished meanwhile - the gaps may be stale
+                continue
+            # Another lookup already downloading part of this range? Wait for it, then look again
+            waiting = [
+                task for key, task in self._inflight.items()
+                if key[:3] == series and any(key[3] <= gap_end and gap_start <= key[4] for gap_start, gap_end in gaps)
+            ]
+            if not waiting:
+                break
+            await asyncio.wait(waiting)
+        count_cache("candles", not gaps)
+
+        tasks = []
+        for gap_start, gap_end in gaps:
+            key = series + (gap_start, gap_end)
+            task = self._inflight[key] = asyncio.ensure_future(self._fill_gap(key, fetch_fn))
+            tasks.append(task)
+        # shield: one cancelled lookup must not cancel a download others wait for
+        fresh = []
+        for still_open in await asyncio.shield(asyncio.gather(*tasks)):
+            fresh.extend(still_open)
+        return await run_blocking(store.assemble, source, symbol, interval, start_ms, end_ms, fresh, limit)
+
+    async def get_binance_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                                 limit: Optional[int] = None) -> List[tuple]:
+        """Async get_binance_klines: Binance candles through the local cache"""
+        return await self._cached_fetch(
+            "binance", symbol, interval, start_ms, end_ms,
+            lambda gap_start, gap_end: self._fetch_klines(symbol, interval, gap_start, gap_end),
+            limit=limit
+        )
+
+    async def get_yahoo_candles(self, symbol: str, interval: str, period1: int, period2: int) -> List[tuple]:
+        """Async get_yahoo_candles: Yahoo Finance candles through the local cache"""
+        return await self._cached_fetch(
+            "yahoo", symbol, interval, period1 * 1000, period2 * 1000,
+            lambda gap_start, gap_end: self._fetch_yahoo_chart(symbol, interval, gap_start, gap_end),
+            max_age_ms=stockscan_core.YAHOO_CACHE_TTL * 1000
+        )
+
+    async def get_crypto_price(self, symbol: str, date_str: str, time_str: Optional[str] = None,
+                               timeframe: str = "5m") -> Dict[str, Any]:
+        """Async stockscan_core.get_crypto_price (same arguments and result dict)"""
+        try:
+            dt = stockscan_core.parse_lookup_time(date_str, time_str)
+            error = stockscan_core.check_lookup_period(dt, date_str, timeframe)
+            if error:
+                return error
+            symbol_error = check_symbol(symbol)
+            if symbol_error:
+                return {"error": symbol_error}
+
+            target_timestamp_ms = int(dt.timestamp() * 1000)
+            interval, fetches = stockscan_core.crypto_kline_plan(target_timestamp_ms, timeframe)
+            candle = None
+            if interval in stockscan_core.CRYPTO_INTRADAY_TIMEFRAMES and interval != "1s":
+                # A 1m range index answers the window without reading its candles
+                candle = await run_blocking(cached_aggregate, symbol, target_timestamp_ms,
+                                            target_timestamp_ms + stockscan_core.CRYPTO_TIMEFRAME_MS[interval])
+            if candle is not None:
+                data = [candle]
+            else:
+                limit = 1 if interval in ["1w", "1M"] else None
+                parts = await asyncio.gather(*(
+                    self.get_binance_klines(symbol, kline_interval, start_ms, end_ms, limit=limit)
+                    for kline_interval, start_ms, end_ms in fetches
+                ))
+                data = sorted((candle for part in parts for candle in part), key=lambda candle: candle[0])
+
+            return stockscan_core.crypto_price_from_klines(symbol, dt, timeframe, data)
+
+        except FETCH_ERRORS as e:
+            return {"error": f"Failed to fetch data from Binance: {str(e) or type(e).__name__}"}
+        except ValueError as e:
+            return {"error": f"Invalid date/time format: {str(e)}"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {str(e)}"}
+
+    async def get_stock_price_yahoo(self, symbol: str, date_str: str, time_str: Optional[str] = None,
+                                    timeframe: str = "1d") -> Dict[str, Any]:
+        """Async stockscan_core.get_stock_price_yahoo (same arguments and result dict)"""
+        try:
+            dt = stockscan_core.parse_lookup_time(date_str)
+            error = stockscan_core.check_lookup_period(dt, date_str, timeframe)
+            if error:
+                return error
+
+            fetch_interval, period1, period2 = stockscan_core.yahoo_candle_range(dt, timeframe)
+            rows = await self.get_yahoo_candles(symbol, fetch_interval, period1, period2)
+
+            return stockscan_core.stock_price_from_candles(symbol, dt, date_str, timeframe, rows)
+
+        except FETCH_ERRORS as e:
+            if getattr(e, "status", None) == 400:
+                return {"error": f"No data available for {symbol} on {date_str}.\nThe stock/commodity may not have existed at that time, or data is unavailable for this date range.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
+            return {"error": f"Failed to fetch from Yahoo Finance: {str(e) or type(e).__name__}"}
+        except (KeyError, IndexError, TypeError):
+            return {"error": "Error parsing Yahoo Finance data.\nThe stock/commodity may not have existed at that time, or data format is unexpected.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
+        except ValueError as e:
+            return {"error": f"Invalid date format: {str(e)}"}
+        except Exception as e:
+            return {"error": f"Yahoo Finance error: {str(e)}"}
+
+    async def get_stock_price(self, symbol: str, date_str: str, time_str: Optional[str] = None,
+                              timeframe: str = "1d") -> Dict[str, Any]:
+        """Async stockscan_core.get_stock_price (same arguments and result dict)"""
+        providers = self.stock_providers(symbol, date_str, time_str, timeframe)
+        fallback = stockscan_core.unadjusted_stock_provider(symbol, date_str, time_str, timeframe)
+        if len(providers) == 1 and fallback is None:
+            return stockscan_core.finish_stock_result(await providers[0][1]())
+
+        # Don't ask backup providers about dates nobody has data for
+        try:
+            dt = stockscan_core.parse_lookup_time(date_str)
+        except ValueError as e:
+            return {"error": f"Invalid date format: {str(e)}"}
+        error = stockscan_core.check_lookup_period(dt, date_str, timeframe)
+        if error:
+            return error
+
+        if len(providers) == 1:
+            result = await providers[0][1]()
+        else:
+            _, result = await hedged_call_async(providers)
+        if "error" in result and fallback is not None:
+            result = stockscan_core.unadjusted_fallback_result(result, await run_blocking(fallback))
+        return stockscan_core.finish_stock_result(stockscan_core.normalize_stock_result(result))
+
+    def stock_providers(self, symbol: str, date_str: str, time_str: Optional[str] = None,
+                        timeframe: str = "1d") -> List[Tuple[str, Callable[[], Awaitable[Dict[str, Any]]]]]:
+        """stockscan_core.stock_providers with async Yahoo lookups, the others run on the executor"""
+        providers = [("yahoo", lambda: self.get_stock_price_yahoo(symbol, date_str, time_str, timeframe))]
+        for name, call in stockscan_core.stock_providers(symbol, date_str, time_str, timeframe)[1:]:
+            providers.append((name, functools.partial(run_blocking, call)))
+        return providers
+
+    async def get_live_crypto_price(self, symbol: str, stream_wait: float = 0.0) -> Dict[str, Any]:
+        """Async stockscan_core.get_live_crypto_price (streamed price first, then REST)"""
+        symbol_error = check_symbol(symbol)
+        if symbol_error:
+            return {"error": f"Failed to fetch live price: {symbol_error}"}
+        if stream_wait > 0:
+            # Waiting for a first trade blocks on the stream's condition variable
+            streamed = await run_blocking(functools.partial(streamed_price, symbol, wait=stream_wait))
+        else:
+            streamed = streamed_price(symbol)
+        if get_stream() is not None:
+            count_cache("stream", streamed is not None)
+        if streamed is not None:
+            return stockscan_core.live_stream_result(symbol, streamed)
+        try:
+            data = await self.get_json(f"{stockscan_core.BINANCE_BASE}/ticker/price", params={"symbol": symbol})
+            return stockscan_core.live_crypto_result(symbol, data)
+        except Exception as e:
+            return {"error": f"Failed to fetch live price: {str(e) or type(e).__name__}"}
+
+    async def get_live_stock_price(self, symbol: str) -> Dict[str, Any]:
+        """Async stockscan_core.get_live_stock_price"""
+        try:
+            data = await self.get_json(
+                f"{stockscan_core.YAHOO_CHART_BASE}/{symbol}",
+                params={"interval": "1m", "range": "1d"},
+                headers={"User-Agent": "Mozilla/5.0"}
+            )
+            return stockscan_core.live_stock_result(symbol, data)
+        except Exception as e:
+            return {"error": f"Failed to fetch live price: {str(e) or type(e).__name__}"}
+
+
+# One shared client per event loop for the module-level functions
+_clients = {}
+
+
+def get_client() -> AsyncClient:
+    """Return the shared client of the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    for other in [l for l in _clients if l.is_closed()]:
+        del _clients[other]
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncClient()
+    return client
+
+
+async def close():
+    """Close the shared client of the running event loop"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+async def get_crypto_price(symbol: str, date_str: str, time_str: Optional[str] = None,
+                           timeframe: str = "5m") -> Dict[str, Any]:
+    """Async stockscan_core.get_crypto_price using the shared client"""
+    return await get_client().get_crypto_price(symbol, date_str, time_str, timeframe)
+
+
+async def get_stock_price(symbol: str, date_str: str, time_str: Optional[str] = None,
+                          timeframe: str = "1d") -> Dict[str, Any]:
+    """Async stockscan_core.get_stock_price using the shared client"""
+    return await get_client().get_stock_price(symbol, date_str, time_str, timeframe)
+
+
+async def get_live_crypto_price(symbol: str, stream_wait: float = 0.0) -> Dict[str, Any]:
+    """Async stockscan_core.get_live_crypto_price using the shared client"""
+    return await get_client().get_live_crypto_price(symbol, stream_wait)
+
+
+async def get_live_stock_price(symbol: str) -> Dict[str, Any]:
+    """Async stockscan_core.get_live_stock_price using the shared client"""
+    return await get_client().get_live_stock_price(symbol)
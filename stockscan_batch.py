@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+StockScan Batch - Look up many (symbol, time) queries from a file
+Queries are grouped by symbol and candle interval, the candle ranges they
+need are merged and downloaded once into the local candle cache, and every
+query is then answered from the cache without further network calls.
+
+Input is CSV (with a header row) or JSON Lines; each query has:
+  market     crypto, stock or commodity (default: --market)
+  symbol     e.g. BTCUSDT, AAPL, GLD
+  date       YYYY-MM-DD (or "YYYY-MM-DD HH:MM")
+  time       HH:MM, crypto only (optional)
+  timeframe  candle timeframe (default: 5m for crypto, 1d for stocks)
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+import requests
+
+import stockscan_core
+from stockscan_cache import merge_ranges
+from stockscan_klines import INTERVAL_MS, KLINES_PAGE_LIMIT, KLINES_WORKERS
+from stockscan_symbols import check_symbol
+
+# Output columns (input columns are echoed first)
+RESULT_FIELDS = ['market', 'symbol', 'date', 'time', 'timeframe',
+                 'candle_start', 'candle_end', 'open', 'high', 'low', 'close', 'volume', 'error']
+
+# Two ranges of the same series closer than this are fetched as one
+# (a Binance page holds 1000 candles, a year of Yahoo daily candles is one small request)
+YAHOO_MERGE_GAP_MS = 366 * 86400000
+
+
+def _file_format(path: str, fmt: Optional[str]) -> str:
+    """Pick csv or jsonl from an explicit format or the file extension"""
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def read_queries(path: str, fmt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read lookup queries from a CSV or JSON Lines file.
+
+    Args:
+        path: Input file path
+        fmt: "csv" or "jsonl" (default: from the file extension)
+
+    Returns:
+        List of query dicts
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if _file_format(path, fmt) == "jsonl":
+            return [json.loads(line) for line in f if line.strip()]
+        return [dict(row) for row in csv.DictReader(f)]
+
+
+def normalize_query(query: Dict[str, Any], default_market: str = "crypto") -> Dict[str, Any]:
+    """Fill in defaults and split a "YYYY-MM-DD HH:MM" date into date and time"""
+    market = (query.get("market") or default_market).strip().lower()
+    if market == "stocks":
+        market = "stock"
+
+    date_str = str(query.get("date") or "").strip()
+    time_str = str(query.get("time") or "").strip() or None
+    for sep in (" ", "T"):
+        if sep in date_str:
+            date_str, time_str = date_str.split(sep, 1)
+            time_str = time_str[:5]
+            break
+
+    timeframe = str(query.get("timeframe") or "").strip() or ("5m" if market == "crypto" else "1d")
+
+    return {
+        "market": market,
+        "symbol": str(query.get("symbol") or "").strip().upper(),
+        "date": date_str,
+        "time": time_str if market == "crypto" else None,
+        "timeframe": timeframe
+    }
+
+
+def _series_ranges(query: Dict[str, Any]) -> List[Tuple[str, str, str, int, int]]:
+    """
+    The cached series ranges a query reads, as (source, symbol, interval, start_ms, end_ms).
+    Returns [] when the query is invalid (the lookup itself reports why).
+    """
+    try:
+        if query["time"]:
+            dt = datetime.strptime(f"{query['date']} {query['time']}", "%Y-%m-%d %H:%M")
+        else:
+            dt = datetime.strptime(query["date"], "%Y-%m-%d")
+    except ValueError:
+        return []
+    if not query["symbol"] or dt > datetime.now():
+        return []
+
+    if query["market"] == "crypto":
+        if check_symbol(query["symbol"]):
+            return []
+        _, fetches = stockscan_core.crypto_kline_plan(int(dt.timestamp() * 1000), query["timeframe"])
+        return [("binance", query["symbol"], interval, start_ms, end_ms) for interval, start_ms, end_ms in fetches]
+
+    fetch_interval, period1, period2 = stockscan_core.yahoo_candle_range(dt, query["timeframe"])
+    return [("yahoo", query["symbol"], fetch_interval, period1 * 1000, period2 * 1000)]
+
+
+def plan_fetches(queries: List[Dict[str, Any]]) -> Dict[Tuple[str, str, str], List[Tuple[int, int]]]:
+    """
+    Group normalized queries by series and merge the ranges they need.
+
+    Ranges of one series that overlap or sit close together become a single
+    fetch, so each candle is downloaded at most once for the whole batch.
+
+    Returns:
+        Dict of (source, symbol, interval) -> merged [start_ms, end_ms] ranges
+    """
+    wanted = {}
+    for query in queries:
+        for source, symbol, interval, start_ms, end_ms in _series_ranges(query):
+            wanted.setdefault((source, symbol, interval), []).append((start_ms, end_ms))
+
+    plan = {}
+    for key, ranges in wanted.items():
+        source, _, interval = key
+        if source == "binance":
+            max_gap = INTERVAL_MS.get(interval, INTERVAL_MS["1w"]) * KLINES_PAGE_LIMIT
+        else:
+            max_gap = YAHOO_MERGE_GAP_MS
+        merged = []
+        for start_ms, end_ms in merge_ranges(ranges):
+            if merged and start_ms - merged[-1][1] <= max_gap:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end_ms))
+            else:
+                merged.append((start_ms, end_ms))
+        plan[key] = merged
+    return plan
+
+
+def _prefetch_series(key: Tuple[str, str, str], ranges: List[Tuple[int, int]]):
+    """Download every range of one series into the candle cache"""
+    source, symbol, interval = key
+    for start_ms, end_ms in ranges:
+        if source == "binance":
+            stockscan_core.get_binance_klines(symbol, interval, start_ms, end_ms)
+        else:
+            stockscan_core.get_yahoo_candles(symbol, interval, start_ms // 1000, end_ms // 1000)
+
+
+def prefetch(plan: Dict[Tuple[str, str, str], List[Tuple[int, int]]],
+             workers: int = KLINES_WORKERS) -> Dict[Tuple[str, str, str], str]:
+    """
+    Fill the candle cache for a fetch plan, several series at a time.
+
+    A series that fails for any reason (network error, malformed response)
+    is reported in the result instead of aborting the whole batch.
+
+    Returns:
+        Dict of (source, symbol, interval) -> error message for series that failed
+    """
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {key: executor.submit(_prefetch_series, key, ranges) for key, ranges in plan.items()}
+        for key, future in futures.items():
+            try:
+                future.result()
+            except requests.exceptions.RequestException as e:
+                provider = "Binance" if key[0] == "binance" else "Yahoo Finance"
+                errors[key] = f"Failed to fetch data from {provider}: {str(e)}"
+            except Exception as e:
+                # A malformed response for one series fails only its rows
+                provider = "Binance" if key[0] == "binance" else "Yahoo Finance"
+                errors[key] = f"Unexpected {provider} response for {key[1]}: {type(e).__name__}: {str(e)}"
+    return errors
+
+
+def lookup(query: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one normalized query (served from the cache after prefetch)"""
+    if query["market"] == "crypto":
+        return stockscan_core.get_crypto_price(query["symbol"], query["date"], query["time"], query["timeframe"])
+    if query["market"] in ("stock", "commodity"):
+        return stockscan_core.get_stock_price(query["symbol"], query["date"], None, query["timeframe"])
+    return {"error": f"Unknown market '{query['market']}' (use crypto, stock or commodity)"}
+
+
+def result_row(query: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a lookup result into one output row"""
+    row = {
+        "market": query["market"],
+        "symbol": query["symbol"],
+        "date": query["date"],
+        "time": query["time"] or "",
+        "timeframe": query["timeframe"]
+    }
+    if "error" in result:
+        row["error"] = " ".join(result["error"].split())
+        return row
+
+    if query["market"] == "crypto":
+        row["candle_start"] = result["candle_start"]
+        row["candle_end"] = result["candle_end"]
+    else:
+        row["candle_start"] = result["candle_start_date"]
+        row["candle_end"] = result["candle_end_date"] or result["candle_start_date"]
+    for field in ("open", "high", "low", "close", "volume"):
+        row[field] = result[field]
+    return row
+
+
+def iter_batch_results(queries: List[Dict[str, Any]], default_market: str = "crypto",
+                       workers: int = KLINES_WORKERS) -> Iterator[Dict[str, Any]]:
+    """
+    Answer a list of raw queries, yielding one output row per query in order.
+
+    Args:
+        queries: Query dicts as read by read_queries
+        default_market: Market for queries without a "market" field
+        workers: Series downloaded concurrently during prefetch
+    """
+    normalized = [normalize_query(q, default_market) for q in queries]
+    errors = prefetch(plan_fetches(normalized), workers=workers)
+
+    for query in normalized:
+        failed = [errors[r[:3]] for r in _series_ranges(query) if r[:3] in errors]
+        result = {"error": failed[0]} if failed else lookup(query)
+        yield result_row(query, result)
+
+
+def write_results(rows: Iterator[Dict[str, Any]], path: str, fmt: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Stream result rows to a CSV or JSON Lines file.
+
+    Returns:
+        (rows written, rows with an error)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = failed = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if _file_format(path, fmt) == "jsonl":
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+                count += 1
+                failed += "error" in row
+        else:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+                failed += "error" in row
+    return count, failed
+
+
+def run_batch(input_path: str, output_path: str, default_market: str = "crypto",
+              input_format: Optional[str] = None, output_format: Optional[str] = None,
+              workers: int = KLINES_WORKERS) -> Tuple[int, int]:
+    """
+    Read queries from input_path and write one result row per query to output_path.
+
+    Returns:
+        (rows written, rows with an error)
+    """
+    queries = read_queries(input_path, input_format)
+    return write_results(iter_batch_results(queries, default_market, workers), output_path, output_format)
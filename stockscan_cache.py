@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+StockScan Candle Cache - Persistent on-disk store for historical candles
+Closed candles never change, so once a time range has been downloaded it is
+served from a local SQLite file and only the missing gaps hit the network.
+Series whose history can be rewritten (Yahoo Finance prices are adjusted
+after every split) are fetched with a max age and dropped as a whole once
+they are older, so candles from before and after a split are never mixed.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Callable, List, Tuple
+
+from stockscan_metrics import count_cache
+
+# Cache configuration (override with environment variables)
+CACHE_DIR = os.getenv("STOCKSCAN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".stockscan"))
+CACHE_ENABLED = os.getenv("STOCKSCAN_CACHE", "1") != "0"
+
+# Candle row layout: (open_time_ms, open, high, low, close, volume, close_time_ms)
+Candle = Tuple[int, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float], int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    open_time INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    close_time INTEGER NOT NULL,
+    PRIMARY KEY (source, symbol, interval, open_time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_key ON coverage (source, symbol, interval);
+CREATE TABLE IF NOT EXISTS series (
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    stored_at INTEGER NOT NULL,
+    PRIMARY KEY (source, symbol, interval)
+) WITHOUT ROWID;
+"""
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching inclusive [start, end] ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class CandleStore:
+    """
+    SQLite-backed candle store keyed by (source, symbol, interval, open time).
+
+    Alongside the candles it records which inclusive [start, end] open-time
+    ranges have already been fetched, so a lookup only downloads the gaps,
+    and when each series was first stored, so it can be expired.
+
+    Args:
+        path: SQLite file path, or ":memory:" for a process-local store
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def covered(self, source: str, symbol: str, interval: str) -> List[Tuple[int, int]]:
+        """Return the ranges already stored for a series"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_time, end_time FROM coverage WHERE source=? AND symbol=? AND interval=?",
+                (source, symbol, interval)
+            ).fetchall()
+        return merge_ranges(rows)
+
+    def missing_ranges(self, source: str, symbol: str, interval: str,
+                       start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """Return the parts of [start_ms, end_ms] that are not stored yet"""
+        gaps = []
+        cursor = start_ms
+        for cov_start, cov_end in self.covered(source, symbol, interval):
+            if cov_end < cursor:
+                continue
+            if cov_start > end_ms:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, cov_start - 1))
+            cursor = max(cursor, cov_end + 1)
+            if cursor > end_ms:
+                break
+        if cursor <= end_ms:
+            gaps.append((cursor, end_ms))
+        return gaps
+
+    def get(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+            limit: Optional[int] = None) -> List[Candle]:
+        """Return stored candles with open time in [start_ms, end_ms]"""
+        query = ("SELECT open_time, open, high, low, close, volume, close_time FROM candles "
+                 "WHERE source=? AND symbol=? AND interval=? AND open_time BETWEEN ? AND ? "
+                 "ORDER BY open_time")
+        args = [source, symbol, interval, start_ms, end_ms]
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            return self._conn.execute(query, args).fetchall()
+
+    def put(self, source: str, symbol: str, interval: str, candles: List[Candle],
+            start_ms: int, end_ms: int, now_ms: Optional[int] = None) -> List[Candle]:
+        """
+        Store the closed candles of a fetched range and mark it as covered.
+
+        Candles that have not closed yet are left out (and the range is only
+        marked covered up to the first of them) so they are refetched later.
+
+        Returns:
+            The candles that were NOT stored because they are still open
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+
+        closed = [c for c in candles if c[6] < now_ms]
+        still_open = [c for c in candles if c[6] >= now_ms]
+
+        covered_end = min(end_ms, now_ms - 1)
+        if still_open:
+            covered_end = min(covered_end, min(c[0] for c in still_open) - 1)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(source, symbol, interval) + tuple(c) for c in closed]
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO series VALUES (?, ?, ?, ?)", (source, symbol, interval, now_ms)
+            )
+            if covered_end >= start_ms:
+                ranges = self.covered(source, symbol, interval) + [(start_ms, covered_end)]
+                self._conn.execute(
+                    "DELETE FROM coverage WHERE source=? AND symbol=? AND interval=?",
+                    (source, symbol, interval)
+                )
+                self._conn.executemany(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?, ?)",
+                    [(source, symbol, interval, s, e) for s, e in merge_ranges(ranges)]
+                )
+        return still_open
+
+    def expire(self, source: str, symbol: str, interval: str, max_age_ms: int,
+               now_ms: Optional[int] = None) -> bool:
+        """
+        Drop a whole series (candles and coverage) first stored more than
+        max_age_ms ago. Series stored before ages were recorded count as expired.
+
+        Returns:
+            True if the series was dropped
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        key = (source, symbol, interval)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT stored_at FROM series WHERE source=? AND symbol=? AND interval=?", key
+            ).fetchone()
+            if row is not None and now_ms - row[0] <= max_age_ms:
+                return False
+            if row is None and not self.covered(source, symbol, interval):
+                return False
+            for table in ("candles", "coverage", "series"):
+                self._conn.execute(f"DELETE FROM {table} WHERE source=? AND symbol=? AND interval=?", key)
+        return True
+
+    def fetch(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+              fetch_fn: Callable[[int, int], List[Candle]], limit: Optional[int] = None,
+              max_age_ms: Optional[int] = None) -> List[Candle]:
+        """
+        Return candles for [start_ms, end_ms], downloading only missing gaps.
+
+        Args:
+            source: Data source name (e.g., "binance", "yahoo")
+            symbol: Trading symbol
+            interval: Candle interval (e.g., "1m", "1d")
+            start_ms: First open time to include (epoch ms)
+            end_ms: Last open time to include (epoch ms)
+            fetch_fn: Called as fetch_fn(gap_start_ms, gap_end_ms) for each gap
+            limit: Optional max number of candles to return
+            max_age_ms: Download the whole series again once it is older than this
+
+        Returns:
+            List of candle rows sorted by open time
+        """
+        if max_age_ms is not None:
+            self.expire(source, symbol, interval, max_age_ms)
+        fresh = []
+        gaps = self.missing_ranges(source, symbol, interval, start_ms, end_ms)
+        count_cache("candles", not gaps)
+        for gap_start, gap_end in gaps:
+            candles = fetch_fn(gap_start, gap_end)
+            fresh.extend(self.put(source, symbol, interval, candles, gap_start, gap_end))
+        return self.assemble(source, symbol, interval, start_ms, end_ms, fresh, limit)
+
+    def assemble(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                 fresh: List[Candle], limit: Optional[int] = None) -> List[Candle]:
+        """Stored candles for [start_ms, end_ms] with still-open fresh candles merged in"""
+        rows = self.get(source, symbol, interval, start_ms, end_ms)
+        if fresh:
+            by_open = {row[0]: row for row in rows}
+            for candle in fresh:
+                if start_ms <= candle[0] <= end_ms:
+                    by_open[candle[0]] = tuple(candle)
+            rows = [by_open[k] for k in sorted(by_open)]
+        return rows[:limit] if limit is not None else rows
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> CandleStore:
+    """
+    Return the shared candle store.
+
+    Uses CACHE_DIR/candles.sqlite3 on disk, or a process-local in-memory
+    store when STOCKSCAN_CACHE=0.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.path.join(CACHE_DIR, "candles.sqlite3") if CACHE_ENABLED else ":memory:"
+                try:
+                    _store = CandleStore(path)
+                except (OSError, sqlite3.Error):
+                    # Read-only home directory etc. - fall back to memory
+                    _store = CandleStore(":memory:")
+    return _store
@@ -0,0 +1,1290 @@
+#!/usr/bin/env python3
+"""
+StockScan Core - Market data lookups shared by every StockScan command
+Provider endpoints, the commodity ETF list, the candle fetchers and the
+crypto, stock and live price lookups, plus the terminal colors. The
+stockscan.py script, batch, snapshot, scan, watch, serve and the async API
+all use this one module, so they share a single set of endpoints, symbol
+index and price stream however StockScan was started.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+import requests
+
+from stockscan_http import http_get, yfinance_session
+from stockscan_cache import get_store
+from stockscan_klines import fetch_klines, kline_tuples
+from stockscan_symbols import SymbolIndex, load_symbol_index, check_symbol
+from stockscan_stream import get_stream, streamed_price
+from stockscan_metrics import count_cache
+from stockscan_timeindex import TimeIndex, local_day_bounds
+from stockscan_hedge import hedged_call, HEDGE_ENABLED
+from stockscan_alphavantage import load_daily_series, AlphaVantageError
+from stockscan_rangeindex import cached_aggregate
+
+# yfinance (stock/commodity exports) pulls in pandas and numpy, so only check
+# it is installed here - it is imported when an export actually needs it
+YFINANCE_AVAILABLE = find_spec("yfinance") is not None
+
+# ANSI Color Codes (Purple Theme)
+PURPLE = '\033[95m'
+BRIGHT_PURPLE = '\033[1;35m'
+CYAN = '\033[96m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+DIM = '\033[2m'
+
+# API Configuration
+BINANCE_BASE = "https://api.binance.com/api/v3"
+FINNHUB_BASE = "https://finnhub.io/api/v1"
+FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY", "")
+ALPHAVANTAGE_BASE = "https://www.alphavantage.co/query"
+ALPHAVANTAGE_API_KEY = os.getenv("ALPHAVANTAGE_API_KEY", "demo")
+YAHOO_CHART_BASE = "https://query1.finance.yahoo.com/v8/finance/chart"
+YAHOO_SPARK_BASE = "https://query1.finance.yahoo.com/v7/finance/spark"
+
+# Seconds Yahoo Finance candles stay in the candle cache. Yahoo adjusts the whole
+# price history after a split, so older candles must not be mixed with new ones
+YAHOO_CACHE_TTL = int(os.getenv("STOCKSCAN_YAHOO_CACHE_TTL", "86400"))
+
+# Candle length per Yahoo interval (used to tell closed candles from live ones)
+YAHOO_INTERVAL_MS = {
+    "1d": 86400000,
+    "1wk": 604800000,
+    "1mo": 2592000000
+}
+
+# Commodity ETF Symbols (130+ commodity ETFs)
+COMMODITY_ETFS = {
+    # Precious Metals - Gold
+    "GLD": "SPDR Gold Shares",
+    "IAU": "iShares Gold Trust",
+    "GLDM": "SPDR Gold MiniShares",
+    "SGOL": "abrdn Physical Gold Shares",
+    "BAR": "GraniteShares Gold Trust",
+    "AAAU": "Goldman Sachs Physical Gold",
+    "OUNZ": "VanEck Merk Gold Trust",
+    "GLDL": "Goldman Sachs ActiveBeta Gold",
+    "IAUM": "iShares Gold Trust Micro",
+    "AAAU": "Perth Mint Physical Gold",
+    
+    # Precious Metals - Silver
+    "SLV": "iShares Silver Trust",
+    "SIVR": "abrdn Physical Silver Shares",
+    "PSLV": "Sprott Physical Silver Trust",
+    "SLVP": "iShares MSCI Global Silver Miners",
+    
+    # Precious Metals - Platinum & Palladium
+    "PPLT": "abrdn Physical Platinum Shares",
+    "PALL": "abrdn Physical Palladium Shares",
+    
+    # Precious Metals - Multi-Metal
+    "GLTR": "abrdn Physical Precious Metals Basket",
+    "DBP": "Invesco DB Precious Metals Fund",
+    
+    # Energy - Crude Oil
+    "USO": "United States Oil Fund",
+    "UCO": "ProShares Ultra Bloomberg Crude Oil",
+    "DBO": "Invesco DB Oil Fund",
+    "USL": "United States 12 Month Oil Fund",
+    "SCO": "ProShares UltraShort Bloomberg Crude Oil",
+    "BNO": "United States Brent Oil Fund",
+    "DNO": "United States Short Oil Fund",
+    "OILK": "ProShares K-1 Free Crude Oil Strategy",
+    "OLEM": "iShares Commodities Select Strategy",
+    "USO": "United States Oil Fund LP",
+    
+    # Energy - Natural Gas
+    "UNG": "United States Natural Gas Fund",
+    "BOIL": "ProShares Ultra Bloomberg Natural Gas",
+    "KOLD": "ProShares UltraShort Bloomberg Natural Gas",
+    "UNL": "United States 12 Month Natural Gas Fund",
+    "GAZ": "iPath Series B Bloomberg Natural Gas",
+    "GASL": "Direxion Daily Natural Gas Related Bull 3X",
+    "GASX": "Direxion Daily Natural Gas Related Bear 3X",
+    
+    # Energy - Gasoline & Heating Oil
+    "UGA": "United States Gasoline Fund",
+    "UHN": "United States Heating Oil Fund",
+    
+    # Energy - Broad Energy
+    "DBE": "Invesco DB Energy Fund",
+    "IXC": "iShares Global Energy ETF",
+    "XLE": "Energy Select Sector SPDR Fund",
+    "VDE": "Vanguard Energy ETF",
+    "IYE": "iShares U.S. Energy ETF",
+    
+    # Agriculture - Grains
+    "CORN": "Teucrium Corn Fund",
+    "WEAT": "Teucrium Wheat Fund",
+    "SOYB": "Teucrium Soybean Fund",
+    "OATS": "Teucrium Oat Fund",
+    "RICE": "Teucrium Rice Fund",
+    "WEAT": "Teucrium Wheat Fund",
+    "CANE": "Teucrium Sugar Fund",
+    
+    # Agriculture - Soft Commodities
+    "JO": "iPath Series B Bloomberg Coffee",
+    "NIB": "iPath Bloomberg Cocoa",
+    "SGG": "iPath Series B Bloomberg Sugar",
+    "BAL": "iPath Bloomberg Cotton",
+    "WOOD": "iShares Global Timber & Forestry ETF",
+    "CUT": "Invesco MSCI Global Timber ETF",
+    
+    # Agriculture - Livestock
+    "COW": "iPath Series B Bloomberg Livestock",
+    
+    # Agriculture - Broad Agriculture
+    "DBA": "Invesco DB Agriculture Fund",
+    "TAGS": "Teucrium Agricultural Fund",
+    "RJA": "Elements Rogers International Commodity Agriculture",
+    "MOO": "VanEck Agribusiness ETF",
+    "VEGI": "iShares MSCI Global Agriculture Producers",
+    "PAGG": "Invesco Global Agriculture ETF",
+    "FTAG": "First Trust Indxx Global Agriculture ETF",
+    
+    # Industrial Metals - Copper
+    "CPER": "United States Copper Index Fund",
+    "JJC": "iPath Series B Bloomberg Copper",
+    "COPX": "Global X Copper Miners ETF",
+    
+    # Industrial Metals - Aluminum
+    "JJU": "iPath Series B Bloomberg Aluminum",
+    
+    # Industrial Metals - Nickel
+    "JJN": "iPath Series B Bloomberg Nickel",
+    
+    # Industrial Metals - Broad Base Metals
+    "DBB": "Invesco DB Base Metals Fund",
+    "PICK": "iShares MSCI Global Metals & Mining Producers",
+    "XME": "SPDR S&P Metals & Mining ETF",
+    
+    # Broad Commodity Baskets
+    "DBC": "Invesco DB Commodity Index Tracking Fund",
+    "PDBC": "Invesco Optimum Yield Diversified Commodity",
+    "GSG": "iShares S&P GSCI Commodity-Indexed Trust",
+    "USCI": "United States Commodity Index Fund",
+    "GCC": "WisdomTree Continuous Commodity Index Fund",
+    "RJI": "Elements Rogers International Commodity Index",
+    "COMT": "iShares Commodities Select Strategy ETF",
+    "CMDY": "iShares Bloomberg Roll Select Commodity Strategy",
+    "BCI": "abrdn Bloomberg All Commodity Strategy K-1 Free",
+    "FTGC": "First Trust Global Tactical Commodity Strategy",
+    "COMB": "GraniteShares Bloomberg Commodity Broad Strategy",
+    
+    # Uranium & Nuclear
+    "URA": "Global X Uranium ETF",
+    "URNM": "Sprott Uranium Miners ETF",
+    "NLR": "VanEck Uranium+Nuclear Energy ETF",
+    "HURA": "Horizons Global Uranium Index ETF",
+    
+    # Carbon Credits
+    "KRBN": "KraneShares Global Carbon Strategy ETF",
+    "KEUA": "KraneShares European Carbon Allowance Strategy",
+    
+    # Leveraged & Inverse Commodity ETFs
+    "UGL": "ProShares Ultra Gold",
+    "GLL": "ProShares UltraShort Gold",
+    "AGQ": "ProShares Ultra Silver",
+    "ZSL": "ProShares UltraShort Silver",
+    "UGLD": "VelocityShares 3x Long Gold ETN",
+    "DGLD": "VelocityShares 3x Inverse Gold ETN",
+    "USLV": "VelocityShares 3x Long Silver ETN",
+    "DSLV": "VelocityShares 3x Inverse Silver ETN",
+    "BOIL": "ProShares Ultra Bloomberg Natural Gas",
+    "KOLD": "ProShares UltraShort Bloomberg Natural Gas",
+    "UCO": "ProShares Ultra Bloomberg Crude Oil",
+    "SCO": "ProShares UltraShort Bloomberg Crude Oil",
+    "WTIU": "ProShares Ultra Bloomberg WTI Crude Oil",
+    "WTID": "ProShares UltraShort Bloomberg WTI Crude Oil",
+    
+    # Specialty Commodities
+    "PLTM": "GraniteShares Platinum Trust",
+    "PALL": "abrdn Physical Palladium Shares ETF",
+    "WITE": "ETRACS Bloomberg Commodity Index Total Return ETN",
+    "DJCI": "ETRACS Bloomberg Commodity Index Total Return ETN",
+}
+
+
+
+
+def _fetch_binance_klines(symbol: str, interval: str, start_ms: int, end_ms: int) -> List[tuple]:
+    """Fetch Binance /klines for open times in [start_ms, end_ms]"""
+    data = fetch_klines(f"{BINANCE_BASE}/klines", symbol, interval, start_ms, end_ms)
+    
+    # Keep [open_time, open, high, low, close, volume, close_time]
+    return kline_tuples(data)
+
+
+def get_binance_klines(symbol: str, interval: str, start_ms: int, end_ms: int, limit: Optional[int] = None) -> List[tuple]:
+    """
+    Get Binance klines through the local candle cache.
+    Only time ranges that are not cached yet are downloaded.
+    
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        interval: Binance kline interval (e.g., 1m, 1d)
+        start_ms: First candle open time to include (epoch ms)
+        end_ms: Last candle open time to include (epoch ms)
+        limit: Optional max number of candles to return
+    
+    Returns:
+        List of (open_time, open, high, low, close, volume, close_time) rows
+    """
+    return get_store().fetch(
+        "binance", symbol, interval, start_ms, end_ms,
+        lambda gap_start, gap_end: _fetch_binance_klines(symbol, interval, gap_start, gap_end),
+        limit=limit
+    )
+
+
+# Candle length per crypto timeframe in milliseconds (1M approximated as 30 days)
+CRYPTO_TIMEFRAME_MS = {
+    "1s": 1000,
+    "1m": 60000,
+    "3m": 180000,
+    "5m": 300000,
+    "15m": 900000,
+    "30m": 1800000,
+    "1h": 3600000,
+    "2h": 7200000,
+    "4h": 14400000,
+    "6h": 21600000,
+    "8h": 28800000,
+    "12h": 43200000,
+    "1d": 86400000,
+    "3d": 259200000,
+    "1w": 604800000,
+    "1M": 2592000000
+}
+
+# Intraday timeframes are built from smaller candles so they can start at any minute
+CRYPTO_INTRADAY_TIMEFRAMES = ['1s', '1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h']
+
+
+# Native Binance candles an intraday lookup can be built from, coarsest first
+CRYPTO_NATIVE_INTERVALS = ['12h', '8h', '6h', '4h', '2h', '1h', '30m', '15m', '5m', '3m', '1m', '1s']
+
+# A plan of several requests is only used instead of one request for
+# 1-minute candles if it needs at most MAX_PLAN_REQUESTS requests and the
+# 1-minute request would return at least MIN_SPLIT_CANDLES candles
+MAX_PLAN_REQUESTS = 3
+MIN_SPLIT_CANDLES = 120
+
+
+def plan_native_candles(start_ms: int, end_ms: int) -> List[Tuple[str, int, int]]:
+    """
+    Cover [start_ms, end_ms) with the fewest, coarsest native Binance candles.
+    
+    Walks from start_ms and always takes the largest candle that starts on
+    the current position (Binance candles are aligned to UTC midnight) and
+    ends inside the window. A 4h lookup at 12:00 (UTC) is one 4h candle, a
+    4h lookup at 13:00 is 1h + 2h + 1h pieces. Windows shorter than
+    MIN_SPLIT_CANDLES minutes (a 1h lookup at 14:15) or needing more than
+    MAX_PLAN_REQUESTS runs are fetched as one 1-minute range instead.
+    
+    Returns:
+        (interval, first open time, last open time) per run of same-size
+        candles, or one 1-minute range when that is cheaper
+    """
+    runs = []
+    cursor = start_ms
+    while cursor < end_ms:
+        for interval in CRYPTO_NATIVE_INTERVALS:
+            length = CRYPTO_TIMEFRAME_MS[interval]
+            if cursor % length == 0 and cursor + length <= end_ms:
+                if runs and runs[-1][0] == interval:
+                    # Next candle of the same size - extend the run
+                    runs[-1] = (interval, runs[-1][1], cursor)
+                else:
+                    runs.append((interval, cursor, cursor))
+                cursor += length
+                break
+        else:
+            # Not aligned to a whole second - only 1-minute candles can cover it
+            runs = []
+            break
+    
+    if len(runs) == 1:
+        return runs
+    if not runs or len(runs) > MAX_PLAN_REQUESTS or end_ms - start_ms < MIN_SPLIT_CANDLES * 60000:
+        return [("1m", start_ms, end_ms - 1)]
+    return runs
+
+
+def crypto_kline_plan(target_ms: int, timeframe: str) -> Tuple[str, List[Tuple[str, int, int]]]:
+    """
+    Work out which Binance candles a crypto lookup needs.
+    
+    Args:
+        target_ms: Requested time (epoch ms)
+        timeframe: Requested candle timeframe
+    
+    Returns:
+        (timeframe used, [(kline interval, first open time, last open time), ...])
+    """
+    interval = timeframe if timeframe in CRYPTO_TIMEFRAME_MS else "1m"
+    window = CRYPTO_TIMEFRAME_MS[interval]
+    
+    if interval in CRYPTO_INTRADAY_TIMEFRAMES:
+        # Native candles from the requested time to the end of the period
+        return interval, plan_native_candles(target_ms, target_ms + window)
+    if interval in ["1w", "1M"]:
+        # The candle starting at (or after) the requested date
+        return interval, [(interval, target_ms, target_ms + window)]
+    # Daily and 3d: native candles around the requested time
+    return interval, [(interval, target_ms - (window * 2), target_ms + (window * 2))]
+
+
+def parse_lookup_time(date_str: str, time_str: Optional[str] = None) -> datetime:
+    """Parse a YYYY-MM-DD date and optional HH:MM time (raises ValueError)"""
+    if time_str:
+        dt_str = f"{date_str} {time_str}"
+        return datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+def check_lookup_period(dt: datetime, date_str: str, timeframe: str) -> Optional[Dict[str, Any]]:
+    """
+    Reject lookups of future dates and of weekly/monthly periods that have not ended yet.
+    
+    Returns:
+        Error dict, or None if the lookup can go ahead
+    """
+    # Check if future
+    if dt > datetime.now():
+        return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
+    
+    # For weekly/monthly timeframes, check if the period has completed
+    if timeframe in ["1w", "1M", "1wk", "1mo"]:
+        if timeframe in ["1w", "1wk"]:
+            end_dt = dt + timedelta(days=7)
+            period_name = "week"
+        else:  # 1M / 1mo
+            end_dt = dt + timedelta(days=30)
+            period_name = "month"
+        
+        if end_dt > datetime.now():
+            return {"error": f"The {period_name} period starting from {date_str} has not completed yet.\nEnd date would be {end_dt.strftime('%Y-%m-%d')}, which is in the future.\nPlease choose an earlier date or use a shorter timeframe."}
+    
+    return None
+
+
+def crypto_price_from_klines(symbol: str, dt: datetime, timeframe: str, data: List[tuple]) -> Dict[str, Any]:
+    """
+    Build the get_crypto_price result from the candles crypto_kline_plan asked for.
+    
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        dt: Requested time
+        timeframe: Requested candle timeframe
+        data: (open_time, open, high, low, close, volume, close_time) rows
+    
+    Returns:
+        Dict with price data or error
+    """
+    # Convert to milliseconds for Binance
+    target_timestamp_ms = int(dt.timestamp() * 1000)
+    
+    # Calculate time window based on timeframe
+    interval = timeframe if timeframe in CRYPTO_TIMEFRAME_MS else "1m"
+    window = CRYPTO_TIMEFRAME_MS[interval]
+    end_time = target_timestamp_ms + window
+    
+    # For intraday timeframes (under 1d), the planned native candles are aggregated
+    # This allows starting from ANY arbitrary time
+    if interval in CRYPTO_INTRADAY_TIMEFRAMES:
+        if not data:
+            return {"error": "No data available for this time.\nThe crypto asset may not have existed yet, or data is unavailable."}
+        
+        # Aggregate the candles into one
+        opens = [float(candle[1]) for candle in data]
+        highs = [float(candle[2]) for candle in data]
+        lows = [float(candle[3]) for candle in data]
+        closes = [float(candle[4]) for candle in data]
+        volumes = [float(candle[5]) for candle in data]
+        
+        # Create aggregated candle
+        target_candle = [
+            data[0][0],  # Open time (first candle)
+            opens[0],  # First open
+            max(highs),  # Highest high
+            min(lows),  # Lowest low
+            closes[-1],  # Last close
+            sum(volumes),  # Total volume
+            data[-1][6]  # Close time (last candle)
+        ]
+        
+        candle_open_time = dt
+        candle_close_time = datetime.fromtimestamp(end_time / 1000)
+        
+    elif interval in ["1w", "1M"]:
+        # For weekly/monthly timeframes, start from exact date and go forward
+        if not data:
+            return {"error": "No data available for this time.\nThe crypto asset may not have existed yet, or data is unavailable."}
+        
+        target_candle = data[0]
+        
+        # Calculate actual period
+        candle_open_time = dt  # Start from requested date
+        candle_close_time = dt + timedelta(milliseconds=window)
+    else:
+        # For daily and above (3d), use standard Binance candles
+        if not data:
+            return {"error": "No data available for this time.\nThe crypto asset may not have existed yet, or data is unavailable."}
+        
+        # Find the candle that CONTAINS the target time
+        # Candle structure: [open_time, open, high, low, close, volume, close_time, ...]
+        index = TimeIndex.from_rows(data)
+        target_idx = index.containing(target_timestamp_ms)
+        
+        # If no exact match, use the closest candle
+        if target_idx is None:
+            target_idx = index.closest(target_timestamp_ms)
+        target_candle = data[target_idx]
+        
+        # Extract candle data
+        candle_open_time = datetime.fromtimestamp(target_candle[0] / 1000)
+        candle_close_time = datetime.fromtimestamp(target_candle[6] / 1000)
+    
+    # Check if candle crosses midnight (spans two different dates)
+    crosses_midnight = candle_open_time.date() != candle_close_time.date()
+    midnight_note = None
+    
+    if crosses_midnight:
+        # Calculate time in each day
+        start_date = candle_open_time.date()
+        end_date = candle_close_time.date()
+        
+        # Time until midnight from start
+        midnight_of_start = datetime.combine(start_date, datetime.max.time()).replace(microsecond=0) + timedelta(seconds=1)
+        time_in_first_day = (midnight_of_start - candle_open_time).total_seconds()
+        
+        # Time from midnight in next day
+        time_in_second_day = (candle_close_time - midnight_of_start).total_seconds()
+        
+        # Convert to readable format with hours and minutes
+        def seconds_to_readable(seconds):
+            if seconds < 60:
+                return f"{int(seconds)} second(s)"
+            elif seconds < 3600:
+                minutes = int(seconds / 60)
+                return f"{minutes} minute(s)"
+            else:
+                hours = int(seconds / 3600)
+                remaining_seconds = seconds % 3600
+                minutes = int(remaining_seconds / 60)
+                
+                if minutes > 0:
+                    return f"{hours} hour(s) {minutes} minute(s)"
+                else:
+                    return f"{hours} hour(s)"
+        
+        midnight_note = f"{seconds_to_readable(time_in_first_day)} from {start_date.strftime('%Y-%m-%d')}, {seconds_to_readable(time_in_second_day)} from {end_date.strftime('%Y-%m-%d')}"
+    
+    result = {
+        "symbol": symbol,
+        "market": "Crypto (Binance)",
+        "requested_time": dt.strftime("%Y-%m-%d %H:%M UTC"),
+        "timeframe": interval,
+        "candle_start": candle_open_time.strftime("%Y-%m-%d %H:%M UTC"),
+        "candle_end": candle_close_time.strftime("%Y-%m-%d %H:%M UTC"),
+        "open": float(target_candle[1]),
+        "high": float(target_candle[2]),
+        "low": float(target_candle[3]),
+        "close": float(target_candle[4]),  # This is the price at that time
+        "volume": float(target_candle[5]),
+        "crosses_midnight": crosses_midnight,
+        "midnight_note": midnight_note
+    }
+    
+    return result
+
+
+def get_binance_kline_plan(symbol: str, fetches: List[Tuple[str, int, int]], limit: Optional[int] = None) -> List[tuple]:
+    """
+    Get the candles of a crypto_kline_plan, one cached range per run.
+    Several runs are fetched in parallel and merged in open-time order.
+    """
+    if len(fetches) == 1:
+        interval, start_ms, end_ms = fetches[0]
+        return get_binance_klines(symbol, interval, start_ms, end_ms, limit=limit)
+    
+    with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+        parts = list(executor.map(
+            lambda fetch: get_binance_klines(symbol, fetch[0], fetch[1], fetch[2], limit=limit), fetches
+        ))
+    return sorted((candle for part in parts for candle in part), key=lambda candle: candle[0])
+
+
+def get_crypto_price(symbol: str, date_str: str, time_str: Optional[str] = None, timeframe: str = "5m") -> Dict[str, Any]:
+    """
+    Get crypto price from Binance at specific time using OHLCV candle logic.
+    Finds the candle that CONTAINS the requested time and returns its CLOSE price.
+    
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        date_str: Date in YYYY-MM-DD format
+        time_str: Optional time in HH:MM format (default: 00:00)
+        timeframe: Candle interval - 1m, 5m, 15m, 1h, 1d (default: 1m)
+    
+    Returns:
+        Dict with price data or error
+    """
+    try:
+        dt = parse_lookup_time(date_str, time_str)
+        error = check_lookup_period(dt, date_str, timeframe)
+        if error:
+            return error
+        
+        # Reject misspelled pairs locally when the symbol list is cached
+        symbol_error = check_symbol(symbol)
+        if symbol_error:
+            return {"error": symbol_error}
+        
+        # Convert to milliseconds for Binance
+        target_timestamp_ms = int(dt.timestamp() * 1000)
+        
+        # Fetch the candles covering the requested period (through the local cache)
+        interval, fetches = crypto_kline_plan(target_timestamp_ms, timeframe)
+        candle = None
+        if interval in CRYPTO_INTRADAY_TIMEFRAMES and interval != "1s":
+            # A 1m range index (in memory, or built from stored 1m candles) answers the window
+            candle = cached_aggregate(symbol, target_timestamp_ms, target_timestamp_ms + CRYPTO_TIMEFRAME_MS[interval])
+        if candle is not None:
+            data = [candle]
+        else:
+            limit = 1 if interval in ["1w", "1M"] else None
+            data = get_binance_kline_plan(symbol, fetches, limit=limit)
+        
+        return crypto_price_from_klines(symbol, dt, timeframe, data)
+    
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Failed to fetch data from Binance: {str(e)}"}
+    except ValueError as e:
+        return {"error": f"Invalid date/time format: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Unexpected error: {str(e)}"}
+
+
+def _fetch_yahoo_chart(symbol: str, interval: str, start_ms: int, end_ms: int) -> List[tuple]:
+    """Fetch Yahoo Finance chart candles with timestamps in [start_ms, end_ms]"""
+    url, params, headers = yahoo_chart_request(symbol, interval, start_ms, end_ms)
+    
+    response = http_get(url, params=params, headers=headers)
+    response.raise_for_status()
+    return parse_yahoo_chart(response.json(), interval)
+
+
+def yahoo_chart_request(symbol: str, interval: str, start_ms: int, end_ms: int) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """URL, query parameters and headers of a Yahoo Finance chart request"""
+    url = f"{YAHOO_CHART_BASE}/{symbol}"
+    params = {
+        "period1": start_ms // 1000,
+        "period2": end_ms // 1000 + 1,
+        "interval": interval,
+        "events": "history"
+    }
+    
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+    return url, params, headers
+
+
+def parse_yahoo_chart(data: Dict[str, Any], interval: str) -> List[tuple]:
+    """Convert a Yahoo Finance chart response into candle rows"""
+    result = data["chart"]["result"]
+    if not result or "timestamp" not in result[0]:
+        # No trading in this range (e.g., before listing)
+        return []
+    
+    quote = result[0]
+    indicators = quote["indicators"]["quote"][0]
+    candle_ms = YAHOO_INTERVAL_MS.get(interval, 86400000)
+    
+    return [
+        (ts * 1000, indicators["open"][i], indicators["high"][i], indicators["low"][i],
+         indicators["close"][i], indicators["volume"][i], ts * 1000 + candle_ms - 1)
+        for i, ts in enumerate(quote["timestamp"])
+    ]
+
+
+def get_yahoo_candles(symbol: str, interval: str, period1: int, period2: int) -> List[tuple]:
+    """
+    Get Yahoo Finance candles through the local candle cache.
+    A symbol's cached candles are downloaded again after YAHOO_CACHE_TTL.
+    
+    Args:
+        symbol: Stock symbol (e.g., AAPL, RELIANCE.NS)
+        interval: Yahoo interval (e.g., 1d)
+        period1: Range start (unix seconds)
+        period2: Range end (unix seconds)
+    
+    Returns:
+        List of (open_time, open, high, low, close, volume, close_time) rows in ms
+    """
+    return get_store().fetch(
+        "yahoo", symbol, interval, period1 * 1000, period2 * 1000,
+        lambda gap_start, gap_end: _fetch_yahoo_chart(symbol, interval, gap_start, gap_end),
+        max_age_ms=YAHOO_CACHE_TTL * 1000
+    )
+
+
+# A daily stock lookup for a day without trading shows the last trading day
+# before it, up to this many days back - the same rule for every provider
+DAILY_LOOKBACK_DAYS = 7
+
+
+def yahoo_candle_range(dt: datetime, timeframe: str) -> Tuple[str, int, int]:
+    """
+    Work out which Yahoo Finance candles a stock lookup needs.
+    
+    Args:
+        dt: Requested date
+        timeframe: Requested timeframe - 1d, 1wk, 1mo
+    
+    Returns:
+        (interval to fetch, period1, period2) with periods in unix seconds
+    """
+    # Map timeframe to Yahoo Finance interval
+    interval_map = {
+        "1d": "1d",
+        "1wk": "1wk",
+        "1mo": "1mo"
+    }
+    
+    interval = interval_map.get(timeframe, "1d")
+    
+    # For weekly/monthly timeframes, fetch DAILY data and aggregate
+    if timeframe in ["1wk", "1mo"]:
+        # Fetch daily data for the period
+        # Add buffer days before to handle holidays/weekends at start
+        start_dt = dt - timedelta(days=5)  # Go back 5 days to catch the requested date
+        
+        # Calculate end date based on timeframe
+        # Add extra days to account for weekends and holidays
+        if timeframe == "1wk":
+            end_dt = dt + timedelta(days=14)  # Fetch 2 weeks to ensure we get 7 calendar days of data
+        else:  # 1mo
+            end_dt = dt + timedelta(days=40)  # Fetch 40 days to ensure we get 30 calendar days of data
+        
+        # Fetch DAILY data (not weekly/monthly)
+        return "1d", int(start_dt.timestamp()), int(end_dt.timestamp())
+    
+    # Daily - a week before to a day after the requested date
+    days_before = DAILY_LOOKBACK_DAYS
+    days_after = 1
+    
+    start_dt = dt - timedelta(days=days_before)
+    end_dt = dt + timedelta(days=days_after)
+    
+    return interval, int(start_dt.timestamp()), int(end_dt.timestamp())
+
+
+def get_stock_price(symbol: str, date_str: str, time_str: Optional[str] = None, timeframe: str = "1d") -> Dict[str, Any]:
+    """
+    Get stock price at specific date using OHLCV candle logic.
+    Supports multiple timeframes with full historical data.
+    
+    Args:
+        symbol: Stock symbol (e.g., AAPL, RELIANCE.NS)
+        date_str: Date in YYYY-MM-DD format
+        time_str: Ignored for stocks (not used)
+        timeframe: Candle interval - 1d, 1wk, 1mo (default: 1d)
+    
+    Returns:
+        Dict with price data or error
+    """
+    providers = stock_providers(symbol, date_str, time_str, timeframe)
+    fallback = unadjusted_stock_provider(symbol, date_str, time_str, timeframe)
+    if len(providers) == 1 and fallback is None:
+        # Yahoo Finance only (supports all timeframes, no API key needed!)
+        return finish_stock_result(providers[0][1]())
+    
+    # Don't ask backup providers about dates nobody has data for
+    try:
+        dt = parse_lookup_time(date_str)
+    except ValueError as e:
+        return {"error": f"Invalid date format: {str(e)}"}
+    error = check_lookup_period(dt, date_str, timeframe)
+    if error:
+        return error
+    
+    if len(providers) == 1:
+        result = providers[0][1]()
+    else:
+        _, result = hedged_call(providers)
+    if "error" in result and fallback is not None:
+        result = unadjusted_fallback_result(result, fallback())
+    return finish_stock_result(normalize_stock_result(result))
+
+
+def stock_providers(symbol: str, date_str: str, time_str: Optional[str] = None,
+                    timeframe: str = "1d") -> List[Tuple[str, Any]]:
+    """
+    Providers that can answer a stock lookup, default (Yahoo Finance) first.
+    
+    Only providers whose answers agree are raced against each other: Yahoo
+    Finance and Finnhub daily candles are both split-adjusted, and both pick
+    the day with TimeIndex.trading_day. Finnhub only serves daily candles,
+    needs an API key, and is skipped when hedging is off (STOCKSCAN_HEDGE=0).
+    
+    Returns:
+        List of (name, call) pairs; each call returns a result dict
+    """
+    providers = [("yahoo", lambda: get_stock_price_yahoo(symbol, date_str, time_str, timeframe))]
+    if not HEDGE_ENABLED or timeframe != "1d":
+        return providers
+    if FINNHUB_API_KEY:
+        providers.append(("finnhub", lambda: get_stock_price_finnhub(symbol, date_str, time_str)))
+    return providers
+
+
+def unadjusted_stock_provider(symbol: str, date_str: str, time_str: Optional[str] = None,
+                              timeframe: str = "1d") -> Optional[Callable[[], Dict[str, Any]]]:
+    """
+    Alpha Vantage daily lookup, asked only after every provider from
+    stock_providers() failed: its free daily series is not adjusted for
+    splits, so racing it would make the price depend on which provider was
+    faster. None without a key, when hedging is off, or for other timeframes.
+    """
+    if not HEDGE_ENABLED or timeframe != "1d" or not os.getenv("ALPHAVANTAGE_API_KEY"):
+        return None
+    return lambda: get_stock_price_alphavantage(symbol, date_str, time_str)
+
+
+def unadjusted_fallback_result(error: Dict[str, Any], fallback: Dict[str, Any]) -> Dict[str, Any]:
+    """The Alpha Vantage answer marked as unadjusted, or the original error if it failed too"""
+    if "error" in fallback:
+        return error
+    fallback = dict(fallback)
+    note = "Alpha Vantage prices are as traded, not adjusted for later splits."
+    fallback["note"] = f"{fallback['note']} {note}" if fallback.get("note") else note
+    return fallback
+
+
+def normalize_stock_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Give a Finnhub or Alpha Vantage daily result the fields of a Yahoo Finance result"""
+    if "error" in result or "candle_date" not in result:
+        return result
+    result = dict(result)
+    candle_date = result.pop("candle_date")
+    result["candle_start_date"] = candle_date
+    result["candle_end_date"] = None
+    result["missing_days"] = None
+    closed_note = f"Market was closed on {result['requested_date']}. Showing closest trading day."
+    if candle_date != result["requested_date"] and closed_note not in result.get("note", ""):
+        result["note"] = f"{closed_note} {result['note']}" if result.get("note") else closed_note
+    return result
+
+
+def finish_stock_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Pass results and known lookup errors through, add a hint to other errors"""
+    if "error" not in result:
+        return result
+    
+    # Pass through specific error messages
+    error_msg = result["error"]
+    if any(phrase in error_msg for phrase in [
+        "has not completed yet",
+        "may not have existed",
+        "No data found",
+        "No trading data",
+        "Incomplete data",
+        "No price data",
+        "Future price data"
+    ]):
+        return result
+    
+    # If Yahoo Finance failed for other reasons, return the original error with context
+    return {
+        "error": result["error"] + "\n\nPlease check the symbol and date, or try a different timeframe."
+    }
+
+
+def stock_price_from_candles(symbol: str, dt: datetime, date_str: str, timeframe: str,
+                             rows: List[tuple]) -> Dict[str, Any]:
+    """
+    Build the Yahoo Finance stock result from the candles yahoo_candle_range asked for.
+    
+    Args:
+        symbol: Stock symbol (e.g., AAPL)
+        dt: Requested date
+        date_str: Requested date as given (YYYY-MM-DD)
+        timeframe: Requested timeframe - 1d, 1wk, 1mo
+        rows: (open_time, open, high, low, close, volume, close_time) rows in ms
+    
+    Returns:
+        Dict with price data or error
+    """
+    if not rows:
+        return {"error": f"No data found for symbol {symbol}.\nThe stock/commodity may not have existed at that time, or data is unavailable.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
+    
+    index = TimeIndex.from_rows(rows, scale=1000)
+    timestamps = index.starts
+    indicators = {
+        "open": [row[1] for row in rows],
+        "high": [row[2] for row in rows],
+        "low": [row[3] for row in rows],
+        "close": [row[4] for row in rows],
+        "volume": [row[5] for row in rows]
+    }
+    
+    # Find the data for our target period
+    if timeframe in ["1wk", "1mo"]:
+        # For weekly/monthly, aggregate daily data into one candle
+        if not timestamps or len(timestamps) == 0:
+            return {"error": "No price data available for this period"}
+        
+        # Calculate the end date for the period (inclusive)
+        if timeframe == "1wk":
+            period_end_date = (dt + timedelta(days=6)).date()  # 7 days total (day 0 to day 6)
+        else:  # 1mo
+            period_end_date = (dt + timedelta(days=29)).date()  # 30 days total (day 0 to day 29)
+        
+        # Only the daily candles from the requested date through the period end date (inclusive)
+        filtered_indices = index.day_range(dt.date(), period_end_date)
+        
+        if not filtered_indices:
+            return {"error": "No trading data available for the requested period.\nThe stock/commodity may not have existed at that time, or data is unavailable."}
+        
+        # Aggregate only the filtered daily candles
+        opens = [indicators["open"][i] for i in filtered_indices if indicators["open"][i] is not None]
+        highs = [indicators["high"][i] for i in filtered_indices if indicators["high"][i] is not None]
+        lows = [indicators["low"][i] for i in filtered_indices if indicators["low"][i] is not None]
+        closes = [indicators["close"][i] for i in filtered_indices if indicators["close"][i] is not None]
+        volumes = [indicators["volume"][i] for i in filtered_indices if indicators["volume"][i] is not None]
+        
+        if not opens or not closes:
+            return {"error": "Incomplete data for this period.\nThe stock/commodity may not have existed at that time, or data is unavailable."}
+        
+        # Create aggregated candle
+        open_price = opens[0]  # First open
+        high_price = max(highs)  # Highest high
+        low_price = min(lows)  # Lowest low
+        close_price = closes[-1]  # Last close
+        volume = sum(volumes)  # Total volume
+        
+        # Show the FULL requested period (not just trading days)
+        # This shows the complete 7-day or 30-day period
+        candle_start_date = dt.strftime("%Y-%m-%d")
+        if timeframe == "1wk":
+            candle_end_date = (dt + timedelta(days=6)).strftime("%Y-%m-%d")
+            expected_period_days = 7
+        else:  # 1mo
+            candle_end_date = (dt + timedelta(days=29)).strftime("%Y-%m-%d")
+            expected_period_days = 30
+        
+        # Calculate missing days (holidays/weekends)
+        trading_days = len(filtered_indices)
+        missing_days = expected_period_days - trading_days
+        
+        # Store missing days info for display
+        if missing_days > 0:
+            result_missing_days = missing_days
+        else:
+            result_missing_days = None
+    else:
+        # Daily - the requested day, else the last trading day before it
+        day_start, day_end = local_day_bounds(dt.date())
+        closest_idx = index.trading_day(day_start, day_end, day_start - DAILY_LOOKBACK_DAYS * 86400)
+        if closest_idx is None:
+            return {"error": f"No trading data available for {date_str} or the week before.\nThe stock/commodity may not have existed at that time, or data is unavailable."}
+        
+        candle_start_date = datetime.fromtimestamp(timestamps[closest_idx]).strftime("%Y-%m-%d")
+        candle_end_date = None  # Not used for daily
+        result_missing_days = None  # Not used for daily
+        
+        open_price = indicators["open"][closest_idx]
+        high_price = indicators["high"][closest_idx]
+        low_price = indicators["low"][closest_idx]
+        close_price = indicators["close"][closest_idx]
+        volume = indicators["volume"][closest_idx]
+    
+    # Check for None values
+    if None in [open_price, high_price, low_price, close_price, volume]:
+        return {"error": f"Incomplete data for {date_str}.\nMarket may have been closed, or the stock/commodity may not have existed at that time."}
+    
+    # Map timeframe to display name
+    timeframe_display = {
+        "1d": "Daily",
+        "1wk": "Weekly",
+        "1mo": "Monthly"
+    }
+    
+    result = {
+        "symbol": symbol,
+        "market": "Stocks (Yahoo Finance)",
+        "requested_date": date_str,
+        "candle_start_date": candle_start_date,
+        "candle_end_date": candle_end_date,
+        "timeframe": timeframe_display.get(timeframe, "Daily"),
+        "open": float(open_price),
+        "high": float(high_price),
+        "low": float(low_price),
+        "close": float(close_price),
+        "volume": float(volume),
+        "missing_days": result_missing_days
+    }
+    
+    # Add note if date was adjusted (only for daily)
+    if timeframe == "1d" and candle_start_date != date_str:
+        result["note"] = f"Market was closed on {date_str}. Showing closest trading day."
+    
+    return result
+
+
+def get_stock_price_yahoo(symbol: str, date_str: str, time_str: Optional[str] = None, timeframe: str = "1d") -> Dict[str, Any]:
+    """
+    Get stock price from Yahoo Finance (no API key needed!)
+    Supports multiple timeframes: 1d (daily), 1wk (weekly), 1mo (monthly)
+    """
+    try:
+        dt = parse_lookup_time(date_str)
+        error = check_lookup_period(dt, date_str, timeframe)
+        if error:
+            return error
+        
+        fetch_interval, period1, period2 = yahoo_candle_range(dt, timeframe)
+        
+        # Daily candles come from the local cache, only missing days hit Yahoo
+        rows = get_yahoo_candles(symbol, fetch_interval, period1, period2)
+        
+        return stock_price_from_candles(symbol, dt, date_str, timeframe, rows)
+    
+    except requests.exceptions.RequestException as e:
+        error_str = str(e)
+        if "400" in error_str or "Bad Request" in error_str:
+            return {"error": f"No data available for {symbol} on {date_str}.\nThe stock/commodity may not have existed at that time, or data is unavailable for this date range.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
+        return {"error": f"Failed to fetch from Yahoo Finance: {str(e)}"}
+    except (KeyError, IndexError, TypeError) as e:
+        return {"error": f"Error parsing Yahoo Finance data.\nThe stock/commodity may not have existed at that time, or data format is unexpected.\n\nNote: StockScan doesn't cover very small-cap stocks and very newly listed IPOs.\nPlease verify the symbol is correct and the company has sufficient trading history."}
+    except ValueError as e:
+        return {"error": f"Invalid date format: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Yahoo Finance error: {str(e)}"}
+
+
+def get_stock_price_alphavantage(symbol: str, date_str: str, time_str: Optional[str] = None) -> Dict[str, Any]:
+    """Get stock price from Alpha Vantage API"""
+    try:
+        # Parse date
+        dt = datetime.strptime(date_str, "%Y-%m-%d")
+        
+        # Check if future
+        if dt > datetime.now():
+            return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
+        
+        # The whole daily series is downloaded once and answered locally from then on
+        series = load_daily_series(ALPHAVANTAGE_BASE, symbol, ALPHAVANTAGE_API_KEY, date_str)
+        
+        # Find the exact date or the closest earlier one (market might be closed on requested date)
+        found = series.candle(date_str, (dt - timedelta(days=DAILY_LOOKBACK_DAYS)).strftime("%Y-%m-%d"))
+        if found is None:
+            if not series.full and series.dates and date_str < series.dates[0]:
+                return {"error": f"No data available for {date_str}. Alpha Vantage only sent data from {series.dates[0]} on."}
+            return {"error": f"No data available for {date_str}. Market may not have been open."}
+        candle_date, (open_price, high_price, low_price, close_price, volume) = found
+        
+        result = {
+            "symbol": symbol,
+            "market": "Stocks (Alpha Vantage)",
+            "requested_date": date_str,
+            "candle_date": candle_date,
+            "timeframe": "Daily",
+            "open": open_price,
+            "high": high_price,
+            "low": low_price,
+            "close": close_price,
+            "volume": volume
+        }
+        
+        # Add note if time was provided or date was adjusted
+        if time_str:
+            result["note"] = "Stocks use daily data on free tier. Time parameter ignored."
+        elif candle_date != date_str:
+            result["note"] = f"Market was closed on {date_str}. Showing closest trading day."
+        
+        return result
+    
+    except AlphaVantageError as e:
+        return {"error": str(e)}
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Failed to fetch from Alpha Vantage: {str(e)}"}
+    except ValueError as e:
+        return {"error": f"Invalid date format: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Alpha Vantage error: {str(e)}"}
+
+
+def get_stock_price_finnhub(symbol: str, date_str: str, time_str: Optional[str] = None) -> Dict[str, Any]:
+    """Get stock price from Finnhub API"""
+    if not FINNHUB_API_KEY:
+        return {"error": "FINNHUB_API_KEY not set."}
+    
+    try:
+        # Parse date
+        dt = datetime.strptime(date_str, "%Y-%m-%d")
+        
+        # Check if future
+        if dt > datetime.now():
+            return {"error": "Future price data does not exist.\nThe requested date is in the future. Please choose a date in the past."}
+        
+        # Convert to unix timestamp (start of day)
+        timestamp = int(dt.timestamp())
+        
+        # Fetch candle data (daily) - the same days Yahoo Finance is asked for
+        url = f"{FINNHUB_BASE}/stock/candle"
+        params = {
+            "symbol": symbol,
+            "resolution": "D",
+            "from": timestamp - (86400 * DAILY_LOOKBACK_DAYS),
+            "to": timestamp + 86400,
+            "token": FINNHUB_API_KEY
+        }
+        
+        response = http_get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get("s") != "ok" or not data.get("c"):
+            return {"error": "No data available for this date. Stock may not have existed yet."}
+        
+        # Daily candles are stamped 00:00 UTC of their trading day
+        days = [datetime.utcfromtimestamp(t).strftime("%Y-%m-%d") for t in data["t"]]
+        
+        # Find the candle for the target date, else the last trading day before it
+        next_day = (dt + timedelta(days=1)).strftime("%Y-%m-%d")
+        target_candle_idx = TimeIndex(days).trading_day(date_str, next_day)
+        
+        if target_candle_idx is None:
+            return {"error": "No data available for this date."}
+        
+        idx = target_candle_idx
+        candle_date = days[idx]
+        
+        result = {
+            "symbol": symbol,
+            "market": "Stocks (Finnhub)",
+            "requested_date": date_str,
+            "candle_date": candle_date,
+            "timeframe": "Daily",
+            "open": float(data["o"][idx]),
+            "high": float(data["h"][idx]),
+            "low": float(data["l"][idx]),
+            "close": float(data["c"][idx]),
+            "volume": float(data["v"][idx])
+        }
+        
+        # Add note if time was provided
+        if time_str:
+            result["note"] = "Stocks use daily data on free tier. Time parameter ignored."
+        
+        return result
+    
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Failed to fetch from Finnhub: {str(e)}"}
+    except ValueError as e:
+        return {"error": f"Invalid date format: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Finnhub error: {str(e)}"}
+
+
+def get_symbol_index(refresh: bool = False) -> SymbolIndex:
+    """Binance symbol index, downloaded at most once per SYMBOLS_TTL (see stockscan_symbols)"""
+    return load_symbol_index(f"{BINANCE_BASE}/exchangeInfo", refresh=refresh)
+
+
+def list_crypto_symbols(limit: Optional[int] = 50, quote: Optional[str] = "USDT",
+                        search: Optional[str] = None, refresh: bool = False) -> List[str]:
+    """
+    List tradable crypto symbols from Binance (served from the cached symbol index)
+    
+    Args:
+        limit: Max symbols returned (None for all)
+        quote: Only pairs with this quote asset (None for any)
+        search: Partial or misspelled symbol to look for (e.g., "eth", "SOLUSTD")
+        refresh: Download the symbol list even if the cached copy is fresh
+    """
+    try:
+        index = get_symbol_index(refresh=refresh)
+        if search:
+            return index.search(search, limit=limit or len(index.names), quote=quote)
+        return index.filter(quote=quote, limit=limit)
+    
+    except Exception as e:
+        print(f"{RED}Error fetching crypto symbols: {e}{RESET}")
+        return []
+
+
+def list_stock_symbols(limit: Optional[int] = 50) -> List[str]:
+    """List available stock symbols from Finnhub"""
+    if not FINNHUB_API_KEY:
+        print(f"{RED}FINNHUB_API_KEY not set. Get free key at: https://finnhub.io/register{RESET}")
+        return []
+    
+    try:
+        url = f"{FINNHUB_BASE}/stock/symbol"
+        params = {
+            "exchange": "US",
+            "token": FINNHUB_API_KEY
+        }
+        response = http_get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        symbols = [stock["symbol"] for stock in data if stock.get("symbol")]
+        return sorted(symbols)[:limit]
+    
+    except Exception as e:
+        print(f"{RED}Error fetching stock symbols: {e}{RESET}")
+        return []
+
+
+def get_live_crypto_price(symbol: str, stream_wait: float = 0.0) -> Dict[str, Any]:
+    """
+    Get current live price for crypto from Binance.
+
+    If the symbol is followed by the live price stream (see stockscan_stream),
+    the latest streamed trade is returned without a network request.
+
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        stream_wait: Seconds to wait for a first streamed trade before falling back to REST
+    """
+    symbol_error = check_symbol(symbol)
+    if symbol_error:
+        return {"error": f"Failed to fetch live price: {symbol_error}"}
+    streamed = streamed_price(symbol, wait=stream_wait)
+    if get_stream() is not None:
+        count_cache("stream", streamed is not None)
+    if streamed is not None:
+        return live_stream_result(symbol, streamed)
+    try:
+        url = f"{BINANCE_BASE}/ticker/price"
+        params = {"symbol": symbol}
+        
+        response = http_get(url, params=params)
+        response.raise_for_status()
+        return live_crypto_result(symbol, response.json())
+    except Exception as e:
+        return {"error": f"Failed to fetch live price: {str(e)}"}
+
+
+def live_crypto_result(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the live price result from a Binance /ticker/price response"""
+    return {
+        "symbol": symbol,
+        "price": float(data['price']),
+        "timestamp": datetime.now(),
+        "source": "Binance",
+        "delay_note": "The current price may have a 1-2 minute delay"
+    }
+
+
+def live_stream_result(symbol: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the live price result from a price stream entry"""
+    now = datetime.now()
+    age = max(now.timestamp() - entry["received"], 0.0)
+    trade_time = datetime.fromtimestamp(entry["trade_time"] / 1000) if entry.get("trade_time") else now
+    return {
+        "symbol": symbol,
+        "price": entry["price"],
+        "timestamp": trade_time,
+        "source": "Binance (live stream)",
+        "delay_note": f"Latest streamed trade, received {age:.1f}s ago"
+    }
+
+
+def get_live_stock_price(symbol: str) -> Dict[str, Any]:
+    """Get current live price for stock from Yahoo Finance"""
+    try:
+        url = f"{YAHOO_CHART_BASE}/{symbol}"
+        params = {"interval": "1m", "range": "1d"}
+        headers = {"User-Agent": "Mozilla/5.0"}
+        
+        response = http_get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return live_stock_result(symbol, response.json())
+    except Exception as e:
+        return {"error": f"Failed to fetch live price: {str(e)}"}
+
+
+def live_stock_result(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the live price result from a Yahoo Finance chart response"""
+    if "chart" not in data or "result" not in data["chart"]:
+        return {"error": "Invalid response from Yahoo Finance"}
+    
+    result = data["chart"]["result"]
+    if not result or len(result) == 0:
+        return {"error": f"No data found for symbol {symbol}"}
+    
+    quote = result[0]
+    meta = quote.get("meta", {})
+    
+    current_price = meta.get("regularMarketPrice") or meta.get("previousClose")
+    
+    if current_price is None:
+        return {"error": "Could not retrieve current price"}
+    
+    return {
+        "symbol": symbol,
+        "price": float(current_price),
+        "timestamp": datetime.now(),
+        "source": "Yahoo Finance",
+        "delay_note": "The current price may have a ~15 minute delay"
+    }
+
+
+
+def fetch_yahoo_export_columns(symbol: str, start_date: str, end_date: str, timeframe: str) -> Tuple[Dict[str, list], Any]:
+    """
+    Download stock/commodity candles with yfinance as typed columns.
+    
+    Args:
+        symbol: Stock or ETF symbol
+        start_date: First date (YYYY-MM-DD)
+        end_date: Date after the last one wanted (YYYY-MM-DD, exclusive)
+        timeframe: 1d, 1wk or 1mo
+    
+    Returns:
+        (columns, timezone of the exchange) - CSV timestamps stay in that timezone
+    """
+    import yfinance as yf
+    
+    # Map timeframe to yfinance interval
+    interval_map = {
+        '1d': '1d',
+        '1wk': '1wk',
+        '1mo': '1mo'
+    }
+    
+    # yfinance makes its own requests - hand it a session that goes through the limiter and metrics
+    ticker = yf.Ticker(symbol, session=yfinance_session())
+    df = ticker.history(start=start_date, end=end_date, interval=interval_map[timeframe])
+    
+    open_times = [int(index.timestamp() * 1000) for index in df.index]
+    columns = {
+        "open_time": open_times,
+        "open": [float(v) for v in df['Open']],
+        "high": [float(v) for v in df['High']],
+        "low": [float(v) for v in df['Low']],
+        "close": [float(v) for v in df['Close']],
+        "volume": [float(v) for v in df['Volume']],
+        "close_time": open_times
+    }
+    return columns, df.index.tz
+
+
@@ -10,10 +10,9 @@ Licensed under the MIT License
 """
 
 import sys
-import csv
 import os
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 
 try:
     import requests
@@ -22,6 +21,10 @@ except ImportError:
     print("Install it with: pip install requests")
     sys.exit(1)
 
+from stockscan_metrics import start_metrics_server, METRICS_PORT
+from stockscan_klines import iter_kline_pages, kline_rows, kline_columns, KLINES_WORKERS
+from stockscan_writers import StreamingCSVWriter, open_export_writer, has_checkpoint, available_formats, EXPORT_FORMATS
+
 # ANSI Color Codes
 PURPLE = '\033[95m'
 CYAN = '\033[96m'
@@ -60,7 +63,41 @@ def print_banner():
     print(banner)
 
 
-def fetch_crypto_bulk_data(symbol: str, start_date: str, end_date: str, timeframe: str = "1d") -> List[Dict[str, Any]]:
+def iter_crypto_bulk_pages(symbol: str, start_date: str, end_date: str, timeframe: str = "1d",
+                           workers: int = KLINES_WORKERS, after_ms: Optional[int] = None) -> Iterator[List[list]]:
+    """
+    Yield raw Binance kline pages for a date range, in order
+    
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        timeframe: Candle interval (1m, 5m, 15m, 1h, 1d, etc.)
+        workers: Parallel window requests (1 = sequential paging)
+        after_ms: Skip candles opening at or before this time (for resuming)
+    """
+    # Parse dates
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    
+    # Check if future
+    if start_dt > datetime.now() or end_dt > datetime.now():
+        raise ValueError("Cannot fetch future data")
+    
+    # Convert to milliseconds
+    start_ms = int(start_dt.timestamp() * 1000)
+    end_ms = int(end_dt.timestamp() * 1000)
+    if after_ms is not None:
+        start_ms = max(start_ms, after_ms + 1)
+    
+    # Fetch data from Binance (1000-candle windows fetched in parallel)
+    url = f"{BINANCE_BASE}/klines"
+    
+    yield from iter_kline_pages(url, symbol, timeframe, start_ms, end_ms, workers=workers)
+
+
+def fetch_crypto_bulk_data(symbol: str, start_date: str, end_date: str, timeframe: str = "1d",
+                           workers: int = KLINES_WORKERS) -> List[Dict[str, Any]]:
     """
     Fetch bulk crypto data from Binance for a date range
     
@@ -69,65 +106,18 @@ def fetch_crypto_bulk_data(symbol: str, start_date: str, end_date: str, timefram
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         timeframe: Candle interval (1m, 5m, 15m, 1h, 1d, etc.)
+        workers: Parallel window requests (1 = sequential paging)
     
     Returns:
         List of candle data dictionaries
     """
     try:
-        # Parse dates
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        
-        # Check if future
-        if start_dt > datetime.now() or end_dt > datetime.now():
-            return {"error": "Cannot fetch future data"}
-        
-        # Convert to milliseconds
-        start_ms = int(start_dt.timestamp() * 1000)
-        end_ms = int(end_dt.timestamp() * 1000)
-        
-        # Fetch data from Binance
-        url = f"{BINANCE_BASE}/klines"
-        params = {
-            "symbol": symbol,
-            "interval": timeframe,
-            "startTime": start_ms,
-            "endTime": end_ms,
-            "limit": 1000  # Max limit per request
-        }
-        
         all_data = []
         
         print(f"{CYAN}Fetching data for {symbol} from {start_date} to {end_date}...{RESET}")
         
-        while True:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                break
-            
-            # Process each candle
-            for candle in data:
-                candle_data = {
-                    "timestamp": datetime.fromtimestamp(candle[0] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-                    "open": float(candle[1]),
-                    "high": float(candle[2]),
-                    "low": float(candle[3]),
-                    "close": float(candle[4]),
-                    "volume": float(candle[5]),
-                    "close_time": datetime.fromtimestamp(candle[6] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-                }
-                all_data.append(candle_data)
-            
-            # Check if we got all data
-            if len(data) < 1000:
-                break
-            
-            # Update start time for next batch
-            params["startTime"] = data[-1][0] + 1
-            
+        for data in iter_crypto_bulk_pages(symbol, start_date, end_date, timeframe, workers):
+            all_data.extend(kline_rows(data))
             print(f"{GREEN}Fetched {len(all_data)} candles...{RESET}")
         
         print(f"{GREEN}✓ Total: {len(all_data)} candles fetched{RESET}\n")
@@ -135,10 +125,82 @@ def fetch_crypto_bulk_data(symbol: str, start_date: str, end_date: str, timefram
     
     except requests.exceptions.RequestException as e:
         return {"error": f"Failed to fetch data: {str(e)}"}
+    except ValueError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Unexpected error: {str(e)}"}
 
 
+def export_crypto_bulk_file(symbol: str, start_date: str, end_date: str, timeframe: str,
+                            filename: str, fmt: str = "csv", workers: int = KLINES_WORKERS) -> Optional[str]:
+    """
+    Stream bulk crypto data from Binance straight into an export file
+    
+    Each page is written to disk as soon as it arrives, so memory stays at
+    one page regardless of the date range. The file appears under its final
+    name only after the last page has been written. If a previous run of the
+    same CSV export was interrupted, it continues from the last saved candle.
+    
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        timeframe: Candle interval (1m, 5m, 15m, 1h, 1d, etc.)
+        filename: Output filename (inside exports/)
+        fmt: Output format - csv, parquet, arrow, or npz (default: csv)
+        workers: Parallel window requests (1 = sequential paging)
+    
+    Returns:
+        Path of the exported file, or None on error / no data
+    """
+    filepath = os.path.join("exports", filename)
+    
+    try:
+        print(f"{CYAN}Fetching data for {symbol} from {start_date} to {end_date}...{RESET}")
+        
+        resume_key = {"symbol": symbol, "timeframe": timeframe, "start_date": start_date, "end_date": end_date}
+        
+        with open_export_writer(filepath, fmt, resume_key=resume_key) as writer:
+            if writer.resume_after is not None:
+                print(f"{YELLOW}↻ Resuming previous export: {writer.rows_written} candles already saved{RESET}")
+            
+            for data in iter_crypto_bulk_pages(symbol, start_date, end_date, timeframe, workers,
+                                               after_ms=writer.resume_after):
+                writer.write_page(kline_columns(data))
+                print(f"{GREEN}Fetched {writer.rows_written} candles...{RESET}")
+        
+        if not writer.rows_written:
+            print(f"{RED}✗ No data found{RESET}")
+            return None
+        
+        print(f"{GREEN}✓ Total: {writer.rows_written} candles fetched{RESET}\n")
+        print(f"{GREEN}✓ Data exported successfully!{RESET}")
+        print(f"{CYAN}File:{RESET} {filepath}")
+        print(f"{CYAN}Rows:{RESET} {writer.rows_written}")
+        print(f"{CYAN}Symbol:{RESET} {symbol}")
+        print(f"{CYAN}Timeframe:{RESET} {timeframe}\n")
+        
+        return filepath
+    
+    except requests.exceptions.RequestException as e:
+        print(f"{RED}✗ Error: Failed to fetch data: {str(e)}{RESET}")
+        _print_resume_hint(filepath)
+        return None
+    except Exception as e:
+        print(f"{RED}✗ Error: {str(e)}{RESET}")
+        _print_resume_hint(filepath)
+        return None
+    except KeyboardInterrupt:
+        _print_resume_hint(filepath)
+        raise
+
+
+def _print_resume_hint(filepath: str):
+    """Tell the user an interrupted export can be continued"""
+    if has_checkpoint(filepath):
+        print(f"{YELLOW}ℹ Progress was saved. Run the same export again to resume where it stopped.{RESET}")
+
+
 def export_to_csv(data: List[Dict[str, Any]], filename: str, symbol: str, timeframe: str):
     """
     Export data to CSV file
@@ -150,17 +212,10 @@ def export_to_csv(data: List[Dict[str, Any]], filename: str, symbol: str, timefr
         timeframe: Timeframe used
     """
     try:
-        # Create exports directory if it doesn't exist
-        os.makedirs("exports", exist_ok=True)
-        
         filepath = os.path.join("exports", filename)
         
-        with open(filepath, 'w', newline='') as csvfile:
-            fieldnames = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            writer.writerows(data)
+        with StreamingCSVWriter(filepath) as writer:
+            writer.write_rows(data)
         
         print(f"{GREEN}✓ Data exported successfully!{RESET}")
         print(f"{CYAN}File:{RESET} {filepath}")
@@ -232,23 +287,39 @@ def interactive_mode():
         
         timeframe = timeframe_map[tf_choice]
         
-        # Fetch data
-        print(f"\n{CYAN}{'─' * 70}{RESET}\n")
-        data = fetch_crypto_bulk_data(symbol, start_date, end_date, timeframe)
+        # Get output format
+        available = available_formats()
+        print(f"\n{CYAN}Output formats:{RESET}")
+        print(f"  {GREEN}[1]{RESET}  CSV      (default)")
+        print(f"  {GREEN}[2]{RESET}  Parquet  (needs pyarrow)")
+        print(f"  {GREEN}[3]{RESET}  Arrow    (needs pyarrow)")
+        print(f"  {GREEN}[4]{RESET}  NumPy    (needs numpy)\n")
+        
+        format_map = {
+            '': 'csv',
+            '1': 'csv',
+            '2': 'parquet',
+            '3': 'arrow',
+            '4': 'npz'
+        }
         
-        if isinstance(data, dict) and "error" in data:
-            print(f"{RED}✗ Error: {data['error']}{RESET}")
+        fmt_choice = input(f"{CYAN}Select format (1-4, Enter for CSV):{RESET} ").strip()
+        if fmt_choice not in format_map:
+            print(f"{RED}⚠ Invalid choice!{RESET}")
             continue
         
-        if not data:
-            print(f"{RED}✗ No data found{RESET}")
+        fmt = format_map[fmt_choice]
+        if fmt not in available:
+            print(f"{RED}⚠ This format needs an extra library: pip install {'numpy' if fmt == 'npz' else 'pyarrow'}{RESET}")
             continue
         
         # Generate filename
-        filename = f"{symbol}_{timeframe}_{start_date}_to_{end_date}.csv"
+        filename = f"{symbol}_{timeframe}_{start_date}_to_{end_date}.{EXPORT_FORMATS[fmt]}"
         
-        # Export to CSV
-        export_to_csv(data, filename, symbol, timeframe)
+        # Fetch data and stream it to the export file
+        print(f"\n{CYAN}{'─' * 70}{RESET}\n")
+        if not export_crypto_bulk_file(symbol, start_date, end_date, timeframe, filename, fmt):
+            continue
         
         # Ask if user wants to export more
         print(f"{CYAN}{'─' * 70}{RESET}")
@@ -260,6 +331,8 @@ def interactive_mode():
 
 def main():
     """Main entry point"""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
     if len(sys.argv) == 1:
         interactive_mode()
     else:
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+StockScan Hedged Requests - Ask a backup provider when the first one is slow
+A lookup that several providers can answer goes to the one that has been
+fastest and most reliable lately. If it has not answered within the latency
+budget (or fails), the next provider is asked as well, and the first valid
+answer wins. A slow or throttled provider then costs at most the budget
+instead of its full timeout.
+
+Every finished call - including ones whose answer arrived too late to be
+used - updates the provider's moving average of latency and failure rate,
+which decides the order for the next lookup. hedged_call_async does the
+same for asyncio lookups (stockscan_async).
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import perf_counter
+from typing import Optional, Dict, Any, Callable, Awaitable, List, Tuple
+
+from stockscan_metrics import count_hedged
+
+# Hedging configuration (override with environment variables)
+# STOCKSCAN_HEDGE: 0 to always ask only the default provider
+# STOCKSCAN_HEDGE_BUDGET: seconds to wait for a provider before asking the next one
+HEDGE_ENABLED = os.getenv("STOCKSCAN_HEDGE", "1").lower() not in ("0", "false", "no", "off")
+HEDGE_BUDGET = float(os.getenv("STOCKSCAN_HEDGE_BUDGET", "1.0"))
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+# Seconds a provider's score is worse per unit of failure rate (a failing provider
+# is ranked behind a slow one)
+FAILURE_PENALTY = 5.0
+# Calls that can run at once (hedged calls keep running after the lookup is answered)
+HEDGE_WORKERS = 16
+
+Provider = Tuple[str, Callable[[], Dict[str, Any]]]
+AsyncProvider = Tuple[str, Callable[[], Awaitable[Dict[str, Any]]]]
+
+
+class ProviderStats:
+    """
+    Moving averages of latency and failure rate per provider.
+
+    Providers without samples keep the position they were given, behind
+    every provider that has a score.
+    """
+
+    def __init__(self, alpha: float = EWMA_ALPHA):
+        self.alpha = alpha
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, ok: bool):
+        """Add one finished call"""
+        failed = 0.0 if ok else 1.0
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                self._stats[name] = {"latency": seconds, "failure_rate": failed, "calls": 1}
+                return
+            entry["latency"] += self.alpha * (seconds - entry["latency"])
+            entry["failure_rate"] += self.alpha * (failed - entry["failure_rate"])
+            entry["calls"] += 1
+
+    def score(self, name: str) -> Optional[float]:
+        """Expected cost of asking a provider in seconds (lower is better), None if never asked"""
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                return None
+            return entry["latency"] + FAILURE_PENALTY * entry["failure_rate"]
+
+    def rank(self, names: List[str]) -> List[str]:
+        """Provider names best first"""
+        scores = {name: self.score(name) for name in names}
+        return sorted(names, key=lambda name: (scores[name] is None, scores[name] or 0.0))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_stats = ProviderStats()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_provider_stats() -> ProviderStats:
+    """The shared process-wide provider statistics"""
+    return _stats
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="stockscan-hedge")
+    return _executor
+
+
+def _is_valid(result: Dict[str, Any]) -> bool:
+    return "error" not in result
+
+
+def hedged_call(providers: List[Provider], budget: float = HEDGE_BUDGET,
+                stats: Optional[ProviderStats] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Ask providers in order of their recent performance, starting the next one
+    whenever the running ones are slower than the budget or have failed.
+
+    Args:
+        providers: (name, call) pairs in default order; each call returns a
+            result dict, with an "error" key if it failed
+        budget: Seconds to wait before also asking the next provider
+        stats: Statistics to rank by and update (default: the shared ones)
+
+    Returns:
+        (provider name, result) - the first valid result, or the default
+        (first listed) provider's error if none of them answered
+    """
+    stats = stats or _stats
+    calls = dict(providers)
+    order = stats.rank([name for name, _ in providers])
+
+    def timed(name):
+        started = perf_counter()
+        try:
+            result = calls[name]()
+        except Exception as e:
+            result = {"error": f"{name} error: {str(e)}"}
+        stats.record(name, perf_counter() - started, _is_valid(result))
+        return result
+
+    executor = _get_executor()
+    running = {}
+    results = {}
+    waiting = list(order)
+    while waiting or running:
+        if waiting:
+            name = waiting.pop(0)
+            running[executor.submit(timed, name)] = name
+        while running:
+            # With another provider left, only wait for the budget
+            done, _ = wait(list(running), timeout=budget if waiting else None, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if _is_valid(results[name]):
+                    count_hedged(name, len(results) + len(running) > 1)
+                    return name, results[name]
+            if waiting:
+                # A provider failed - ask the next one right away
+                break
+
+    count_hedged("none", len(results) > 1)
+    default = providers[0][0]
+    return default, results[default]
+
+
+async def hedged_call_async(providers: List[AsyncProvider], budget: float = HEDGE_BUDGET,
+                            stats: Optional[ProviderStats] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    asyncio version of hedged_call: the providers are coroutine functions and
+    run as tasks on the event loop (same ranking, budget and statistics).
+
+    Returns:
+        (provider name, result) - the first valid result, or the default
+        (first listed) provider's error if none of them answered
+    """
+    stats = stats or _stats
+    calls = dict(providers)
+    order = stats.rank([name for name, _ in providers])
+
+    async def timed(name):
+        started = perf_counter()
+        try:
+            result = await calls[name]()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = {"error": f"{name} error: {str(e)}"}
+        stats.record(name, perf_counter() - started, _is_valid(result))
+        return result
+
+    running = {}
+    results = {}
+    waiting = list(order)
+    while waiting or running:
+        if waiting:
+            name = waiting.pop(0)
+            running[asyncio.ensure_future(timed(name))] = name
+        while running:
+            done, _ = await asyncio.wait(list(running), timeout=budget if waiting else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                name = running.pop(task)
+                results[name] = task.result()
+                if _is_valid(results[name]):
+                    count_hedged(name, len(results) + len(running) > 1)
+                    return name, results[name]
+            if waiting:
+                break
+
+    count_hedged("none", len(results) > 1)
+    default = providers[0][0]
+    return default, results[default]
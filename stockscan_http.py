@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+StockScan HTTP Client - Shared pooled connections for all market data calls
+Keeps one keep-alive connection pool per upstream host (Binance, Yahoo Finance,
+Finnhub, Alpha Vantage) so repeated lookups skip the TCP+TLS handshake, and
+sends every request through the host's rate limiter. Latency, size and
+status of each request are recorded in stockscan_metrics.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Callable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from stockscan_ratelimit import get_limiter, RateLimited
+from stockscan_metrics import observe_request
+
+# Pool configuration (override with environment variables)
+DEFAULT_POOL_SIZE = int(os.getenv("STOCKSCAN_POOL_SIZE", "10"))
+DEFAULT_TIMEOUT = float(os.getenv("STOCKSCAN_HTTP_TIMEOUT", "10"))
+
+
+class RateLimitError(requests.exceptions.RequestException):
+    """A host asked us to wait longer than STOCKSCAN_MAX_RETRY_WAIT"""
+
+
+class HTTPClient:
+    """
+    Process-wide HTTP client with one keep-alive session per host.
+
+    Args:
+        pool_size: Max connections kept open per host
+        timeout: Default request timeout in seconds
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._sessions = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def _session_for(self, host_key: str) -> requests.Session:
+        """Return (and lazily create) the pooled session for a host"""
+        with self._lock:
+            session = self._sessions.get(host_key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host_key] = session
+                self._requests[host_key] = 0
+            self._requests[host_key] += 1
+            return session
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> requests.Response:
+        """
+        Send a GET request through the host's pooled session.
+        
+        The request waits for the host's rate limit budget first, and a
+        429/418 answer is retried after Retry-After (see stockscan_ratelimit).
+        
+        Raises:
+            RateLimitError: If the host asked us to wait too long
+        """
+        parts = urlsplit(url)
+        session = self._session_for(f"{parts.scheme}://{parts.netloc}")
+        return limited_request(url, params, lambda: session.get(
+            url, params=params, headers=headers, timeout=timeout if timeout is not None else self.timeout))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connection reuse counts per host.
+
+        Returns:
+            Dict of host -> {"requests", "connections", "reused"}
+        """
+        stats = {}
+        with self._lock:
+            for host_key, session in self._sessions.items():
+                connections = 0
+                for adapter in set(session.adapters.values()):
+                    pools = adapter.poolmanager.pools
+                    for pool_key in pools.keys():
+                        pool = pools[pool_key]
+                        connections += getattr(pool, "num_connections", 0)
+                requests_sent = self._requests[host_key]
+                stats[host_key] = {
+                    "requests": requests_sent,
+                    "connections": connections,
+                    "reused": max(requests_sent - connections, 0)
+                }
+        return stats
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._requests.clear()
+
+
+def limited_request(url: str, params: Optional[Dict[str, Any]], send: Callable[[], Any]) -> Any:
+    """
+    Run one request through the host's rate limiter and record its metrics.
+
+    Args:
+        url: Request URL (picks the host's limiter)
+        params: Query parameters (some endpoints cost more with certain ones)
+        send: Sends the request and returns the response
+
+    Raises:
+        RateLimitError: If the host asked us to wait too long
+    """
+    parts = urlsplit(url)
+    limiter = get_limiter(parts.hostname or parts.netloc)
+    
+    attempt = 0
+    while True:
+        try:
+            wait = limiter.reserve(parts.path, params)
+        except RateLimited as e:
+            raise RateLimitError(str(e))
+        if wait:
+            time.sleep(wait)
+        
+        started = time.perf_counter()
+        try:
+            response = send()
+        except Exception as e:
+            observe_request(limiter.host, parts.path, time.perf_counter() - started, type(e).__name__)
+            raise
+        observe_request(limiter.host, parts.path, time.perf_counter() - started,
+                        response.status_code, len(response.content))
+        limiter.record(response.status_code, response.headers)
+        
+        delay = limiter.retry_delay(response.status_code, response.headers, attempt)
+        if delay is None:
+            return response
+        response.close()
+        attempt += 1
+        time.sleep(delay)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """Return the shared process-wide client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient()
+    return _client
+
+
+def configure(pool_size: Optional[int] = None, timeout: Optional[float] = None) -> HTTPClient:
+    """
+    Replace the shared client with one using new pool settings.
+
+    Args:
+        pool_size: Max connections kept open per host
+        timeout: Default request timeout in seconds
+
+    Returns:
+        The new shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HTTPClient(
+            pool_size=pool_size if pool_size is not None else DEFAULT_POOL_SIZE,
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT
+        )
+    return _client
+
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None,
+             headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> requests.Response:
+    """GET through the shared pooled client (drop-in for requests.get)"""
+    return get_client().get(url, params=params, headers=headers, timeout=timeout)
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """Connection reuse counts per host for the shared client"""
+    return get_client().stats()
+
+
+def instrument_session(session):
+    """
+    Send every request of a session made by a third-party library (yfinance)
+    through the rate limiter and the metrics, like http_get does.
+
+    Works with requests and curl_cffi sessions: both route get() and
+    friends through session.request().
+    """
+    send = session.request
+
+    def request(method, url, **kwargs):
+        return limited_request(url, kwargs.get("params"), lambda: send(method, url, **kwargs))
+
+    session.request = request
+    return session
+
+
+_yfinance_session = None
+
+
+def yfinance_session():
+    """
+    The instrumented session handed to yfinance, created on first use.
+
+    yfinance 0.2.55+ only accepts curl_cffi sessions (it depends on
+    curl_cffi), older versions take a requests session.
+    """
+    global _yfinance_session
+    with _client_lock:
+        if _yfinance_session is None:
+            try:
+                from curl_cffi import requests as curl_requests
+                session = curl_requests.Session(impersonate="chrome")
+            except ImportError:
+                session = requests.Session()
+            _yfinance_session = instrument_session(session)
+    return _yfinance_session
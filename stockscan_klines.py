@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+StockScan Klines - Binance candle pagination shared by lookups and exports
+Splits a known time range into 1000-candle windows and fetches them
+concurrently through a bounded worker pool, yielding pages in order.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Any
+
+from stockscan_http import http_get
+from stockscan_writers import CSV_FIELDS, NUMPY_AVAILABLE, as_list, format_times
+
+# Fixed candle lengths in milliseconds (1M is calendar based, so it is paged sequentially)
+INTERVAL_MS = {
+    "1s": 1000,
+    "1m": 60000,
+    "3m": 180000,
+    "5m": 300000,
+    "15m": 900000,
+    "30m": 1800000,
+    "1h": 3600000,
+    "2h": 7200000,
+    "4h": 14400000,
+    "6h": 21600000,
+    "8h": 28800000,
+    "12h": 43200000,
+    "1d": 86400000,
+    "3d": 259200000,
+    "1w": 604800000
+}
+
+# Binance limit: max 1000 candles per /klines call
+KLINES_PAGE_LIMIT = 1000
+
+# Parallel window requests (override with STOCKSCAN_KLINES_WORKERS, 1 = sequential paging)
+# Request weight is budgeted per host by stockscan_ratelimit
+KLINES_WORKERS = int(os.getenv("STOCKSCAN_KLINES_WORKERS", "4"))
+
+
+def fetch_kline_page(url: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                     limit: int = KLINES_PAGE_LIMIT) -> List[list]:
+    """Fetch one raw /klines page with open times in [start_ms, end_ms]"""
+    params = {
+        "symbol": symbol,
+        "interval": interval,
+        "startTime": start_ms,
+        "endTime": end_ms,
+        "limit": limit
+    }
+    response = http_get(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def _iter_sequential(url: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> Iterator[List[list]]:
+    """Page through /klines one request at a time"""
+    while start_ms <= end_ms:
+        data = fetch_kline_page(url, symbol, interval, start_ms, end_ms)
+        if not data:
+            break
+        yield data
+        if len(data) < KLINES_PAGE_LIMIT:
+            break
+        start_ms = data[-1][0] + 1
+
+
+def kline_windows(interval: str, start_ms: int, end_ms: int) -> List[tuple]:
+    """Split [start_ms, end_ms] into inclusive windows of at most 1000 candles"""
+    span = INTERVAL_MS[interval] * KLINES_PAGE_LIMIT
+    return [(s, min(s + span - 1, end_ms)) for s in range(start_ms, end_ms + 1, span)]
+
+
+def iter_kline_pages(url: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                     workers: int = KLINES_WORKERS) -> Iterator[List[list]]:
+    """
+    Yield raw /klines pages covering [start_ms, end_ms] in open-time order.
+
+    With workers > 1 the range is split into 1000-candle windows that are
+    fetched concurrently (at most `workers` in flight, a few more queued)
+    and reassembled in order with duplicate candles removed.
+
+    Args:
+        url: Binance /klines endpoint
+        symbol: Trading pair (e.g., BTCUSDT)
+        interval: Kline interval (e.g., 1m, 1h)
+        start_ms: First open time to include (epoch ms)
+        end_ms: Last open time to include (epoch ms)
+        workers: Max concurrent requests (1 = sequential paging)
+    """
+    if workers <= 1 or interval not in INTERVAL_MS:
+        yield from _iter_sequential(url, symbol, interval, start_ms, end_ms)
+        return
+
+    windows = kline_windows(interval, start_ms, end_ms)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = []
+    last_open = None
+    try:
+        next_window = 0
+        while next_window < len(windows) or pending:
+            # Keep a bounded number of windows queued ahead of the one we yield
+            while next_window < len(windows) and len(pending) < workers * 2:
+                w_start, w_end = windows[next_window]
+                pending.append(executor.submit(fetch_kline_page, url, symbol, interval, w_start, w_end))
+                next_window += 1
+
+            data = pending.pop(0).result()
+            if last_open is not None:
+                data = [c for c in data if c[0] > last_open]
+            if data:
+                last_open = data[-1][0]
+                yield data
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def fetch_klines(url: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                 workers: int = KLINES_WORKERS) -> List[list]:
+    """Fetch every raw kline in [start_ms, end_ms] as one ordered list"""
+    candles = []
+    for page in iter_kline_pages(url, symbol, interval, start_ms, end_ms, workers=workers):
+        candles.extend(page)
+    return candles
+
+
+def _decode_lists(cols: List[tuple]) -> Dict[str, list]:
+    """Typed columns as plain lists from a transposed page"""
+    return {
+        "open_time": list(cols[0]),
+        "open": list(map(float, cols[1])),
+        "high": list(map(float, cols[2])),
+        "low": list(map(float, cols[3])),
+        "close": list(map(float, cols[4])),
+        "volume": list(map(float, cols[5])),
+        "close_time": list(cols[6])
+    }
+
+
+def kline_columns(page: List[list]) -> Dict[str, Any]:
+    """
+    Decode a raw /klines page into typed columns in one pass.
+
+    The page is transposed once and each column converted in bulk, instead
+    of building a dict per candle. Returns numpy arrays (int64 epoch ms
+    times, float64 OHLCV) when numpy is installed, else plain lists.
+    """
+    if not page:
+        return _decode_lists([()] * 7)
+
+    cols = list(zip(*page))
+    if not NUMPY_AVAILABLE:
+        return _decode_lists(cols)
+
+    import numpy as np
+    prices = np.array(cols[1:6], dtype=np.float64)
+    return {
+        "open_time": np.array(cols[0], dtype=np.int64),
+        "open": prices[0],
+        "high": prices[1],
+        "low": prices[2],
+        "close": prices[3],
+        "volume": prices[4],
+        "close_time": np.array(cols[6], dtype=np.int64)
+    }
+
+
+def kline_tuples(page: List[list]) -> List[tuple]:
+    """
+    Decode a raw /klines page into (open_time, o, h, l, c, v, close_time) rows.
+    Pure Python, so price lookups never have to import numpy.
+    """
+    if not page:
+        return []
+    columns = _decode_lists(list(zip(*page)))
+    return list(zip(columns["open_time"], columns["open"], columns["high"], columns["low"],
+                    columns["close"], columns["volume"], columns["close_time"]))
+
+
+def kline_rows(page: List[list]) -> List[Dict[str, Any]]:
+    """Convert a raw /klines page into export rows (local-time timestamps)"""
+    columns = kline_columns(page)
+    return [
+        dict(zip(CSV_FIELDS, row))
+        for row in zip(
+            format_times(columns["open_time"]),
+            as_list(columns["open"]), as_list(columns["high"]), as_list(columns["low"]),
+            as_list(columns["close"]), as_list(columns["volume"]),
+            format_times(columns["close_time"])
+        )
+    ]
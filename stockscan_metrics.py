@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+StockScan Metrics - Counters and latency histograms for upstream calls
+Every request to Binance, Yahoo Finance, Finnhub and Alpha Vantage records
+its latency, response size and status here. The rate limiter adds the
+retries and waits it imposes, and each cache layer adds its hits and
+misses. The numbers are rendered in the Prometheus text exposition format
+and can be:
+
+  - written to a file when the process exits (STOCKSCAN_METRICS_FILE)
+  - served at http://localhost:<port>/metrics while StockScan runs
+    (STOCKSCAN_METRICS_PORT)
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import atexit
+import os
+import threading
+from typing import Optional, Tuple
+
+# Metrics configuration (override with environment variables)
+# STOCKSCAN_METRICS_FILE: write all metrics to this file on exit
+# STOCKSCAN_METRICS_PORT: serve /metrics on this local port
+METRICS_FILE = os.getenv("STOCKSCAN_METRICS_FILE")
+METRICS_PORT = int(os.getenv("STOCKSCAN_METRICS_PORT", "0"))
+
+# Latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help text)
+METRICS = {
+    "stockscan_upstream_request_duration_seconds":
+        ("histogram", "Time from sending an upstream request to having its full response"),
+    "stockscan_upstream_requests_total":
+        ("counter", "Upstream requests by HTTP status (or exception name when no response arrived)"),
+    "stockscan_upstream_response_bytes_total":
+        ("counter", "Response body bytes received from upstream"),
+    "stockscan_upstream_retries_total":
+        ("counter", "Requests retried after a 429/418 answer"),
+    "stockscan_ratelimit_waits_total":
+        ("counter", "Requests held back by the local rate limiter"),
+    "stockscan_ratelimit_wait_seconds_total":
+        ("counter", "Seconds requests were held back by the local rate limiter"),
+    "stockscan_ratelimit_rejections_total":
+        ("counter", "Requests refused because the host asked us to wait too long"),
+    "stockscan_cache_requests_total":
+        ("counter", "Cache lookups by cache layer and result (hit or miss)"),
+    "stockscan_provider_answers_total":
+        ("counter", "Stock lookups by the provider that answered, and whether a backup provider was asked"),
+    "stockscan_server_request_duration_seconds":
+        ("histogram", "Time to answer a request to the stockscan serve API"),
+    "stockscan_server_requests_total":
+        ("counter", "Requests to the stockscan serve API by route and HTTP status"),
+    "stockscan_server_coalesced_total":
+        ("counter", "API requests answered by joining an identical request already in flight"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def endpoint_label(path: str) -> str:
+    """URL path without per-symbol parts, so each endpoint is one time series"""
+    for marker in ("/chart/", "/quote/"):
+        if marker in path:
+            return path.split(marker, 1)[0] + marker + "{symbol}"
+    return path.rstrip("/") or "/"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """
+    Thread-safe in-process metric registry.
+
+    Args:
+        buckets: Upper bounds of the histogram buckets (seconds)
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        """Add value to a counter"""
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        """Record one histogram sample"""
+        key = (name, labels)
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def value(self, name: str, **labels) -> float:
+        """Current counter value (0 if never incremented)"""
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(e[0]), e[1], e[2]) for key, e in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if kind == "histogram":
+                series = sorted((labels, data) for (n, labels), data in histograms.items() if n == name)
+            else:
+                series = sorted((labels, value) for (n, labels), value in counters.items() if n == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, data in series:
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(data)}")
+                    continue
+                counts, total, count = data
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {repr(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The shared process-wide registry"""
+    return _metrics
+
+
+def observe_request(host: str, path: str, seconds: float, status: str, nbytes: Optional[int] = None):
+    """
+    Record one finished upstream request.
+
+    Args:
+        host: Host name (e.g., api.binance.com)
+        path: URL path (symbols are folded out, see endpoint_label)
+        seconds: Latency
+        status: HTTP status code, or the exception name if the request failed
+        nbytes: Response body size
+    """
+    labels = (("endpoint", endpoint_label(path)), ("host", host))
+    _metrics.observe("stockscan_upstream_request_duration_seconds", seconds, labels)
+    _metrics.inc("stockscan_upstream_requests_total", labels + (("status", str(status)),))
+    if nbytes:
+        _metrics.inc("stockscan_upstream_response_bytes_total", labels, nbytes)
+
+
+def count_retry(host: str):
+    _metrics.inc("stockscan_upstream_retries_total", (("host", host),))
+
+
+def record_rate_limit_wait(host: str, seconds: float):
+    labels = (("host", host),)
+    _metrics.inc("stockscan_ratelimit_waits_total", labels)
+    _metrics.inc("stockscan_ratelimit_wait_seconds_total", labels, seconds)
+
+
+def count_rate_limit_rejection(host: str):
+    _metrics.inc("stockscan_ratelimit_rejections_total", (("host", host),))
+
+
+def count_cache(cache: str, hit: bool):
+    """Record a lookup in a cache layer (candles, symbols, stream, ...)"""
+    _metrics.inc("stockscan_cache_requests_total", (("cache", cache), ("result", "hit" if hit else "miss")))
+
+
+def count_hedged(provider: str, hedged: bool):
+    """Record which provider answered a multi-provider lookup ("none" if all failed)"""
+    _metrics.inc("stockscan_provider_answers_total", (("hedged", "yes" if hedged else "no"), ("provider", provider)))
+
+
+def observe_server_request(route: str, status: int, seconds: float):
+    """Record one request answered by the serve API"""
+    labels = (("route", route),)
+    _metrics.observe("stockscan_server_request_duration_seconds", seconds, labels)
+    _metrics.inc("stockscan_server_requests_total", labels + (("status", str(status)),))
+
+
+def count_coalesced(route: str):
+    _metrics.inc("stockscan_server_coalesced_total", (("route", route),))
+
+
+def render() -> str:
+    """Shared metrics in the Prometheus text exposition format"""
+    return _metrics.render()
+
+
+def dump(path: str):
+    """Atomically write the shared metrics to a file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+def _dump_on_exit():
+    try:
+        dump(METRICS_FILE)
+    except OSError:
+        pass
+
+
+if METRICS_FILE:
+    atexit.register(_dump_on_exit)
+
+
+_server = None
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """
+    Serve the shared metrics at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        The HTTP server (already serving); calling again returns the same one
+    """
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="stockscan-metrics", daemon=True).start()
+    return _server
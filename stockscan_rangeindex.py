@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+StockScan Range Index - OHLCV of any window of a stored 1m series in O(1)
+An intraday lookup that starts at an arbitrary minute is answered by
+aggregating every 1-minute candle of its window. When the 1m candles of a
+span are already stored locally, RangeIndex answers such windows without
+walking them: volume comes from prefix sums, high and low from sparse tables
+(the max/min of every power-of-two run of candles, so any window is the
+overlap of two runs), and open/close from a bisect on the open times.
+
+Building an index costs O(n log n) once; each window after that is a bisect
+plus a few table reads, however long it is. aggregate_many() answers a whole
+array of windows in a handful of vectorized steps when numpy is installed,
+so millions of ad-hoc windows over one series are cheap.
+
+Indexes built with get_range_index() are kept in memory (the most recently
+used RANGE_INDEX_MAX of them), and intraday crypto lookups that fall inside
+one are answered from it instead of from the candle cache. A lookup that
+finds no index in memory but whose window is covered by 1m candles already in
+the candle cache indexes those (the UTC days around the window, nothing is
+downloaded), so later lookups on the same days are answered in O(1) as well.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Sequence, Tuple
+
+from stockscan_cache import get_store
+from stockscan_metrics import count_cache
+from stockscan_writers import NUMPY_AVAILABLE
+
+# Range index configuration (override with environment variables)
+# STOCKSCAN_RANGE_INDEX: 0 to never answer lookups from a range index
+# STOCKSCAN_RANGE_INDEX_MAX: indexes kept in memory (a month of 1m candles takes about 12 MB)
+RANGE_INDEX_ENABLED = os.getenv("STOCKSCAN_RANGE_INDEX", "1").lower() not in ("0", "false", "no", "off")
+RANGE_INDEX_MAX = int(os.getenv("STOCKSCAN_RANGE_INDEX_MAX", "8"))
+
+MINUTE_MS = 60000
+DAY_MS = 86400000
+
+# (open_time, open, high, low, close, volume, close_time) - same layout as the candle cache
+Candle = Tuple[int, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float], int]
+
+
+def _sparse_table(values: list, pick) -> List[list]:
+    """Level k holds pick() of values[i:i + 2**k] for every i (pure-Python tables)"""
+    levels = [values]
+    width = 1
+    while width * 2 <= len(values):
+        prev = levels[-1]
+        levels.append([pick(a, b) for a, b in zip(prev, prev[width:])])
+        width *= 2
+    return levels
+
+
+def _sparse_array(values, reduce):
+    """numpy version of _sparse_table: one (levels, n) array, unused tail cells left as they are"""
+    import numpy as np
+
+    n = len(values)
+    table = np.empty((max(n.bit_length(), 1), n), dtype=float)
+    table[0] = values
+    width = 1
+    for k in range(1, len(table)):
+        table[k] = table[k - 1]
+        reduce(table[k - 1][:n - width], table[k - 1][width:], out=table[k][:n - width])
+        width *= 2
+    return table
+
+
+class RangeIndex:
+    """
+    Range queries over one symbol's stored candles.
+
+    Args:
+        rows: Candle rows sorted by open time
+        start_ms: Start of the span the rows cover completely (default: first open time)
+        end_ms: End (exclusive) of that span (default: last close time + 1)
+    """
+
+    def __init__(self, rows: Sequence[Candle], start_ms: Optional[int] = None, end_ms: Optional[int] = None):
+        self.times = [row[0] for row in rows]
+        self.close_times = [row[6] for row in rows]
+        self.opens = [row[1] for row in rows]
+        self.closes = [row[4] for row in rows]
+        self.start_ms = start_ms if start_ms is not None else (self.times[0] if rows else 0)
+        self.end_ms = end_ms if end_ms is not None else (self.close_times[-1] + 1 if rows else 0)
+
+        # Missing values never win a max/min and add nothing to the volume
+        highs = [float("-inf") if row[2] is None else float(row[2]) for row in rows]
+        lows = [float("inf") if row[3] is None else float(row[3]) for row in rows]
+        volumes = [0.0 if row[5] is None else float(row[5]) for row in rows]
+
+        if NUMPY_AVAILABLE and rows:
+            import numpy as np
+
+            self._times = np.array(self.times, dtype=np.int64)
+            self._volume = np.concatenate(([0.0], np.cumsum(volumes)))
+            self._highs = _sparse_array(np.array(highs), np.maximum)
+            self._lows = _sparse_array(np.array(lows), np.minimum)
+        else:
+            self._times = None
+            self._volume = [0.0]
+            for volume in volumes:
+                self._volume.append(self._volume[-1] + volume)
+            self._highs = _sparse_table(highs, max)
+            self._lows = _sparse_table(lows, min)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def covers(self, start_ms: int, end_ms: int) -> bool:
+        """True if every candle of [start_ms, end_ms) is in the index"""
+        return self.start_ms <= start_ms and end_ms <= self.end_ms
+
+    def bounds(self, start_ms: int, end_ms: int) -> Tuple[int, int]:
+        """[i, j) positions of the candles opening in [start_ms, end_ms)"""
+        return bisect.bisect_left(self.times, start_ms), bisect.bisect_left(self.times, end_ms)
+
+    def high(self, i: int, j: int) -> Optional[float]:
+        """Highest high of candles i..j-1 (j > i)"""
+        k = (j - i).bit_length() - 1
+        value = max(self._highs[k][i], self._highs[k][j - (1 << k)])
+        return None if value == float("-inf") else float(value)
+
+    def low(self, i: int, j: int) -> Optional[float]:
+        """Lowest low of candles i..j-1 (j > i)"""
+        k = (j - i).bit_length() - 1
+        value = min(self._lows[k][i], self._lows[k][j - (1 << k)])
+        return None if value == float("inf") else float(value)
+
+    def volume(self, i: int, j: int) -> float:
+        """Total volume of candles i..j-1"""
+        return float(self._volume[j] - self._volume[i])
+
+    def aggregate(self, start_ms: int, end_ms: int) -> Optional[Candle]:
+        """
+        One candle made of every candle opening in [start_ms, end_ms).
+
+        Returns:
+            (open_time, open, high, low, close, volume, close_time) of the
+            first to the last candle in the window, or None if it has none
+        """
+        i, j = self.bounds(start_ms, end_ms)
+        if i >= j:
+            return None
+        return (self.times[i], self.opens[i], self.high(i, j), self.low(i, j),
+                self.closes[j - 1], self.volume(i, j), self.close_times[j - 1])
+
+    def aggregate_many(self, starts: Sequence[int], window_ms: int) -> List[Optional[Candle]]:
+        """
+        aggregate(start, start + window_ms) for every start, vectorized with numpy if installed.
+
+        Returns:
+            One candle (or None for an empty window) per start, in order
+        """
+        if self._times is None:
+            return [self.aggregate(start, start + window_ms) for start in starts]
+        import numpy as np
+
+        starts = np.asarray(starts, dtype=np.int64)
+        first = np.searchsorted(self._times, starts, side="left")
+        last = np.searchsorted(self._times, starts + window_ms, side="left")
+        filled = last > first
+        i, j = first[filled], last[filled]
+        # floor(log2(length)) is frexp's exponent minus one, exactly for integer lengths
+        k = np.frexp((j - i).astype(float))[1] - 1
+        run_end = j - np.left_shift(1, k)
+        highs = np.maximum(self._highs[k, i], self._highs[k, run_end])
+        lows = np.minimum(self._lows[k, i], self._lows[k, run_end])
+        volumes = self._volume[j] - self._volume[i]
+
+        candles = [None] * len(starts)
+        for n, a, b, high, low, volume in zip(np.flatnonzero(filled).tolist(), i.tolist(), j.tolist(),
+                                              highs.tolist(), lows.tolist(), volumes.tolist()):
+            candles[n] = (self.times[a], self.opens[a], None if high == float("-inf") else high,
+                          None if low == float("inf") else low, self.closes[b - 1], volume,
+                          self.close_times[b - 1])
+        return candles
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def find_range_index(symbol: str, start_ms: int, end_ms: int) -> Optional[RangeIndex]:
+    """A range index in memory that covers [start_ms, end_ms) of a symbol, or None"""
+    symbol = symbol.upper()
+    with _indexes_lock:
+        for key, index in _indexes.items():
+            if key[0] == symbol and index.covers(start_ms, end_ms):
+                _indexes.move_to_end(key)
+                return index
+    return None
+
+
+def get_range_index(symbol: str, start_ms: int, end_ms: int) -> RangeIndex:
+    """
+    Index a symbol's Binance 1m candles over [start_ms, end_ms), reusing one
+    in memory that already covers it. Missing candles are downloaded into the
+    candle cache first.
+
+    Candles that have not closed yet are left out, so an index reaching into
+    the current minute covers only up to it.
+
+    Raises:
+        requests.exceptions.RequestException: If a download failed
+    """
+    symbol = symbol.upper()
+    index = find_range_index(symbol, start_ms, end_ms)
+    if index is not None:
+        return index
+
+    # stockscan_core imports this module for its lookups
+    from stockscan_core import get_binance_klines
+
+    rows = get_binance_klines(symbol, "1m", start_ms, end_ms - 1)
+    now_ms = int(time.time() * 1000)
+    covered_end = min(end_ms, now_ms - now_ms % MINUTE_MS)
+    index = RangeIndex([row for row in rows if row[0] < covered_end and row[6] < now_ms],
+                       start_ms, covered_end)
+
+    _remember(symbol, index)
+    return index
+
+
+def _remember(symbol: str, index: RangeIndex):
+    """Keep an index in memory, dropping the least recently used beyond RANGE_INDEX_MAX"""
+    with _indexes_lock:
+        _indexes[(symbol, index.start_ms, index.end_ms)] = index
+        while len(_indexes) > max(RANGE_INDEX_MAX, 1):
+            _indexes.popitem(last=False)
+
+
+def stored_range_index(symbol: str, start_ms: int, end_ms: int) -> Optional[RangeIndex]:
+    """
+    Index the 1m candles of the UTC days around [start_ms, end_ms) that are
+    already in the candle cache, if they cover the whole window; None (and
+    no download) otherwise. The index is kept in memory like get_range_index's.
+    """
+    symbol = symbol.upper()
+    store = get_store()
+    for cov_start, cov_end in store.covered("binance", symbol, "1m"):
+        if cov_start <= start_ms and end_ms - 1 <= cov_end:
+            break
+    else:
+        return None
+
+    # Whole days, as far as they are stored and closed
+    now_ms = int(time.time() * 1000)
+    span_start = max(start_ms - start_ms % DAY_MS, cov_start)
+    span_end = min(end_ms - 1 - (end_ms - 1) % DAY_MS + DAY_MS, cov_end + 1, now_ms - now_ms % MINUTE_MS)
+    if span_end < end_ms:
+        return None
+    rows = store.get("binance", symbol, "1m", span_start, span_end - 1)
+    index = RangeIndex([row for row in rows if row[6] < now_ms], span_start, span_end)
+    _remember(symbol, index)
+    return index
+
+
+def window_aggregates(symbol: str, starts: Sequence[int], window_ms: int) -> List[Optional[Candle]]:
+    """
+    OHLCV of [start, start + window_ms) for every start, from one range index.
+
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        starts: Window start times (epoch ms, any order)
+        window_ms: Window length in ms
+
+    Returns:
+        One candle (or None for a window without candles) per start, in order
+    """
+    if len(starts) == 0:
+        return []
+    index = get_range_index(symbol, int(min(starts)), int(max(starts)) + window_ms)
+    return index.aggregate_many(starts, window_ms)
+
+
+def cached_aggregate(symbol: str, start_ms: int, end_ms: int) -> Optional[Candle]:
+    """
+    The aggregated candle of [start_ms, end_ms) if a range index in memory
+    covers it or one can be built from stored 1m candles, else None (the
+    caller falls back to the candle cache). Reads the candle cache, so async
+    callers run it on an executor.
+    """
+    if not RANGE_INDEX_ENABLED:
+        return None
+    index = find_range_index(symbol, start_ms, end_ms)
+    if index is None:
+        index = stored_range_index(symbol, start_ms, end_ms)
+    candle = index.aggregate(start_ms, end_ms) if index is not None else None
+    count_cache("rangeindex", candle is not None)
+    return candle
+
+
+def clear_range_indexes():
+    """Drop every range index kept in memory"""
+    with _indexes_lock:
+        _indexes.clear()
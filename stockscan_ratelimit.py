@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+StockScan Rate Limiter - Per-host request budgets shared by every caller
+Each upstream host gets a token bucket sized to what it tolerates, so
+parallel exports, batch lookups and async lookups together never burst past
+the provider's limit. Binance requests are priced by endpoint weight and the
+X-MBX-USED-WEIGHT-* response headers make us pause before the server limit
+is reached. HTTP 429/418 answers are retried after Retry-After (or an
+exponential backoff) plus random jitter.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Mapping
+
+from stockscan_metrics import count_retry, record_rate_limit_wait, count_rate_limit_rejection
+
+# Limiter configuration (override with environment variables)
+# STOCKSCAN_BINANCE_WEIGHT_BUDGET: request weight per minute we allow ourselves
+#   (Binance bans above 6000/min per IP, the default leaves headroom for other tools)
+# STOCKSCAN_YAHOO_RATE: Yahoo Finance requests per second
+# STOCKSCAN_HTTP_RETRIES: retries after a 429/418 answer
+# STOCKSCAN_MAX_RETRY_WAIT: longest wait (seconds) we accept before giving up
+BINANCE_WEIGHT_BUDGET = int(os.getenv("STOCKSCAN_BINANCE_WEIGHT_BUDGET", "3000"))
+YAHOO_RATE = float(os.getenv("STOCKSCAN_YAHOO_RATE", "5"))
+HTTP_RETRIES = int(os.getenv("STOCKSCAN_HTTP_RETRIES", "3"))
+MAX_RETRY_WAIT = float(os.getenv("STOCKSCAN_MAX_RETRY_WAIT", "60"))
+
+# Binance's own limit per IP and the share of it at which we stop until the window resets
+BINANCE_WEIGHT_LIMIT = 6000
+BINANCE_BACKOFF_FRACTION = 0.9
+
+# Binance request weight per endpoint (spot API, any "limit" up to 1000)
+BINANCE_ENDPOINT_WEIGHTS = {
+    "/api/v3/klines": 2,
+    "/api/v3/ticker/price": 2,
+    "/api/v3/ticker/24hr": 2,
+    "/api/v3/exchangeInfo": 20
+}
+
+# Statuses that mean "slow down": 429 = rate limited, 418 = IP banned after ignoring 429s
+RETRY_STATUSES = (429, 418)
+
+# Backoff when the server gives no Retry-After
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+
+class RateLimited(Exception):
+    """Raised when a host asks us to wait longer than MAX_RETRY_WAIT"""
+
+    def __init__(self, host: str, wait: float):
+        super().__init__(f"{host} is rate limiting requests, try again in {math.ceil(wait)} seconds")
+        self.host = host
+        self.wait = wait
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations.
+
+    reserve() always succeeds and returns how long the caller must wait
+    before sending, so waiters are served in order and the long-run rate
+    never exceeds `rate` tokens per second.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Max tokens saved up for a burst
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost: float = 1) -> float:
+        """Take `cost` tokens and return the seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= cost
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class HostLimiter:
+    """
+    Request budget and back-off state of one upstream host.
+
+    Args:
+        host: Host name (e.g., api.binance.com)
+        rate: Tokens per second (None = no budget, only 429/418 handling)
+        burst: Bucket capacity in tokens
+        weights: Optional path -> token cost table (default cost 1)
+        weight_headers: Read Binance X-MBX-USED-WEIGHT-* headers
+    """
+
+    def __init__(self, host: str, rate: Optional[float] = None, burst: float = 1,
+                 weights: Optional[Dict[str, int]] = None, weight_headers: bool = False):
+        self.host = host
+        self.bucket = TokenBucket(rate, max(burst, 1)) if rate else None
+        self.weights = weights or {}
+        self.weight_headers = weight_headers
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def cost(self, path: str, params: Optional[Mapping[str, Any]] = None) -> int:
+        """Token cost of a request"""
+        weight = self.weights.get(path.rstrip("/"), 1)
+        if path.endswith("/ticker/price") and not (params and "symbol" in params):
+            # Several or all symbols at once cost double
+            weight *= 2
+        return weight
+
+    def _block(self, seconds: float):
+        """Hold back every request to this host for `seconds`"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def reserve(self, path: str, params: Optional[Mapping[str, Any]] = None) -> float:
+        """
+        Reserve budget for one request.
+
+        Returns:
+            Seconds to wait before sending it
+
+        Raises:
+            RateLimited: If the host asked us to wait longer than MAX_RETRY_WAIT
+        """
+        with self._lock:
+            blocked = self._blocked_until - time.monotonic()
+        if blocked > MAX_RETRY_WAIT:
+            count_rate_limit_rejection(self.host)
+            raise RateLimited(self.host, blocked)
+        wait = self.bucket.reserve(self.cost(path, params)) if self.bucket else 0.0
+        wait = max(wait, blocked, 0.0)
+        if wait:
+            record_rate_limit_wait(self.host, wait)
+        return wait
+
+    def record(self, status: int, headers: Mapping[str, str]):
+        """Learn from a response: server-side weight usage and Retry-After"""
+        if self.weight_headers:
+            for name, value in headers.items():
+                if not name.lower().startswith("x-mbx-used-weight-") or not name.lower().endswith("1m"):
+                    continue
+                try:
+                    used = int(value)
+                except ValueError:
+                    continue
+                if used >= BINANCE_WEIGHT_LIMIT * BINANCE_BACKOFF_FRACTION:
+                    # Close to the ban threshold (other tools share our IP) - wait for the next minute
+                    self._block(60 - time.time() % 60 + random.uniform(0, 1))
+
+        if status in RETRY_STATUSES:
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            if retry_after is not None:
+                self._block(retry_after)
+
+    def retry_delay(self, status: int, headers: Mapping[str, str], attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a 429/418 answer, or None to give up.
+
+        Args:
+            status: HTTP status of the answer
+            headers: Its headers
+            attempt: Retries already made for this request
+        """
+        if status not in RETRY_STATUSES or attempt >= HTTP_RETRIES:
+            return None
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is None:
+            retry_after = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+        # Jitter so parallel callers do not all come back at the same moment
+        delay = retry_after + random.uniform(0, retry_after / 2 + 0.5)
+        if delay > MAX_RETRY_WAIT:
+            return None
+        count_retry(self.host)
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _default_limiter(host: str) -> HostLimiter:
+    """Budgets of the providers StockScan talks to"""
+    if host == "api.binance.com":
+        # Budget is per minute; allow a burst of a few seconds' worth
+        return HostLimiter(host, rate=BINANCE_WEIGHT_BUDGET / 60.0, burst=BINANCE_WEIGHT_BUDGET / 60.0 * 2,
+                           weights=BINANCE_ENDPOINT_WEIGHTS, weight_headers=True)
+    if host.endswith("finance.yahoo.com"):
+        return HostLimiter(host, rate=YAHOO_RATE, burst=YAHOO_RATE * 2)
+    if host == "finnhub.io":
+        # Free plan: 60 calls per minute
+        return HostLimiter(host, rate=1.0, burst=5)
+    if host == "www.alphavantage.co":
+        # Free plan: 5 calls per minute
+        return HostLimiter(host, rate=5 / 60.0, burst=5)
+    return HostLimiter(host)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(host: str) -> HostLimiter:
+    """Return the shared limiter of a host (e.g., "api.binance.com")"""
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                limiter = _limiters[host] = _default_limiter(host)
+    return limiter
+
+
+def set_limiter(host: str, limiter: HostLimiter):
+    """Replace the limiter of a host (e.g., for a mirror with other limits)"""
+    with _limiters_lock:
+        _limiters[host] = limiter
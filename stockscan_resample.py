@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+StockScan Resample - Build coarser candles from a finer base series
+One download of e.g. 1m candles is enough to produce 5m, 1h and 1d candles
+locally: open is the first open of the bucket, high the highest high, low
+the lowest low, close the last close and volume the sum. Buckets follow
+Binance's grid (fixed intervals counted from the Unix epoch, weeks starting
+Monday 00:00, calendar months) shifted by an optional anchor offset, e.g.
+daily candles that start at 08:00.
+
+Pages are pushed one at a time and only the still-open bucket is carried
+over, so resampling a multi-year 1s series uses little memory. With numpy
+installed each page is reduced in a few vectorized steps.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import csv
+import os
+import re
+from contextlib import ExitStack
+from datetime import datetime, timezone, tzinfo
+from typing import Optional, Dict, Any, List, Iterator
+
+from stockscan_klines import INTERVAL_MS, KLINES_PAGE_LIMIT
+from stockscan_writers import CANDLE_COLUMNS, NUMPY_AVAILABLE, as_list, open_export_writer
+
+DAY_MS = 86400000
+
+# Binance weeks open on Monday 00:00 UTC; 1970-01-05 was the first Monday after the epoch
+WEEK_ANCHOR_MS = 4 * DAY_MS
+
+# Yahoo Finance names for the same candles
+TIMEFRAME_ALIASES = {"1wk": "1w", "1mo": "1M"}
+
+# Units accepted in an anchor offset such as "8h", "-30m" or "5h30m"
+OFFSET_UNITS = {"s": 1000, "m": 60000, "h": 3600000, "d": DAY_MS}
+
+
+def timeframe_ms(timeframe: str) -> Optional[int]:
+    """Length of a fixed timeframe in ms, or None for calendar months"""
+    timeframe = TIMEFRAME_ALIASES.get(timeframe, timeframe)
+    if timeframe == "1M":
+        return None
+    if timeframe not in INTERVAL_MS:
+        raise ValueError(f"Unknown timeframe '{timeframe}'")
+    return INTERVAL_MS[timeframe]
+
+
+def parse_offset(text: Optional[str]) -> int:
+    """
+    Parse an anchor offset like "8h", "-30m" or "+5h30m" into milliseconds.
+
+    Raises:
+        ValueError: If the text is not a valid offset
+    """
+    text = (text or "").strip()
+    if text in ("", "0"):
+        return 0
+    match = re.fullmatch(r"([+-]?)((?:\d+[smhd])+)", text)
+    if not match:
+        raise ValueError(f"Invalid offset '{text}' (use e.g. 8h, -30m or 5h30m)")
+    total = sum(int(n) * OFFSET_UNITS[unit] for n, unit in re.findall(r"(\d+)([smhd])", match.group(2)))
+    return -total if match.group(1) == "-" else total
+
+
+def format_offset(offset_ms: int) -> str:
+    """Inverse of parse_offset ("" for no offset)"""
+    if not offset_ms:
+        return ""
+    sign = "-" if offset_ms < 0 else "+"
+    rest = abs(offset_ms)
+    parts = []
+    for unit in ("d", "h", "m", "s"):
+        count, rest = divmod(rest, OFFSET_UNITS[unit])
+        if count:
+            parts.append(f"{count}{unit}")
+    return sign + "".join(parts)
+
+
+def can_resample(base: str, target: str, offset_ms: int = 0) -> bool:
+    """True if every `target` candle (shifted by offset_ms) is a whole number of `base` candles"""
+    base_ms = timeframe_ms(base)
+    if base_ms is None or offset_ms % base_ms:
+        return False
+    target_ms = timeframe_ms(target)
+    if target_ms is None:
+        return DAY_MS % base_ms == 0
+    anchor = WEEK_ANCHOR_MS if target_ms == INTERVAL_MS["1w"] else 0
+    return target_ms % base_ms == 0 and anchor % base_ms == 0
+
+
+def base_timeframe(timeframes: List[str], native: List[str], offset_ms: int = 0) -> Optional[str]:
+    """
+    Pick the timeframe to download so every requested one can be built from it.
+
+    Args:
+        timeframes: Requested timeframes
+        native: Timeframes the provider serves, coarsest first
+        offset_ms: Anchor offset applied to the derived timeframes
+
+    Returns:
+        The coarsest native timeframe that works, or None
+    """
+    for base in native:
+        if base not in INTERVAL_MS or offset_ms % INTERVAL_MS[base]:
+            continue
+        if all(tf == base or can_resample(base, tf, offset_ms) for tf in timeframes):
+            return base
+    return None
+
+
+def _month_start_ms(local_ms: int, months_ahead: int = 0) -> int:
+    """Epoch ms of 00:00 on the 1st of the month containing local_ms (+ months_ahead)"""
+    day = datetime.fromtimestamp(local_ms / 1000, timezone.utc)
+    month = day.year * 12 + day.month - 1 + months_ahead
+    return int(datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def slice_columns(columns: Dict[str, Any], start: int, stop: Optional[int] = None) -> Dict[str, Any]:
+    """Rows [start:stop] of typed candle columns"""
+    return {name: values[start:stop] for name, values in columns.items()}
+
+
+def truncate_columns(columns: Dict[str, Any], last_open_ms: int) -> Dict[str, Any]:
+    """Drop the candles of a sorted page that open after last_open_ms"""
+    times = columns["open_time"]
+    if not len(times) or int(times[-1]) <= last_open_ms:
+        return columns
+    if NUMPY_AVAILABLE and hasattr(times, "dtype"):
+        import numpy as np
+        return slice_columns(columns, 0, int(np.searchsorted(times, last_open_ms, side="right")))
+    count = 0
+    while count < len(times) and times[count] <= last_open_ms:
+        count += 1
+    return slice_columns(columns, 0, count)
+
+
+def skip_columns(columns: Dict[str, Any], last_open_ms: int) -> Dict[str, Any]:
+    """Drop the candles of a sorted page that open at or before last_open_ms"""
+    times = columns["open_time"]
+    if not len(times) or int(times[0]) > last_open_ms:
+        return columns
+    if NUMPY_AVAILABLE and hasattr(times, "dtype"):
+        import numpy as np
+        return slice_columns(columns, int(np.searchsorted(times, last_open_ms, side="right")))
+    count = 0
+    while count < len(times) and times[count] <= last_open_ms:
+        count += 1
+    return slice_columns(columns, count)
+
+
+class Resampler:
+    """
+    Incrementally aggregate candle pages into a coarser timeframe.
+
+    Push pages of typed columns (see CANDLE_COLUMNS) in open-time order;
+    push() returns the candles completed so far and flush() the last one.
+    Each output candle opens at its bucket start and closes 1 ms before the
+    next bucket, like Binance candles.
+
+    Args:
+        timeframe: Target timeframe (e.g., 5m, 1h, 1d, 1w, 1M; 1wk/1mo also accepted)
+        offset_ms: Shift of the bucket grid, e.g. 8 hours for days starting at 08:00
+        tz: Timezone whose wall clock defines days, weeks and months (default: UTC)
+        start_ms: Drop candles opening before this time (a bucket cut by the range start)
+        end_ms: Drop candles opening after this time
+    """
+
+    def __init__(self, timeframe: str, offset_ms: int = 0, tz: Optional[tzinfo] = None,
+                 start_ms: Optional[int] = None, end_ms: Optional[int] = None):
+        self.timeframe = timeframe
+        self.size = timeframe_ms(timeframe)
+        self.anchor = WEEK_ANCHOR_MS if self.size == INTERVAL_MS["1w"] else 0
+        self.offset_ms = offset_ms
+        self.tz = tz
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        # Aggregate of the bucket still open: [open_time, o, h, l, c, v, close_time]
+        self._current = None
+
+    def _shift(self, ms: int) -> int:
+        """Difference between grid time and UTC at an instant"""
+        if self.tz is None:
+            return self.offset_ms
+        offset = datetime.fromtimestamp(ms / 1000, self.tz).utcoffset()
+        return self.offset_ms - int(offset.total_seconds() * 1000)
+
+    def bucket(self, open_ms: int) -> tuple:
+        """(open_time, close_time) of the bucket containing a base candle"""
+        shift = self._shift(open_ms)
+        local = open_ms - shift
+        if self.size is None:
+            return _month_start_ms(local) + shift, _month_start_ms(local, 1) + shift - 1
+        start = local - (local - self.anchor) % self.size
+        return start + shift, start + self.size + shift - 1
+
+    def _keep(self, open_ms: int) -> bool:
+        return ((self.start_ms is None or open_ms >= self.start_ms) and
+                (self.end_ms is None or open_ms <= self.end_ms))
+
+    def _push_lists(self, columns: Dict[str, Any]) -> Dict[str, list]:
+        """Pure Python aggregation, one candle at a time"""
+        out = {name: [] for name in CANDLE_COLUMNS}
+        current = self._current
+        for t, o, h, l, c, v in zip(as_list(columns["open_time"]), as_list(columns["open"]),
+                                    as_list(columns["high"]), as_list(columns["low"]),
+                                    as_list(columns["close"]), as_list(columns["volume"])):
+            if current is not None and current[0] <= t <= current[6]:
+                if h > current[2]:
+                    current[2] = h
+                if l < current[3]:
+                    current[3] = l
+                current[4] = c
+                current[5] += v
+                continue
+            if current is not None and self._keep(current[0]):
+                for name, value in zip(CANDLE_COLUMNS, current):
+                    out[name].append(value)
+            start, end = self.bucket(t)
+            current = [start, o, h, l, c, v, end]
+        self._current = current
+        return out
+
+    def _bucket_arrays(self, times):
+        """Bucket open and close times of a numpy open-time column (UTC grid)"""
+        import numpy as np
+        local = times - self.offset_ms
+        if self.size is None:
+            months = local.astype("datetime64[ms]").astype("datetime64[M]")
+            starts = months.astype("datetime64[ms]").astype(np.int64)
+            ends = (months + 1).astype("datetime64[ms]").astype(np.int64) - 1
+        else:
+            starts = local - (local - self.anchor) % self.size
+            ends = starts + self.size - 1
+        return starts + self.offset_ms, ends + self.offset_ms
+
+    def _push_arrays(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Vectorized aggregation: split the page at bucket changes and reduce each run"""
+        import numpy as np
+        arrays = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in CANDLE_COLUMNS.items()}
+        starts, ends = self._bucket_arrays(arrays["open_time"])
+        if self._current is not None:
+            # The open bucket goes in front as one pre-aggregated candle
+            carry = self._current
+            starts = np.concatenate(([carry[0]], starts))
+            ends = np.concatenate(([carry[6]], ends))
+            for i, name in enumerate(CANDLE_COLUMNS):
+                arrays[name] = np.concatenate((np.asarray([carry[i]], dtype=CANDLE_COLUMNS[name]), arrays[name]))
+
+        first = np.concatenate(([0], np.flatnonzero(starts[1:] != starts[:-1]) + 1))
+        last = np.concatenate((first[1:] - 1, [len(starts) - 1]))
+        out = {
+            "open_time": starts[first],
+            "open": arrays["open"][first],
+            "high": np.maximum.reduceat(arrays["high"], first),
+            "low": np.minimum.reduceat(arrays["low"], first),
+            "close": arrays["close"][last],
+            "volume": np.add.reduceat(arrays["volume"], first),
+            "close_time": ends[first]
+        }
+        self._current = [out[name][-1].item() for name in CANDLE_COLUMNS]
+        out = slice_columns(out, 0, -1)
+
+        keep = np.ones(len(out["open_time"]), dtype=bool)
+        if self.start_ms is not None:
+            keep &= out["open_time"] >= self.start_ms
+        if self.end_ms is not None:
+            keep &= out["open_time"] <= self.end_ms
+        if not keep.all():
+            out = {name: values[keep] for name, values in out.items()}
+        return out
+
+    def push(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a page of base candles.
+
+        Args:
+            columns: Typed candle columns (lists or numpy arrays), sorted by open time
+
+        Returns:
+            Candles completed by this page, as typed columns (possibly empty)
+        """
+        if not len(columns["open_time"]):
+            return {name: [] for name in CANDLE_COLUMNS}
+        if NUMPY_AVAILABLE and self.tz is None:
+            return self._push_arrays(columns)
+        return self._push_lists(columns)
+
+    def flush(self) -> Dict[str, list]:
+        """Return the last (possibly still open) candle and reset"""
+        current, self._current = self._current, None
+        if current is None or not self._keep(current[0]):
+            return {name: [] for name in CANDLE_COLUMNS}
+        return {name: [value] for name, value in zip(CANDLE_COLUMNS, current)}
+
+
+def resample_columns(columns: Dict[str, Any], timeframe: str, offset_ms: int = 0,
+                     tz: Optional[tzinfo] = None) -> Dict[str, list]:
+    """Resample a whole candle series at once (see Resampler)"""
+    resampler = Resampler(timeframe, offset_ms, tz)
+    done = resampler.push(columns)
+    tail = resampler.flush()
+    return {name: as_list(done[name]) + tail[name] for name in CANDLE_COLUMNS}
+
+
+def iter_export_pages(path: str, page_size: int = KLINES_PAGE_LIMIT * 10,
+                      tz: Optional[tzinfo] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read an export file back as pages of typed candle columns.
+
+    CSV timestamps are wall-clock strings, so they are read in tz (default:
+    local time, which is how crypto exports are written). Parquet, Arrow and
+    .npz files hold epoch-ms times and are read exactly.
+
+    Args:
+        path: Export file (.csv, .parquet, .arrow or .npz)
+        page_size: Candles per yielded page (CSV only)
+        tz: Timezone of CSV timestamps (default: local time)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        def to_ms(text):
+            moment = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+            if tz is not None:
+                moment = moment.replace(tzinfo=tz)
+            return int(moment.timestamp() * 1000)
+
+        with open(path, newline='') as f:
+            page = {name: [] for name in CANDLE_COLUMNS}
+            for row in csv.DictReader(f):
+                page["open_time"].append(to_ms(row["timestamp"]))
+                for name in ("open", "high", "low", "close", "volume"):
+                    page[name].append(float(row[name]))
+                page["close_time"].append(to_ms(row["close_time"]))
+                if len(page["open_time"]) >= page_size:
+                    yield page
+                    page = {name: [] for name in CANDLE_COLUMNS}
+            if page["open_time"]:
+                yield page
+    elif ext == ".npz":
+        import numpy as np
+        with np.load(path) as archive:
+            yield {name: archive[name] for name in CANDLE_COLUMNS}
+    elif ext in (".parquet", ".arrow"):
+        import pyarrow as pa
+        if ext == ".parquet":
+            import pyarrow.parquet as pq
+            batches = pq.ParquetFile(path).iter_batches()
+        else:
+            import pyarrow.ipc
+            reader = pyarrow.ipc.open_file(pa.memory_map(path))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for batch in batches:
+            yield {name: batch.column(name).to_numpy() for name in CANDLE_COLUMNS}
+    else:
+        raise ValueError(f"Cannot read '{path}' (expected .csv, .parquet, .arrow or .npz)")
+
+
+def detect_timeframe(path: str) -> Optional[str]:
+    """Guess the timeframe of an export file from the gap between its first candles"""
+    for page in iter_export_pages(path, page_size=100):
+        times = as_list(page["open_time"][:100])
+        gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+        if not gaps:
+            return None
+        smallest = min(gaps)
+        for name, length in INTERVAL_MS.items():
+            if length == smallest:
+                return name
+        return None
+    return None
+
+
+def resample_file(path: str, timeframes: List[str], offset_ms: int = 0, fmt: Optional[str] = None,
+                  output_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Resample a crypto export file into one or more coarser timeframes.
+
+    The input is read once and every timeframe is written in the same pass.
+    Output files are named like the input with the timeframe replaced
+    (BTCUSDT_1m_... -> BTCUSDT_1h_...), or "<name>_<timeframe>" otherwise.
+
+    Args:
+        path: Export file (.csv, .parquet, .arrow or .npz)
+        timeframes: Target timeframes
+        offset_ms: Anchor offset of the target candles
+        fmt: Output format (default: same as the input)
+        output_dir: Where to write (default: next to the input)
+
+    Returns:
+        Dict of timeframe -> written file path (timeframes without candles are left out)
+
+    Raises:
+        ValueError: If a timeframe cannot be built from the file's candles
+    """
+    base = detect_timeframe(path)
+    if base is None:
+        raise ValueError(f"Cannot tell the timeframe of '{path}' (it needs at least two candles)")
+    for timeframe in timeframes:
+        if not can_resample(base, timeframe, offset_ms):
+            raise ValueError(f"{timeframe}{format_offset(offset_ms)} candles cannot be built from {base} candles")
+
+    name, ext = os.path.splitext(os.path.basename(path))
+    fmt = fmt or ext.lstrip(".").lower()
+    output_dir = output_dir or os.path.dirname(path)
+    targets = {}
+    for timeframe in timeframes:
+        label = timeframe + format_offset(offset_ms)
+        if f"_{base}_" in name:
+            stem = name.replace(f"_{base}_", f"_{label}_", 1)
+        else:
+            stem = f"{name}_{label}"
+        targets[timeframe] = os.path.join(output_dir, f"{stem}.{fmt}")
+
+    resamplers = {timeframe: Resampler(timeframe, offset_ms) for timeframe in timeframes}
+    with ExitStack() as stack:
+        writers = {timeframe: stack.enter_context(open_export_writer(target, fmt))
+                   for timeframe, target in targets.items()}
+        for page in iter_export_pages(path):
+            for timeframe, resampler in resamplers.items():
+                writers[timeframe].write_page(resampler.push(page))
+        for timeframe, resampler in resamplers.items():
+            writers[timeframe].write_page(resampler.flush())
+
+    return {timeframe: target for timeframe, target in targets.items() if writers[timeframe].rows_written}
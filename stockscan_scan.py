@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+StockScan Scan - Biggest movers of a universe between two dates
+For every symbol (all trading USDT pairs, the commodity ETFs, or a list
+from a file) the daily candles from the start date through the end date are
+downloaded once, in parallel within the shared rate limits and through the
+candle cache. Both ends of the comparison come from that one series:
+
+  change %      end close vs start close
+  range %       highest high minus lowest low over the period, vs start close
+  volume ratio  end day volume / start day volume
+
+The metrics of all symbols are computed together on arrays (with numpy if
+it is installed) and the top N symbols in each direction are reported.
+
+Dates are UTC calendar days (Binance daily candles open at 00:00 UTC; a
+stock's daily candle opens on its own trading day in UTC as well).
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import calendar
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+
+import requests
+
+import stockscan_core
+from stockscan_core import CYAN, GREEN, RED, BOLD, DIM, RESET
+from stockscan_snapshot import SNAPSHOT_WORKERS
+from stockscan_symbols import check_symbol
+from stockscan_timeindex import TimeIndex
+from stockscan_writers import NUMPY_AVAILABLE
+
+DAY_MS = 86400000
+
+# A start/end candle further than this from the requested date means the
+# symbol was not trading then (listed later, delisted, suspended)
+MAX_EDGE_GAP_DAYS = 7
+
+SCAN_FIELDS = ['symbol', 'start_date', 'end_date', 'start_close', 'end_close', 'change_pct',
+               'high', 'low', 'range_pct', 'start_volume', 'end_volume', 'volume_ratio', 'error']
+
+# --by choice -> result field
+SCAN_METRICS = {"change": "change_pct", "range": "range_pct", "volume": "volume_ratio"}
+
+
+def utc_day_ms(date_str: str) -> int:
+    """00:00 UTC of a YYYY-MM-DD date in epoch ms"""
+    return calendar.timegm(datetime.strptime(date_str, "%Y-%m-%d").timetuple()) * 1000
+
+
+def fetch_daily(market: str, symbol: str, start_ms: int, end_ms: int) -> List[tuple]:
+    """
+    Daily candles opening from start_ms through the end of end_ms's day, through the candle cache.
+
+    Returns:
+        (open_time, open, high, low, close, volume, close_time) rows in ms
+    """
+    if market == "crypto":
+        return stockscan_core.get_binance_klines(symbol, "1d", start_ms, end_ms)
+    rows = stockscan_core.get_yahoo_candles(symbol, "1d", start_ms // 1000, (end_ms + DAY_MS) // 1000)
+    return [row for row in rows if row[0] < end_ms + DAY_MS]
+
+
+def fetch_universe(market: str, symbols: List[str], start_ms: int, end_ms: int,
+                   workers: int = SNAPSHOT_WORKERS) -> Tuple[Dict[str, List[tuple]], Dict[str, str]]:
+    """
+    Download every symbol's daily series, several at a time. A symbol that
+    fails for any reason gets an error message instead of aborting the scan.
+
+    Returns:
+        (symbol -> candle rows, symbol -> error message)
+    """
+    provider = "Binance" if market == "crypto" else "Yahoo Finance"
+    series = {}
+    errors = {}
+
+    def fetch(symbol):
+        if market == "crypto":
+            symbol_error = check_symbol(symbol)
+            if symbol_error:
+                raise ValueError(symbol_error)
+        return fetch_daily(market, symbol, start_ms, end_ms)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {symbol: executor.submit(fetch, symbol) for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                series[symbol] = future.result()
+            except requests.exceptions.RequestException as e:
+                errors[symbol] = f"Failed to fetch data from {provider}: {str(e)}"
+            except ValueError as e:
+                errors[symbol] = str(e)
+            except Exception as e:
+                # A malformed response for one symbol fails only its row
+                errors[symbol] = f"Unexpected {provider} response: {type(e).__name__}: {str(e)}"
+    return series, errors
+
+
+def _edges(rows: List[tuple], start_ms: int, end_ms: int) -> Tuple[Optional[int], Optional[int]]:
+    """Indices of the first candle on/after the start day and the last one on/before the end day"""
+    index = TimeIndex([row[0] for row in rows])
+    first = index.first_at_or_after(start_ms)
+    last = index.last_at_or_before(end_ms + DAY_MS - 1)
+    max_gap = MAX_EDGE_GAP_DAYS * DAY_MS
+    if first is None or rows[first][0] - start_ms > max_gap:
+        return None, None
+    if last is None or end_ms - rows[last][0] > max_gap or last < first:
+        return None, None
+    return first, last
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+def compute_scan(series: Dict[str, List[tuple]], start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+    """
+    Change, range and volume ratio of every series between two UTC days.
+
+    Returns:
+        One result dict per symbol (SCAN_FIELDS), with an "error" for
+        symbols without candles near both dates
+    """
+    results = []
+    picked = []
+    for symbol, rows in series.items():
+        first, last = _edges(rows, start_ms, end_ms) if rows else (None, None)
+        if first is None or None in (rows[first][4], rows[last][4]):
+            results.append({"symbol": symbol, "error": "No trading data near both dates"})
+            continue
+        picked.append((symbol, rows, first, last))
+
+    if not picked:
+        return results
+
+    if NUMPY_AVAILABLE:
+        import numpy as np
+
+        # One flat array of every picked candle; reduceat takes max/min per symbol in one call
+        window = [rows[first:last + 1] for _, rows, first, last in picked]
+        offsets = np.cumsum([0] + [len(w) for w in window[:-1]])
+        highs = np.array([row[2] for w in window for row in w], dtype=float)
+        lows = np.array([row[3] for w in window for row in w], dtype=float)
+        period_high = np.fmax.reduceat(highs, offsets)
+        period_low = np.fmin.reduceat(lows, offsets)
+
+        start_close = np.array([rows[first][4] for _, rows, first, _ in picked], dtype=float)
+        end_close = np.array([rows[last][4] for _, rows, _, last in picked], dtype=float)
+        start_volume = np.array([rows[first][5] or 0.0 for _, rows, first, _ in picked], dtype=float)
+        end_volume = np.array([rows[last][5] or 0.0 for _, rows, _, last in picked], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = (end_close / start_close - 1) * 100
+            spread = (period_high - period_low) / start_close * 100
+            volume_ratio = np.where(start_volume > 0, end_volume / start_volume, np.nan)
+        columns = zip(period_high.tolist(), period_low.tolist(), change.tolist(), spread.tolist(),
+                      volume_ratio.tolist())
+    else:
+        columns = []
+        for _, rows, first, last in picked:
+            window = rows[first:last + 1]
+            high = max((row[2] for row in window if row[2] is not None), default=None)
+            low = min((row[3] for row in window if row[3] is not None), default=None)
+            start_close, end_close = rows[first][4], rows[last][4]
+            change = (end_close / start_close - 1) * 100 if start_close else None
+            spread = (high - low) / start_close * 100 if start_close and None not in (high, low) else None
+            columns.append((high, low, change, spread, _ratio(rows[last][5] or 0.0, rows[first][5] or 0.0)))
+
+    for (symbol, rows, first, last), (high, low, change, spread, volume_ratio) in zip(picked, columns):
+        results.append({
+            "symbol": symbol,
+            "start_date": datetime.fromtimestamp(rows[first][0] / 1000, timezone.utc).strftime("%Y-%m-%d"),
+            "end_date": datetime.fromtimestamp(rows[last][0] / 1000, timezone.utc).strftime("%Y-%m-%d"),
+            "start_close": rows[first][4],
+            "end_close": rows[last][4],
+            "change_pct": _finite(change),
+            "high": _finite(high),
+            "low": _finite(low),
+            "range_pct": _finite(spread),
+            "start_volume": rows[first][5],
+            "end_volume": rows[last][5],
+            "volume_ratio": _finite(volume_ratio)
+        })
+    return results
+
+
+def _finite(value) -> Optional[float]:
+    """None for NaN/inf (a zero start price or volume)"""
+    if value is None or value != value or value in (float("inf"), float("-inf")):
+        return None
+    return value
+
+
+def top_movers(results: List[Dict[str, Any]], n: int = 10,
+               by: str = "change") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    The n highest and n lowest results by a metric (change, range or volume).
+
+    Returns:
+        (top, bottom) - top is highest first, bottom is lowest first
+    """
+    field = SCAN_METRICS[by]
+    ranked = sorted((r for r in results if r.get(field) is not None), key=lambda r: r[field])
+    top = ranked[::-1][:n]
+    # With fewer than 2n results the lists would overlap - each symbol is shown once
+    bottom = ranked[:min(n, len(ranked) - len(top))]
+    return top, bottom
+
+
+def run_scan(market: str, symbols: List[str], start_date: str, end_date: str,
+             workers: int = SNAPSHOT_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Scan a universe between two dates.
+
+    Args:
+        market: crypto, stock or commodity
+        symbols: Symbols to scan (duplicates are dropped)
+        start_date: First date (YYYY-MM-DD)
+        end_date: Last date (YYYY-MM-DD)
+        workers: Series downloaded at the same time
+
+    Returns:
+        One result dict per symbol, in symbol order
+
+    Raises:
+        ValueError: Dates in the wrong format or order, or in the future
+    """
+    start_ms, end_ms = utc_day_ms(start_date), utc_day_ms(end_date)
+    if end_ms <= start_ms:
+        raise ValueError("The end date must be after the start date")
+    if end_ms > datetime.now(timezone.utc).timestamp() * 1000:
+        raise ValueError("Cannot scan into the future")
+
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    series, errors = fetch_universe(market, symbols, start_ms, end_ms, workers)
+    results = {r["symbol"]: r for r in compute_scan(series, start_ms, end_ms)}
+    results.update({symbol: {"symbol": symbol, "error": message} for symbol, message in errors.items()})
+    return [results[symbol] for symbol in symbols]
+
+
+def write_scan(results: List[Dict[str, Any]], path: str):
+    """Write every scan result to a CSV or JSON Lines file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if path.lower().endswith((".jsonl", ".json", ".ndjson")):
+            for row in results:
+                f.write(json.dumps(row) + "\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=SCAN_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+def _format_number(value: Optional[float], suffix: str = "", signed: bool = False) -> str:
+    if value is None:
+        return "-"
+    return f"{value:+,.2f}{suffix}" if signed else f"{value:,.2f}{suffix}"
+
+
+def print_movers(title: str, rows: List[Dict[str, Any]], market: str):
+    """Print one table of scan results"""
+    price_format = "{:,.8g}" if market == "crypto" else "{:,.2f}"
+    print(f"{BOLD}{CYAN}{title}{RESET}")
+    print(f"{BOLD}  {'SYMBOL':<14} {'START':>14} {'END':>14} {'CHANGE':>10} {'RANGE':>9} {'VOL RATIO':>10}{RESET}")
+    print(f"{CYAN}  {'─' * 76}{RESET}")
+    for row in rows:
+        change = row["change_pct"]
+        color = GREEN if change and change > 0 else RED if change and change < 0 else DIM
+        print(f"  {row['symbol']:<14} {price_format.format(row['start_close']):>14} "
+              f"{price_format.format(row['end_close']):>14} {color}{_format_number(change, '%', True):>10}{RESET} "
+              f"{_format_number(row['range_pct'], '%'):>9} {_format_number(row['volume_ratio'], 'x'):>10}")
+    print()
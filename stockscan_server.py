@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+StockScan Server - Historical lookups, live prices and exports over HTTP
+A long-running process answers JSON requests, so callers pay for the
+interpreter start and the first connections only once. All requests share
+the pooled HTTP client, the candle cache, the symbol list and (for crypto
+live prices) the Binance price stream.
+
+Identical requests that arrive while the first one is still being answered
+(same symbol, date, time and timeframe) wait for that answer instead of
+making their own upstream calls.
+
+Endpoints (GET):
+  /health
+  /metrics                                           Prometheus text format
+  /crypto?symbol=BTCUSDT&date=2024-01-15&time=14:30&timeframe=5m
+  /stock?symbol=AAPL&date=2024-01-15&timeframe=1d
+  /commodity?symbol=GLD&date=2024-01-15&timeframe=1d
+  /live/crypto?symbol=BTCUSDT
+  /live/stock?symbol=AAPL                            (also /live/commodity)
+  /export?market=crypto&symbol=BTCUSDT&start=2024-01-01&end=2024-01-31&timeframe=1h&format=csv
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import json
+import re
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Optional, Dict, Any, Callable, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+import stockscan_core
+from stockscan_core import GREEN, DIM, RESET
+from stockscan_klines import iter_kline_pages, kline_columns
+from stockscan_metrics import render, observe_server_request, count_coalesced
+from stockscan_stream import start_stream, STREAM_ENABLED
+from stockscan_writers import CSV_FIELDS, as_list, format_times
+
+# Server defaults (override on the command line)
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8080
+
+CRYPTO_TIMEFRAMES = ['1s', '1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h',
+                     '1d', '3d', '1w', '1M']
+STOCK_TIMEFRAMES = ['1d', '1wk', '1mo']
+
+# Lookup errors caused by the request rather than by the provider
+VALIDATION_ERRORS = ("Invalid date",)
+SYMBOL_ERRORS = ("Unknown Binance symbol", "No data found for symbol", "Invalid symbol")
+# Binance answers 400 for an unknown pair, Yahoo Finance 404 for an unknown ticker
+UPSTREAM_SYMBOL_ERROR = re.compile(r"\b(400|404) Client Error\b")
+
+
+class SingleFlight:
+    """
+    Run a function once for concurrent callers with the same key.
+
+    The first caller runs it; callers arriving before it returns wait and
+    get the same result (or exception). Nothing is kept afterwards - a
+    later call with the key runs the function again.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Returns:
+            (result, shared) - shared is True if another caller's run was joined
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+
+class RequestError(Exception):
+    """A request the server refuses, with the HTTP status to answer"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()  # numpy scalars
+    return str(value)
+
+
+def to_json(body: Any) -> bytes:
+    return json.dumps(body, default=_json_default).encode("utf-8")
+
+
+def _require(query: Dict[str, str], name: str) -> str:
+    value = query.get(name, "").strip()
+    if not value:
+        raise RequestError(400, f"Missing parameter: {name}")
+    return value
+
+
+def _choice(query: Dict[str, str], name: str, choices: list, default: str) -> str:
+    value = query.get(name, "").strip() or default
+    if value not in choices:
+        raise RequestError(400, f"Invalid {name} '{value}' (choose from {', '.join(choices)})")
+    return value
+
+
+def _check_date(value: str, name: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise RequestError(400, f"Invalid {name} '{value}' (use YYYY-MM-DD)")
+
+
+def result_status(result: Dict[str, Any]) -> int:
+    """
+    HTTP status of a lookup result dict (errors are returned, not raised).
+
+    400 for a malformed date/time, 404 for an unknown symbol (including one
+    Binance or Yahoo rejected), 502 for any other failed upstream request
+    and 422 for lookups that ran but found no usable data.
+    """
+    error = result.get("error")
+    if not error:
+        return 200
+    error = str(error)
+    if error.startswith(VALIDATION_ERRORS):
+        return 400
+    if any(text in error for text in SYMBOL_ERRORS) or UPSTREAM_SYMBOL_ERROR.search(error):
+        return 404
+    return 502 if error.startswith("Failed to fetch") else 422
+
+
+def lookup_key(route: str, query: Dict[str, str]) -> Tuple[Tuple, Callable[[], Dict[str, Any]]]:
+    """
+    Normalized coalescing key and the call that answers a lookup route.
+
+    Raises:
+        RequestError: Missing or invalid parameters, or an unknown route
+    """
+    symbol = _require(query, "symbol").upper()
+    if route == "/crypto":
+        date_str = _require(query, "date")
+        _check_date(date_str, "date")
+        time_str = query.get("time", "").strip() or None
+        timeframe = _choice(query, "timeframe", CRYPTO_TIMEFRAMES, "5m")
+        return ((route, symbol, date_str, time_str, timeframe),
+                lambda: stockscan_core.get_crypto_price(symbol, date_str, time_str, timeframe))
+    if route in ("/stock", "/commodity"):
+        date_str = _require(query, "date")
+        _check_date(date_str, "date")
+        timeframe = _choice(query, "timeframe", STOCK_TIMEFRAMES, "1d")
+
+        def lookup():
+            result = stockscan_core.get_stock_price(symbol, date_str, None, timeframe)
+            if route == "/commodity" and symbol in stockscan_core.COMMODITY_ETFS:
+                result = dict(result, commodity_name=stockscan_core.COMMODITY_ETFS[symbol])
+            return result
+        return (route, symbol, date_str, timeframe), lookup
+    if route == "/live/crypto":
+        def live():
+            result = stockscan_core.get_live_crypto_price(symbol)
+            if STREAM_ENABLED and "error" not in result:
+                # Later requests for this pair are answered from the stream
+                start_stream([symbol])
+            return result
+        return (route, symbol), live
+    if route in ("/live/stock", "/live/commodity"):
+        return ("/live/stock", symbol), lambda: stockscan_core.get_live_stock_price(symbol)
+    raise RequestError(404, f"Unknown endpoint: {route}")
+
+
+def export_pages(query: Dict[str, str]) -> Tuple[str, str, Callable]:
+    """
+    Validate an /export request.
+
+    Returns:
+        (symbol, timeframe, pages) - pages() yields (columns, tz) candle pages
+
+    Raises:
+        RequestError: Missing or invalid parameters, or yfinance missing for stocks
+    """
+    market = _choice(query, "market", ["crypto", "stock", "commodity"], "crypto")
+    symbol = _require(query, "symbol").upper()
+    start_date, end_date = _require(query, "start"), _require(query, "end")
+    start_dt, end_dt = _check_date(start_date, "start"), _check_date(end_date, "end")
+    if end_dt < start_dt:
+        raise RequestError(400, "end is before start")
+    if start_dt > datetime.now() or end_dt > datetime.now():
+        raise RequestError(400, "Cannot fetch future data")
+
+    # The end date is inclusive (unless it's today)
+    fetch_end_dt = end_dt + timedelta(days=1) if end_dt.date() < datetime.now().date() else end_dt
+
+    if market == "crypto":
+        timeframe = _choice(query, "timeframe", CRYPTO_TIMEFRAMES, "1d")
+        symbol_error = stockscan_core.check_symbol(symbol)
+        if symbol_error:
+            raise RequestError(404, symbol_error)
+        url = f"{stockscan_core.BINANCE_BASE}/klines"
+        start_ms, end_ms = int(start_dt.timestamp() * 1000), int(fetch_end_dt.timestamp() * 1000)
+
+        def pages():
+            for data in iter_kline_pages(url, symbol, timeframe, start_ms, end_ms):
+                yield kline_columns(data), None
+        return symbol, timeframe, pages
+
+    timeframe = _choice(query, "timeframe", STOCK_TIMEFRAMES, "1d")
+    if not stockscan_core.YFINANCE_AVAILABLE:
+        raise RequestError(501, "Stock exports need the 'yfinance' library (pip install yfinance)")
+
+    def pages():
+        yield stockscan_core.fetch_yahoo_export_columns(symbol, start_date, fetch_end_dt.strftime("%Y-%m-%d"), timeframe)
+    return symbol, timeframe, pages
+
+
+def csv_chunk(columns: Dict[str, list], tz=None, header: bool = False) -> bytes:
+    """A page of candles as CSV text (same layout as CSV export files)"""
+    lines = [",".join(CSV_FIELDS)] if header else []
+    for row in zip(format_times(columns["open_time"], tz), as_list(columns["open"]), as_list(columns["high"]),
+                   as_list(columns["low"]), as_list(columns["close"]), as_list(columns["volume"]),
+                   format_times(columns["close_time"], tz)):
+        lines.append(",".join(str(value) for value in row))
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+def json_chunk(columns: Dict[str, list], tz=None, first: bool = True) -> bytes:
+    """A page of candles as comma-separated JSON objects (the inside of the candles array)"""
+    rows = [dict(zip(CSV_FIELDS, row)) for row in zip(
+        format_times(columns["open_time"], tz), as_list(columns["open"]), as_list(columns["high"]),
+        as_list(columns["low"]), as_list(columns["close"]), as_list(columns["volume"]),
+        format_times(columns["close_time"], tz))]
+    if not rows:
+        return b""
+    text = ",".join(json.dumps(row) for row in rows)
+    return (text if first else "," + text).encode("utf-8")
+
+
+class StockScanHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes (avoid the delayed-ACK stall)
+    disable_nagle_algorithm = True
+    server_version = "StockScan"
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return status
+
+    def _write_chunk(self, data: bytes):
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_GET(self):
+        started = perf_counter()
+        parts = urlsplit(self.path)
+        route = parts.path.rstrip("/") or "/"
+        query = dict(parse_qsl(parts.query))
+        try:
+            status = self._route(route, query)
+        except RequestError as e:
+            status = self._send(e.status, to_json({"error": str(e)}))
+        except Exception as e:
+            status = self._send(500, to_json({"error": f"Unexpected error: {e}"}))
+        # Unknown paths share one series so scanners can't grow the metrics without bound
+        label = route if route in ROUTES else "other"
+        observe_server_request(label, status, perf_counter() - started)
+
+    def _route(self, route: str, query: Dict[str, str]) -> int:
+        if route == "/health":
+            return self._send(200, to_json({"status": "ok"}))
+        if route == "/metrics":
+            return self._send(200, render().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        if route == "/export":
+            return self._export(query)
+        if route not in ROUTES:
+            raise RequestError(404, f"Unknown endpoint: {route}")
+
+        key, lookup = lookup_key(route, query)
+        result, shared = self.server.flights.do(key, lookup)
+        if shared:
+            count_coalesced(route)
+        headers = {"X-StockScan-Coalesced": "1"} if shared else None
+        return self._send(result_status(result), to_json(result), headers=headers)
+
+    def _export(self, query: Dict[str, str]) -> int:
+        symbol, timeframe, pages = export_pages(query)
+        fmt = _choice(query, "format", ["csv", "json"], "csv")
+        page_iter = iter(pages())
+        # Fetch the first page before answering, so upstream errors still get a JSON error response
+        try:
+            first_page = next(page_iter, None)
+        except Exception as e:
+            error = {"error": f"Failed to fetch data: {e}"}
+            return self._send(result_status(error), to_json(error))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8" if fmt == "csv" else "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if fmt == "json":
+            self._write_chunk(json.dumps({"symbol": symbol, "timeframe": timeframe})[:-1].encode("utf-8")
+                              + b', "candles": [')
+
+        # Pages go out as they arrive, so a long export never sits in memory
+        written = 0
+        try:
+            page = first_page
+            while page is not None:
+                columns, tz = page
+                if fmt == "csv":
+                    self._write_chunk(csv_chunk(columns, tz, header=written == 0))
+                else:
+                    self._write_chunk(json_chunk(columns, tz, first=written == 0))
+                written += len(columns["open_time"])
+                page = next(page_iter, None)
+        except Exception as e:
+            # Too late for an error status - cut the response short so the client sees it incomplete
+            self.log_error("export of %s failed after %d candles: %s", symbol, written, e)
+            self.close_connection = True
+            return 502
+
+        if fmt == "csv" and not written:
+            self._write_chunk((",".join(CSV_FIELDS) + "\n").encode("utf-8"))
+        if fmt == "json":
+            self._write_chunk(f'], "count": {written}}}'.encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+        return 200
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+ROUTES = ["/health", "/metrics", "/crypto", "/stock", "/commodity",
+          "/live/crypto", "/live/stock", "/live/commodity", "/export"]
+
+
+class StockScanServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the shared request coalescer"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], quiet: bool = False):
+        super().__init__(address, StockScanHandler)
+        self.flights = SingleFlight()
+        self.quiet = quiet
+
+
+def make_server(host: str = SERVE_HOST, port: int = SERVE_PORT, quiet: bool = False) -> StockScanServer:
+    """Create the API server (call serve_forever() on it, or run it in a thread)"""
+    return StockScanServer((host, port), quiet=quiet)
+
+
+def serve(host: str = SERVE_HOST, port: int = SERVE_PORT, quiet: bool = False):
+    """Serve the API until interrupted"""
+    server = make_server(host, port, quiet)
+    print(f"{GREEN}✓ StockScan API listening on http://{host}:{server.server_address[1]}{RESET}")
+    print(f"{DIM}Press Ctrl+C to stop{RESET}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+StockScan Snapshot - Price of a whole universe of symbols at one moment
+Looks up every trading USDT pair (or any other quote asset), every
+commodity ETF, or a list of symbols from a file at the same date and time
+and writes one table with a row per symbol.
+
+The snapshot is a batch lookup (see stockscan_batch): each symbol's candles
+are downloaded into the candle cache by several workers at once - the
+shared rate limiter keeps them under each provider's limit - and every row
+is then answered from the cache. Symbols already looked up at that time
+cost no request at all.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import os
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+import stockscan_core
+from stockscan_batch import iter_batch_results, write_results
+
+# Series downloaded at the same time (the rate limiter decides how fast they really go)
+SNAPSHOT_WORKERS = int(os.getenv("STOCKSCAN_SNAPSHOT_WORKERS", "16"))
+
+# Universe name -> market of its lookups
+UNIVERSES = {"crypto": "crypto", "commodities": "commodity", "stocks": "stock"}
+
+
+def universe_symbols(universe: str, quote: Optional[str] = "USDT") -> List[str]:
+    """
+    Symbols of a built-in universe.
+
+    Args:
+        universe: "crypto" (trading spot pairs from the Binance symbol list)
+            or "commodities" (the commodity ETFs StockScan knows)
+        quote: Crypto quote asset (None for every pair)
+
+    Raises:
+        ValueError: For a universe without a built-in symbol list (stocks)
+    """
+    if universe == "crypto":
+        return stockscan_core.get_symbol_index().filter(quote=quote)
+    if universe == "commodities":
+        return sorted(stockscan_core.COMMODITY_ETFS)
+    raise ValueError(f"No built-in symbol list for '{universe}', pass the symbols with --file")
+
+
+def snapshot_queries(market: str, symbols: List[str], date_str: str, time_str: Optional[str] = None,
+                     timeframe: Optional[str] = None) -> List[Dict[str, Any]]:
+    """One batch query per symbol, all at the same date and time"""
+    seen = set()
+    queries = []
+    for symbol in symbols:
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            queries.append({"market": market, "symbol": symbol, "date": date_str, "time": time_str,
+                            "timeframe": timeframe})
+    return queries
+
+
+def iter_snapshot(market: str, symbols: List[str], date_str: str, time_str: Optional[str] = None,
+                  timeframe: Optional[str] = None, workers: int = SNAPSHOT_WORKERS) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one result row per symbol (batch result layout, in symbol order).
+
+    Args:
+        market: crypto, stock or commodity
+        symbols: Symbols to look up (duplicates are dropped)
+        date_str: Date in YYYY-MM-DD format
+        time_str: Time in HH:MM format (crypto only, optional)
+        timeframe: Candle timeframe (default: 5m for crypto, 1d for stocks)
+        workers: Series downloaded at the same time
+    """
+    queries = snapshot_queries(market, symbols, date_str, time_str, timeframe)
+    return iter_batch_results(queries, market, workers)
+
+
+def run_snapshot(market: str, symbols: List[str], output_path: str, date_str: str, time_str: Optional[str] = None,
+                 timeframe: Optional[str] = None, workers: int = SNAPSHOT_WORKERS) -> Tuple[int, int]:
+    """
+    Write a snapshot table to a CSV or JSON Lines file.
+
+    Returns:
+        (rows written, rows with an error)
+    """
+    return write_results(iter_snapshot(market, symbols, date_str, time_str, timeframe, workers), output_path)
+
+
+def default_output(universe: str, date_str: str, time_str: Optional[str] = None) -> str:
+    """exports/snapshot_<universe>_<date>[_<HHMM>].csv"""
+    stamp = date_str + (f"_{time_str.replace(':', '')}" if time_str else "")
+    return os.path.join("exports", f"snapshot_{universe}_{stamp}.csv")
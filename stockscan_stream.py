@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+StockScan Stream - Live crypto prices over Binance WebSocket streams
+A background thread keeps one WebSocket connection to Binance's combined
+stream endpoint open, subscribed to the trade (or kline) stream of every
+watched pair, and writes each update into an in-memory latest-price table.
+Live price lookups then read the table instead of polling REST.
+
+The connection is re-established with exponential backoff (plus jitter)
+whenever it drops, including Binance's scheduled 24-hour disconnect. The
+small RFC 6455 client below only needs the standard library and also
+speaks plain ws://, so it can be pointed at a local stand-in server with
+STOCKSCAN_STREAM_URL.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import base64
+import hashlib
+import json
+import os
+import random
+import socket
+import ssl
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from urllib.parse import urlsplit
+
+# Stream configuration (override with environment variables)
+# STOCKSCAN_STREAM_URL: base URL of the combined stream endpoint
+# STOCKSCAN_STREAM: set to 0 to never open a stream from interactive mode
+# STOCKSCAN_STREAM_MAX_AGE: seconds a price stays usable after the connection drops
+# STOCKSCAN_STREAM_MAX_SYMBOLS: pairs followed at once; the least recently asked one is dropped beyond it
+BINANCE_STREAM_BASE = os.getenv("STOCKSCAN_STREAM_URL", "wss://stream.binance.com:9443")
+STREAM_ENABLED = os.getenv("STOCKSCAN_STREAM", "1") != "0"
+STREAM_MAX_AGE = float(os.getenv("STOCKSCAN_STREAM_MAX_AGE", "10"))
+STREAM_MAX_SYMBOLS = int(os.getenv("STOCKSCAN_STREAM_MAX_SYMBOLS", "200"))
+
+# Binance closes connections asking for more streams than this
+BINANCE_MAX_STREAMS = 1024
+
+# Binance pings every 20 seconds; no data for this long means the connection is dead
+STREAM_READ_TIMEOUT = 60.0
+CONNECT_TIMEOUT = 10.0
+
+# Reconnect backoff
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# WebSocket opcodes
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    """Handshake failure, protocol error or closed connection"""
+
+
+def _mask(payload: bytes, key: bytes) -> bytes:
+    """XOR a payload with a 4-byte masking key (whole payload at once)"""
+    if not payload:
+        return payload
+    length = len(payload)
+    repeated = (key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+
+
+class WebSocket:
+    """
+    Minimal blocking WebSocket client (RFC 6455): text frames, ping/pong,
+    close and fragmented messages. Use WebSocket.connect() to open one.
+    """
+
+    def __init__(self, sock: socket.socket, buffered: bytes = b""):
+        self.sock = sock
+        self._buffer = buffered
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    @classmethod
+    def connect(cls, url: str, timeout: float = CONNECT_TIMEOUT) -> "WebSocket":
+        """
+        Open a connection to a ws:// or wss:// URL.
+
+        Raises:
+            OSError: If the TCP/TLS connection fails
+            WebSocketError: If the server refuses the upgrade
+        """
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        if parts.scheme not in ("ws", "wss"):
+            raise WebSocketError(f"Not a WebSocket URL: {url}")
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            if secure:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            key = base64.b64encode(os.urandom(16)).decode()
+            request = (
+                f"GET {path} HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n"
+                "\r\n"
+            )
+            sock.sendall(request.encode())
+
+            response = b""
+            while b"\r\n\r\n" not in response:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    raise WebSocketError("Connection closed during the handshake")
+                response += chunk
+            head, rest = response.split(b"\r\n\r\n", 1)
+            lines = head.decode("latin-1").split("\r\n")
+            if len(lines[0].split()) < 2 or lines[0].split()[1] != "101":
+                raise WebSocketError(f"Upgrade refused: {lines[0]}")
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            expected = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+            if headers.get("sec-websocket-accept") != expected:
+                raise WebSocketError("Invalid Sec-WebSocket-Accept in the handshake")
+        except BaseException:
+            sock.close()
+            raise
+        return cls(sock, rest)
+
+    def _recv_exact(self, count: int) -> bytes:
+        while len(self._buffer) < count:
+            chunk = self.sock.recv(max(65536, count - len(self._buffer)))
+            if not chunk:
+                raise WebSocketError("Connection closed by the server")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:count], self._buffer[count:]
+        return data
+
+    def send_frame(self, opcode: int, payload: bytes = b""):
+        """Send one final, masked frame (clients must mask)"""
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        key = os.urandom(4)
+        with self._send_lock:
+            self.sock.sendall(header + key + _mask(payload, key))
+
+    def send_text(self, text: str):
+        self.send_frame(OP_TEXT, text.encode("utf-8"))
+
+    def _recv_frame(self) -> tuple:
+        """Read one frame: (fin, opcode, payload)"""
+        first, second = self._recv_exact(2)
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._recv_exact(8))[0]
+        key = self._recv_exact(4) if second & 0x80 else None
+        payload = self._recv_exact(length)
+        if key:
+            payload = _mask(payload, key)
+        return fin, opcode, payload
+
+    def recv(self) -> str:
+        """
+        Return the next text message, answering pings on the way.
+
+        Raises:
+            WebSocketError: When the server closes the connection
+            socket.timeout: If nothing arrives within the socket timeout
+        """
+        message = None
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            if opcode == OP_PING:
+                self.send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                code = struct.unpack("!H", payload[:2])[0] if len(payload) >= 2 else 1005
+                try:
+                    self.send_frame(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                self.closed = True
+                raise WebSocketError(f"Connection closed by the server (code {code})")
+            if opcode in (OP_TEXT, OP_BINARY):
+                message = payload
+            elif opcode == OP_CONTINUATION and message is not None:
+                message += payload
+            else:
+                raise WebSocketError(f"Unexpected frame (opcode {opcode})")
+            if fin:
+                return message.decode("utf-8")
+
+    def close(self):
+        """Send a close frame (best effort) and drop the socket"""
+        if not self.closed:
+            self.closed = True
+            try:
+                self.send_frame(OP_CLOSE, struct.pack("!H", 1000))
+            except OSError:
+                pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class PriceTable:
+    """
+    Thread-safe latest price per symbol.
+
+    Each entry holds price, trade_time (exchange time, epoch ms) and
+    received (local time.time() when the update arrived).
+    """
+
+    def __init__(self):
+        self._prices = {}
+        self._changed = threading.Condition()
+
+    def update(self, symbol: str, price: float, trade_time: Optional[int] = None):
+        with self._changed:
+            self._prices[symbol] = {"price": price, "trade_time": trade_time, "received": time.time()}
+            self._changed.notify_all()
+
+    def discard(self, symbol: str):
+        """Forget a symbol that is no longer streamed"""
+        with self._changed:
+            self._prices.pop(symbol, None)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest entry of a symbol, or None"""
+        with self._changed:
+            entry = self._prices.get(symbol)
+            return dict(entry) if entry else None
+
+    def snapshot(self) -> Dict[str, float]:
+        """symbol -> latest price"""
+        with self._changed:
+            return {symbol: entry["price"] for symbol, entry in self._prices.items()}
+
+    def wait_for(self, symbol: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to timeout seconds for the first price of a symbol"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while symbol not in self._prices:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+            return dict(self._prices[symbol])
+
+
+def stream_name(symbol: str, kind: str = "trade") -> str:
+    """Binance stream name, e.g. btcusdt@trade or btcusdt@kline_1m"""
+    return f"{symbol.lower()}@{kind}"
+
+
+def parse_stream_message(text: str) -> Optional[tuple]:
+    """
+    Extract (symbol, price, event time ms) from a trade or kline stream
+    message (combined or raw); None for anything else (e.g., subscribe acks).
+    """
+    message = json.loads(text)
+    data = message.get("data", message) if isinstance(message, dict) else None
+    if not isinstance(data, dict):
+        return None
+    event = data.get("e")
+    if event in ("trade", "aggTrade"):
+        return data["s"], float(data["p"]), data.get("T") or data.get("E")
+    if event == "kline":
+        return data["s"], float(data["k"]["c"]), data.get("E")
+    if event == "24hrMiniTicker":
+        return data["s"], float(data["c"]), data.get("E")
+    return None
+
+
+class PriceStream:
+    """
+    Background WebSocket subscription that keeps a PriceTable current.
+
+    Args:
+        symbols: Pairs to follow (more can be added with subscribe())
+        kind: Stream type - "trade" (default), "aggTrade", "kline_1m", "miniTicker"
+        base_url: Stream endpoint (default: STOCKSCAN_STREAM_URL or Binance)
+        max_symbols: Pairs followed at once (at most BINANCE_MAX_STREAMS); adding
+            one more drops the pair whose price was asked for least recently
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), kind: str = "trade", base_url: Optional[str] = None,
+                 max_symbols: int = STREAM_MAX_SYMBOLS):
+        self.kind = kind
+        self.base_url = (base_url or BINANCE_STREAM_BASE).rstrip("/")
+        self.max_symbols = max(1, min(max_symbols, BINANCE_MAX_STREAMS))
+        self.table = PriceTable()
+        self.connected = False
+        self.reconnects = 0
+        self.last_error = None
+        # Followed symbols, least recently asked for first
+        self._symbols = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = None
+        self._request_id = 0
+        for symbol in symbols:
+            self._add(symbol)
+
+    def _add(self, symbol: str) -> Tuple[bool, List[str]]:
+        """Follow a symbol; returns (newly followed, symbols dropped to stay within max_symbols)"""
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol in self._symbols:
+                self._symbols.move_to_end(symbol)
+                return False, []
+            self._symbols[symbol] = None
+            dropped = []
+            while len(self._symbols) > self.max_symbols:
+                dropped.append(self._symbols.popitem(last=False)[0])
+        for old in dropped:
+            self.table.discard(old)
+        return True, dropped
+
+    def _touch(self, symbol: str):
+        with self._lock:
+            if symbol in self._symbols:
+                self._symbols.move_to_end(symbol)
+
+    @property
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._symbols)
+
+    def url(self, symbols: Optional[List[str]] = None) -> str:
+        """Combined stream URL for the given (default: current) symbols"""
+        streams = "/".join(stream_name(symbol, self.kind) for symbol in (symbols or self.symbols))
+        return f"{self.base_url}/stream?streams={streams}"
+
+    def start(self) -> "PriceStream":
+        """Start the background thread (no-op if it is running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stockscan-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Close the connection and stop reconnecting"""
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def subscribe(self, symbols: Iterable[str]):
+        """Follow more pairs; the open connection subscribes without reconnecting"""
+        added = []
+        dropped = []
+        for symbol in symbols:
+            new, evicted = self._add(symbol)
+            if new:
+                added.append(symbol.upper())
+            dropped += evicted
+        # A pair added and dropped again within this call needs neither request
+        gone = [symbol for symbol in dropped if symbol not in added]
+        added = [symbol for symbol in added if symbol not in dropped]
+        if self.connected:
+            self._send_method("UNSUBSCRIBE", gone)
+            self._send_method("SUBSCRIBE", added)
+
+    def _send_method(self, method: str, symbols: List[str]):
+        """SUBSCRIBE or UNSUBSCRIBE symbols on the open connection (best effort)"""
+        ws = self._ws
+        if not symbols or ws is None:
+            return
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+        try:
+            ws.send_text(json.dumps({
+                "method": method,
+                "params": [stream_name(symbol, self.kind) for symbol in symbols],
+                "id": request_id
+            }))
+        except OSError:
+            # The reader notices the broken connection and reconnects with every symbol
+            pass
+
+    def price(self, symbol: str, max_age: float = STREAM_MAX_AGE) -> Optional[Dict[str, Any]]:
+        """
+        Latest streamed entry of a symbol if it can be trusted as current:
+        while connected any entry is current (no trade since = same price),
+        after a disconnect only entries younger than max_age seconds.
+        """
+        symbol = symbol.upper()
+        self._touch(symbol)
+        entry = self.table.get(symbol)
+        if entry is None:
+            return None
+        if not self.connected and time.time() - entry["received"] > max_age:
+            return None
+        return entry
+
+    def _run(self):
+        """Connect, read until the connection drops, back off, repeat"""
+        attempt = 0
+        while not self._stop.is_set():
+            if not self.symbols:
+                self._stop.wait(0.5)
+                continue
+            try:
+                in_url = self.symbols
+                self._ws = WebSocket.connect(self.url(in_url))
+                self._ws.sock.settimeout(STREAM_READ_TIMEOUT)
+                self.connected = True
+                # Pairs subscribe() added while connecting were neither in the URL nor
+                # sent (not connected yet); pairs it dropped are still in the URL
+                current = self.symbols
+                self._send_method("SUBSCRIBE", [symbol for symbol in current if symbol not in in_url])
+                self._send_method("UNSUBSCRIBE", [symbol for symbol in in_url if symbol not in current])
+                while not self._stop.is_set():
+                    update = parse_stream_message(self._ws.recv())
+                    # Trades of a dropped pair can still arrive until the server unsubscribes it
+                    if update is not None and update[0] in self._symbols:
+                        self.table.update(*update)
+                        attempt = 0
+            except (OSError, WebSocketError, ValueError) as e:
+                self.last_error = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+                if self._ws is not None:
+                    self._ws.close()
+                    self._ws = None
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+            attempt += 1
+            self._stop.wait(delay + random.uniform(0, delay / 2))
+
+
+_stream = None
+_stream_lock = threading.Lock()
+
+
+def start_stream(symbols: Iterable[str], kind: str = "trade") -> PriceStream:
+    """Follow symbols on the shared stream, starting it on first use"""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = PriceStream(kind=kind)
+        stream = _stream
+    stream.subscribe(symbols)
+    return stream.start()
+
+
+def get_stream() -> Optional[PriceStream]:
+    """The shared stream, or None if none was started"""
+    return _stream
+
+
+def stop_stream():
+    """Stop the shared stream"""
+    global _stream
+    with _stream_lock:
+        stream, _stream = _stream, None
+    if stream is not None:
+        stream.stop()
+
+
+def streamed_price(symbol: str, max_age: float = STREAM_MAX_AGE, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+    """
+    Latest trustworthy streamed entry of a symbol from the shared stream.
+
+    Args:
+        symbol: Trading pair (e.g., BTCUSDT)
+        max_age: See PriceStream.price()
+        wait: Seconds to wait for a first trade if the stream is connected
+              but has none for the symbol yet
+
+    Returns:
+        The entry, or None if the symbol is not streamed (use REST instead)
+    """
+    stream = _stream
+    if stream is None:
+        return None
+    symbol = symbol.upper()
+    if wait > 0 and stream.connected and symbol in stream.symbols and stream.table.get(symbol) is None:
+        stream.table.wait_for(symbol, wait)
+    return stream.price(symbol, max_age)
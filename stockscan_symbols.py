@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+StockScan Symbols - Cached, indexed Binance symbol list
+Binance's /exchangeInfo document is several MB, so it is downloaded at most
+once per STOCKSCAN_SYMBOLS_TTL and kept on disk as a compact list next to
+the candle cache. In memory the symbols are indexed by base asset, quote
+asset and status, which makes listing and prefix search a dictionary or
+bisect lookup and lets lookups reject a misspelled pair without a network
+round trip. Fuzzy search first narrows the names with a trigram index and
+scores only the FUZZY_CANDIDATES names sharing the most trigrams with the
+query, instead of every listed symbol.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import bisect
+import difflib
+import heapq
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+from stockscan_cache import CACHE_DIR, CACHE_ENABLED
+from stockscan_http import http_get
+from stockscan_metrics import count_cache
+
+# How long a downloaded symbol list is trusted, in seconds (override with STOCKSCAN_SYMBOLS_TTL)
+SYMBOLS_TTL = int(os.getenv("STOCKSCAN_SYMBOLS_TTL", str(24 * 3600)))
+
+SYMBOLS_FILE = os.path.join(CACHE_DIR, "binance_symbols.json")
+
+# Minimum difflib similarity for a fuzzy match
+FUZZY_CUTOFF = 0.6
+# Names (most shared trigrams first) scored by difflib per fuzzy search
+FUZZY_CANDIDATES = 40
+
+
+def trigrams(name: str) -> set:
+    """Three-letter pieces of a name, with its start and end marked"""
+    padded = f"^{name}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """
+    In-memory index of Binance symbols.
+
+    Args:
+        entries: Dicts with symbol, base, quote, status and spot keys
+        fetched_at: Epoch seconds when the list was downloaded
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], fetched_at: float):
+        self.fetched_at = fetched_at
+        self.symbols = {entry["symbol"]: entry for entry in entries}
+        self.names = sorted(self.symbols)
+        self.by_base = {}
+        self.by_quote = {}
+        self.by_status = {}
+        for name in self.names:
+            entry = self.symbols[name]
+            self.by_base.setdefault(entry["base"], []).append(name)
+            self.by_quote.setdefault(entry["quote"], []).append(name)
+            self.by_status.setdefault(entry["status"], []).append(name)
+        self._by_trigram = None
+
+    @classmethod
+    def from_exchange_info(cls, data: Dict[str, Any], fetched_at: Optional[float] = None) -> "SymbolIndex":
+        """Build the index from a raw /exchangeInfo response"""
+        entries = [
+            {
+                "symbol": info.get("symbol"),
+                "base": info.get("baseAsset"),
+                "quote": info.get("quoteAsset"),
+                "status": info.get("status"),
+                "spot": bool(info.get("isSpotTradingAllowed"))
+            }
+            for info in data.get("symbols", []) if info.get("symbol")
+        ]
+        return cls(entries, time.time() if fetched_at is None else fetched_at)
+
+    def is_fresh(self, ttl: int = SYMBOLS_TTL) -> bool:
+        """True if the list is younger than ttl seconds"""
+        return time.time() - self.fetched_at < ttl
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Entry of one symbol, or None if Binance does not list it"""
+        return self.symbols.get(symbol.upper())
+
+    def _matches(self, name: str, quote: Optional[str], status: Optional[str], spot: bool) -> bool:
+        entry = self.symbols[name]
+        return ((quote is None or entry["quote"] == quote) and
+                (status is None or entry["status"] == status) and
+                (not spot or entry["spot"]))
+
+    def filter(self, quote: Optional[str] = None, base: Optional[str] = None, status: Optional[str] = "TRADING",
+               spot: bool = True, limit: Optional[int] = None) -> List[str]:
+        """
+        Symbols matching every given criterion, sorted by name.
+
+        Args:
+            quote: Quote asset (e.g., USDT), None for any
+            base: Base asset (e.g., BTC), None for any
+            status: Trading status (default: TRADING), None for any
+            spot: Only pairs open for spot trading
+            limit: Max symbols returned (None for all)
+        """
+        if base is not None:
+            candidates = self.by_base.get(base.upper(), [])
+        elif quote is not None:
+            candidates = self.by_quote.get(quote.upper(), [])
+        elif status is not None:
+            candidates = self.by_status.get(status, [])
+        else:
+            candidates = self.names
+        quote = quote.upper() if quote else None
+        names = [name for name in candidates if self._matches(name, quote, status, spot)]
+        return names if limit is None else names[:limit]
+
+    def prefix(self, text: str) -> List[str]:
+        """All symbols starting with text, sorted (binary search on the sorted names)"""
+        text = text.upper()
+        start = bisect.bisect_left(self.names, text)
+        end = bisect.bisect_left(self.names, text + "\uffff")
+        return self.names[start:end]
+
+    def fuzzy_candidates(self, text: str, count: int = FUZZY_CANDIDATES) -> List[str]:
+        """The count names with the largest share of trigrams in common with text (ties by name)"""
+        if self._by_trigram is None:
+            # Built on first use - most runs never search
+            by_trigram = {}
+            for name in self.names:
+                for gram in trigrams(name):
+                    by_trigram.setdefault(gram, []).append(name)
+            self._by_trigram = by_trigram
+        grams = trigrams(text)
+        shared = {}
+        for gram in grams:
+            for name in self._by_trigram.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+        # Share of trigrams in common (a name has len(name) of them), like difflib's ratio
+        return heapq.nsmallest(count, shared, key=lambda name: (-shared[name] / (len(grams) + len(name)), name))
+
+    def search(self, text: str, limit: int = 10, quote: Optional[str] = None,
+               status: Optional[str] = "TRADING", spot: bool = True) -> List[str]:
+        """
+        Find symbols for a partial or misspelled name.
+
+        Exact matches come first, then symbols starting with the text, then
+        pairs whose base asset is the text, then close matches by spelling
+        among the names sharing the most trigrams with the text.
+
+        Args:
+            text: What the user typed (e.g., "btc", "ETHUSD", "SOLUSTD")
+            limit: Max results
+            quote: Only pairs with this quote asset
+            status: Only symbols with this status (None for any)
+            spot: Only pairs open for spot trading
+        """
+        text = text.strip().upper()
+        if not text:
+            return []
+        quote = quote.upper() if quote else None
+        results = []
+
+        def add(names):
+            for name in names:
+                if len(results) >= limit:
+                    return
+                if name not in results and self._matches(name, quote, status, spot):
+                    results.append(name)
+
+        if text in self.symbols:
+            add([text])
+        add(self.prefix(text))
+        add(self.by_base.get(text, []))
+        if len(results) < limit:
+            candidates = self.fuzzy_candidates(text, max(FUZZY_CANDIDATES, limit * 3))
+            add(difflib.get_close_matches(text, candidates, n=limit * 3, cutoff=FUZZY_CUTOFF))
+        return results
+
+    def to_json(self) -> Dict[str, Any]:
+        """Compact form saved on disk"""
+        return {
+            "fetched_at": self.fetched_at,
+            "symbols": [[e["symbol"], e["base"], e["quote"], e["status"], e["spot"]] for e in self.symbols.values()]
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "SymbolIndex":
+        entries = [dict(zip(("symbol", "base", "quote", "status", "spot"), row)) for row in data["symbols"]]
+        return cls(entries, data["fetched_at"])
+
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def _read_file() -> Optional[SymbolIndex]:
+    """The symbol list saved on disk, or None"""
+    if not CACHE_ENABLED:
+        return None
+    try:
+        with open(SYMBOLS_FILE, encoding="utf-8") as f:
+            return SymbolIndex.from_json(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_file(index: SymbolIndex):
+    """Atomically save the symbol list (best effort)"""
+    if not CACHE_ENABLED:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = SYMBOLS_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index.to_json(), f, separators=(",", ":"))
+        os.replace(tmp_path, SYMBOLS_FILE)
+    except OSError:
+        pass
+
+
+def cached_symbol_index() -> Optional[SymbolIndex]:
+    """The symbol index from memory or disk, without touching the network (may be stale)"""
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                _index = _read_file()
+                _index_loaded = True
+    return _index
+
+
+def load_symbol_index(url: str, refresh: bool = False) -> SymbolIndex:
+    """
+    Return the symbol index, downloading /exchangeInfo if the cached copy is
+    missing or older than SYMBOLS_TTL.
+
+    Args:
+        url: Binance /exchangeInfo endpoint
+        refresh: Download even if the cached copy is fresh
+
+    Raises:
+        requests.exceptions.RequestException: If the download fails and
+            there is no cached copy at all (a stale copy is used instead)
+    """
+    global _index
+    index = cached_symbol_index()
+    if index is not None and index.is_fresh() and not refresh:
+        count_cache("symbols", True)
+        return index
+    count_cache("symbols", False)
+
+    with _index_lock:
+        if _index is not None and _index is not index and _index.is_fresh():
+            # Another thread refreshed it meanwhile
+            return _index
+        try:
+            response = http_get(url)
+            response.raise_for_status()
+            fresh = SymbolIndex.from_exchange_info(response.json())
+        except Exception:
+            if index is not None:
+                return index
+            raise
+        _index = fresh
+    _write_file(fresh)
+    return fresh
+
+
+def check_symbol(symbol: str) -> Optional[str]:
+    """
+    Validate a Binance symbol against the cached symbol list.
+
+    Never downloads anything: without a fresh cached list every symbol is
+    accepted and Binance has the final word.
+
+    Returns:
+        An error message for an unknown symbol, else None
+    """
+    index = cached_symbol_index()
+    if index is None or not index.is_fresh() or index.get(symbol) is not None:
+        return None
+    message = f"Unknown Binance symbol '{symbol}'"
+    suggestions = index.search(symbol, limit=3, status=None)
+    if suggestions:
+        message += f" (did you mean {', '.join(suggestions)}?)"
+    return message
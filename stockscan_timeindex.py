@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+StockScan Time Index - Binary-search lookups on sorted candle times
+Lookups used to walk every candle of a series and convert each timestamp
+to a date to find the one they wanted. TimeIndex keeps the open times in
+sorted order and answers "which candle contains / is closest to this
+time" and "which candles fall in this range" with bisect, so a lookup
+costs O(log n) however long the cached series is.
+
+The keys only need to be sortable: epoch seconds, epoch milliseconds or
+YYYY-MM-DD strings all work.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import bisect
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Optional, Any, Sequence, Tuple
+
+
+def local_day_bounds(day: date) -> Tuple[int, int]:
+    """[start, end) of a local calendar day in unix seconds (DST-safe)"""
+    start = datetime.combine(day, datetime.min.time())
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+def zone_day_start_ms(day: date, tz: Optional[tzinfo]) -> int:
+    """Epoch ms of 00:00 on a calendar day in a timezone (UTC if None)"""
+    midnight = datetime.combine(day, datetime.min.time())
+    # pytz zones must localize(); replace() would give them their oldest (LMT) offset
+    localize = getattr(tz, "localize", None)
+    aware = localize(midnight) if localize else midnight.replace(tzinfo=tz or timezone.utc)
+    return int(aware.timestamp() * 1000)
+
+
+class TimeIndex:
+    """
+    Sorted candle open times (and optional close times) with bisect queries.
+
+    Args:
+        starts: Candle open times in ascending order
+        ends: Matching candle close times (needed by containing())
+    """
+
+    def __init__(self, starts: Sequence[Any], ends: Optional[Sequence[Any]] = None):
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple], scale: int = 1) -> "TimeIndex":
+        """
+        Index (open_time, ..., close_time) candle rows in milliseconds.
+
+        Args:
+            rows: Candle rows sorted by open time (close time at position 6)
+            scale: Divide the times by this (1000 gives unix seconds)
+        """
+        if scale == 1:
+            return cls([row[0] for row in rows], [row[6] for row in rows])
+        return cls([row[0] // scale for row in rows], [row[6] // scale for row in rows])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def first_at_or_after(self, key: Any) -> Optional[int]:
+        """Index of the first candle opening at or after key, or None"""
+        i = bisect.bisect_left(self.starts, key)
+        return i if i < len(self.starts) else None
+
+    def last_at_or_before(self, key: Any) -> Optional[int]:
+        """Index of the last candle opening at or before key, or None"""
+        i = bisect.bisect_right(self.starts, key) - 1
+        return i if i >= 0 else None
+
+    def slice(self, start: Any, end: Any) -> range:
+        """Indices of the candles opening in [start, end)"""
+        return range(bisect.bisect_left(self.starts, start), bisect.bisect_left(self.starts, end))
+
+    def containing(self, key: Any) -> Optional[int]:
+        """Index of the candle with open <= key < close, or None"""
+        i = self.last_at_or_before(key)
+        if i is None or key >= self.ends[i]:
+            return None
+        # Step back over candles with the same open time (the first one wins)
+        return bisect.bisect_left(self.starts, self.starts[i], 0, i + 1)
+
+    def closest(self, key: Any, max_key: Optional[Any] = None) -> Optional[int]:
+        """
+        Index of the candle whose open time is nearest to key (numeric keys).
+        On a tie the earlier candle wins.
+
+        Args:
+            key: Target time
+            max_key: Ignore candles opening after this
+        """
+        candidates = []
+        i = bisect.bisect_left(self.starts, key)
+        if i > 0:
+            # First of any candles sharing the previous open time
+            candidates.append(bisect.bisect_left(self.starts, self.starts[i - 1], 0, i))
+        if i < len(self.starts) and (max_key is None or self.starts[i] <= max_key):
+            candidates.append(i)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda j: (abs(self.starts[j] - key), j))
+
+    def trading_day(self, start: Any, end: Any, earliest: Optional[Any] = None) -> Optional[int]:
+        """
+        Index of the daily candle that answers a lookup for the day [start, end):
+        the first one opening that day, else the last one before it (not before
+        earliest), else None. Every stock provider picks its candle this way.
+        """
+        i = bisect.bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] < end:
+            return i
+        if i > 0 and (earliest is None or self.starts[i - 1] >= earliest):
+            return i - 1
+        return None
+
+    def on_day(self, day: date) -> Optional[int]:
+        """Index of the first candle opening on a local calendar day (unix-second keys), or None"""
+        start, end = local_day_bounds(day)
+        i = self.first_at_or_after(start)
+        return i if i is not None and self.starts[i] < end else None
+
+    def day_range(self, first_day: date, last_day: date) -> range:
+        """Indices of the candles opening from first_day through last_day, inclusive (unix-second keys)"""
+        return self.slice(local_day_bounds(first_day)[0], local_day_bounds(last_day)[1])
+
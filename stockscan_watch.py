@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+StockScan Watch - Live price table for many symbols
+Every refresh is one bulk request: Binance's /ticker/price?symbols=[...]
+returns all crypto pairs at once, and Yahoo Finance's spark endpoint
+returns up to 20 stocks per request (batches are sent in parallel). With
+--stream, crypto prices come from Binance trade streams instead (see
+stockscan_stream) and no request is made per refresh. On a terminal only
+the rows whose price changed are redrawn.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple
+
+import requests
+
+import stockscan_core
+from stockscan_core import CYAN, GREEN, RED, YELLOW, BOLD, DIM, RESET
+from stockscan_http import http_get
+from stockscan_symbols import check_symbol
+
+# Seconds between refreshes (override with --interval)
+WATCH_INTERVAL = float(os.getenv("STOCKSCAN_WATCH_INTERVAL", "5"))
+
+# Seconds between redraws when prices are streamed
+STREAM_REDRAW_INTERVAL = 1.0
+
+# Yahoo's spark endpoint answers at most 20 symbols per request
+YAHOO_SPARK_BATCH = 20
+
+# ANSI cursor control
+CURSOR_UP = "\033[{}A"
+CURSOR_DOWN = "\033[{}B"
+CLEAR_LINE = "\r\033[2K"
+
+# Longest error text shown in a row
+MAX_MESSAGE = 55
+
+
+def read_watchlist(path: str) -> List[str]:
+    """Read symbols from a file (one per line or comma-separated, # starts a comment)"""
+    symbols = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            symbols.extend(part.strip().upper() for part in line.split(",") if part.strip())
+    return symbols
+
+
+def fetch_crypto_prices(symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """
+    Current Binance prices of many pairs in one request.
+
+    Pairs missing from the cached symbol list are reported without asking
+    Binance. If Binance still rejects the list (a pair it does not know),
+    the full ticker is fetched once instead and filtered.
+
+    Returns:
+        (symbol -> price, symbol -> error message)
+    """
+    errors = {}
+    wanted = []
+    for symbol in symbols:
+        error = check_symbol(symbol)
+        if error:
+            errors[symbol] = error
+        else:
+            wanted.append(symbol)
+    if not wanted:
+        return {}, errors
+
+    url = f"{stockscan_core.BINANCE_BASE}/ticker/price"
+    if len(wanted) == 1:
+        params = {"symbol": wanted[0]}
+    else:
+        params = {"symbols": json.dumps(wanted, separators=(",", ":"))}
+    response = http_get(url, params=params)
+    if response.status_code == 400:
+        # One unknown pair fails the whole list - take everything and pick ours
+        response = http_get(url)
+    response.raise_for_status()
+
+    data = response.json()
+    if isinstance(data, dict):
+        data = [data]
+    listed = {item["symbol"]: float(item["price"]) for item in data}
+    prices = {symbol: listed[symbol] for symbol in wanted if symbol in listed}
+    for symbol in wanted:
+        if symbol not in prices:
+            errors[symbol] = f"Unknown Binance symbol '{symbol}'"
+    return prices, errors
+
+
+def _fetch_spark_batch(symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """Current prices of up to YAHOO_SPARK_BATCH symbols in one Yahoo request"""
+    response = http_get(
+        stockscan_core.YAHOO_SPARK_BASE,
+        params={"symbols": ",".join(symbols), "range": "1d", "interval": "1d"},
+        headers={"User-Agent": "Mozilla/5.0"}
+    )
+    response.raise_for_status()
+
+    prices = {}
+    for item in (response.json().get("spark") or {}).get("result") or []:
+        for quote in item.get("response") or []:
+            meta = quote.get("meta", {})
+            price = meta.get("regularMarketPrice") or meta.get("previousClose")
+            if price is not None:
+                prices[item.get("symbol")] = float(price)
+    errors = {symbol: f"No data found for symbol {symbol}" for symbol in symbols if symbol not in prices}
+    return prices, errors
+
+
+def _fetch_one_by_one(symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """Fallback when the spark endpoint fails: one chart request per symbol"""
+    prices, errors = {}, {}
+    for symbol in symbols:
+        result = stockscan_core.get_live_stock_price(symbol)
+        if "error" in result:
+            errors[symbol] = result["error"]
+        else:
+            prices[symbol] = result["price"]
+    return prices, errors
+
+
+def fetch_stock_prices(symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """
+    Current Yahoo Finance prices of many stocks/ETFs.
+
+    Symbols are sent in batches of YAHOO_SPARK_BATCH, all batches at once,
+    so a refresh takes one round trip however long the list is.
+
+    Returns:
+        (symbol -> price, symbol -> error message)
+    """
+    def fetch(batch):
+        try:
+            return _fetch_spark_batch(batch)
+        except (requests.exceptions.RequestException, ValueError):
+            return _fetch_one_by_one(batch)
+
+    batches = [symbols[i:i + YAHOO_SPARK_BATCH] for i in range(0, len(symbols), YAHOO_SPARK_BATCH)]
+    prices, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(len(batches), 1)) as executor:
+        for batch_prices, batch_errors in executor.map(fetch, batches):
+            prices.update(batch_prices)
+            errors.update(batch_errors)
+    return prices, errors
+
+
+def fetch_prices(market: str, symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """Current prices of a watchlist ('crypto', 'stocks' or 'commodities')"""
+    if market == "crypto":
+        return fetch_crypto_prices(symbols)
+    return fetch_stock_prices(symbols)
+
+
+def streamed_crypto_prices(stream, symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, str], Optional[str]]:
+    """
+    Latest prices of a watchlist from a PriceStream (no network request).
+
+    Returns:
+        (symbol -> price, symbol -> error message, connection problem or None)
+    """
+    errors = {}
+    for symbol in symbols:
+        error = check_symbol(symbol)
+        if error:
+            errors[symbol] = error
+    latest = stream.table.snapshot()
+    prices = {symbol: latest[symbol] for symbol in symbols if symbol in latest}
+    failure = None
+    if not stream.connected and stream.last_error:
+        failure = f"Stream disconnected ({stream.last_error}), reconnecting"
+    return prices, errors, failure
+
+
+class WatchTable:
+    """
+    Terminal table of live prices that redraws only changed rows.
+
+    On a non-terminal output (a pipe or a file) each change is printed as
+    one line instead.
+
+    Args:
+        market: 'crypto', 'stocks' or 'commodities'
+        symbols: Symbols in display order
+        out: Output stream (default: stdout)
+    """
+
+    def __init__(self, market: str, symbols: List[str], out=None):
+        self.market = market
+        self.symbols = symbols
+        self.out = out or sys.stdout
+        self.interactive = self.out.isatty()
+        self.first = {}
+        self.last = {}
+        self.errors = {}
+        self._drawn = False
+
+    def _format_price(self, price: float) -> str:
+        return f"{price:,.8f}" if self.market == "crypto" else f"{price:,.2f}"
+
+    def _row(self, symbol: str, direction: int = 0) -> str:
+        """One table line"""
+        if symbol in self.errors and symbol not in self.last:
+            # Kept short so the row never wraps (that would break the cursor moves)
+            return f"  {symbol:<14} {RED}{self.errors[symbol][:MAX_MESSAGE]}{RESET}"
+        if symbol not in self.last:
+            return f"  {symbol:<14} {DIM}waiting...{RESET}"
+        price = self.last[symbol]
+        color = GREEN if direction > 0 else RED if direction < 0 else ""
+        change = (price - self.first[symbol]) / self.first[symbol] * 100 if self.first[symbol] else 0.0
+        change_color = GREEN if change > 0 else RED if change < 0 else DIM
+        return (f"  {symbol:<14} {color}{self._format_price(price):>22}{RESET}"
+                f"  {change_color}{change:+8.3f}%{RESET}")
+
+    def _status(self, seconds: float, failure: Optional[str] = None) -> str:
+        if failure:
+            return f"{YELLOW}⚠ Refresh failed at {datetime.now().strftime('%H:%M:%S')}: {failure[:MAX_MESSAGE]}{RESET}"
+        return (f"{DIM}Updated {datetime.now().strftime('%H:%M:%S')} "
+                f"({len(self.last)}/{len(self.symbols)} prices, {seconds * 1000:.0f} ms) - Ctrl+C to stop{RESET}")
+
+    def update(self, prices: Dict[str, float], errors: Dict[str, str]) -> Dict[str, int]:
+        """Record a refresh; returns symbol -> direction (+1, -1, 0) for rows that changed"""
+        changed = {}
+        for symbol in self.symbols:
+            if symbol in prices:
+                price = prices[symbol]
+                previous = self.last.get(symbol)
+                if previous != price:
+                    changed[symbol] = 0 if previous is None else (1 if price > previous else -1)
+                    self.last[symbol] = price
+                    self.first.setdefault(symbol, price)
+            elif symbol in errors and self.errors.get(symbol) != errors[symbol]:
+                self.errors[symbol] = errors[symbol]
+                if symbol not in self.last:
+                    changed[symbol] = 0
+        return changed
+
+    def draw(self, changed: Dict[str, int], seconds: float, failure: Optional[str] = None):
+        """Draw the whole table once, then only the changed rows and the status line"""
+        write = self.out.write
+        if not self.interactive:
+            stamp = datetime.now().strftime("%H:%M:%S")
+            if failure:
+                write(f"{stamp} refresh failed: {failure}\n")
+            for symbol in changed:
+                if symbol in self.last:
+                    write(f"{stamp} {symbol} {self._format_price(self.last[symbol])}\n")
+                else:
+                    write(f"{stamp} {symbol} error: {self.errors[symbol]}\n")
+            self.out.flush()
+            return
+
+        if not self._drawn:
+            write(f"{BOLD}{CYAN}  {'SYMBOL':<14} {'PRICE':>22}  {'CHANGE':>9}{RESET}\n")
+            write(f"{CYAN}  {'─' * 50}{RESET}\n")
+            write(f"{DIM}  (change since the watch started){RESET}\n")
+            for symbol in self.symbols:
+                write(self._row(symbol, changed.get(symbol, 0)) + "\n")
+            write(self._status(seconds, failure) + "\n")
+            self._drawn = True
+        else:
+            # The cursor sits below the status line; row i is len(symbols) + 1 - i lines up
+            for i, symbol in enumerate(self.symbols):
+                if symbol in changed:
+                    up = len(self.symbols) + 1 - i
+                    write(CURSOR_UP.format(up) + CLEAR_LINE + self._row(symbol, changed[symbol]) +
+                          CURSOR_DOWN.format(up) + "\r")
+            write(CURSOR_UP.format(1) + CLEAR_LINE + self._status(seconds, failure) + "\n")
+        self.out.flush()
+
+
+def run_watch(market: str, symbols: List[str], interval: float = WATCH_INTERVAL, count: Optional[int] = None,
+              stream: bool = False):
+    """
+    Show live prices until Ctrl+C (or for `count` refreshes).
+
+    Args:
+        market: 'crypto', 'stocks' or 'commodities'
+        symbols: Symbols to watch
+        interval: Seconds between refreshes
+        count: Number of refreshes (None = until interrupted)
+        stream: Crypto only - follow Binance trade streams instead of polling
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    table = WatchTable(market, symbols)
+    price_stream = None
+    if stream and market == "crypto":
+        from stockscan_stream import PriceStream, STREAM_MAX_SYMBOLS
+        followed = [symbol for symbol in symbols if not check_symbol(symbol)]
+        # Every watched pair stays followed (up to Binance's limit per connection)
+        price_stream = PriceStream(followed, max_symbols=max(len(followed), STREAM_MAX_SYMBOLS)).start()
+
+    ticks = 0
+    try:
+        while count is None or ticks < count:
+            started = time.monotonic()
+            failure = None
+            if price_stream is not None:
+                prices, errors, failure = streamed_crypto_prices(price_stream, symbols)
+            else:
+                try:
+                    prices, errors = fetch_prices(market, symbols)
+                except requests.exceptions.RequestException as e:
+                    prices, errors, failure = {}, {}, str(e)
+            elapsed = time.monotonic() - started
+            table.draw(table.update(prices, errors), elapsed, failure)
+
+            ticks += 1
+            if count is not None and ticks >= count:
+                break
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+    finally:
+        if price_stream is not None:
+            price_stream.stop()
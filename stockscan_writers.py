@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+StockScan Writers - Streaming export files
+Rows are flushed to disk page by page into a temporary ".part" file that is
+renamed into place only when the export finishes, so a file with the final
+name is always complete. A checkpoint file next to a CSV export records the
+last committed candle so an interrupted export can be resumed.
+
+Besides CSV, candles can be written as typed columns (int64 epoch ms times,
+float64 OHLCV) to Parquet or Arrow IPC files when pyarrow is installed, or
+to a NumPy .npz archive when only numpy is available.
+
+Copyright (c) 2026 Prasidh P Shetty
+Licensed under the MIT License
+"""
+
+import csv
+import json
+import os
+from datetime import datetime, tzinfo
+from importlib.util import find_spec
+from typing import Optional, Dict, Any, List
+
+# numpy and pyarrow are slow to import, so only check they are installed here
+# and import them in the code that uses them
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+
+CSV_FIELDS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time']
+
+# Typed column layout of a candle page: name -> dtype
+CANDLE_COLUMNS = {
+    "open_time": "int64",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+    "close_time": "int64"
+}
+
+# Export format -> file extension
+EXPORT_FORMATS = {
+    "csv": "csv",
+    "parquet": "parquet",
+    "arrow": "arrow",
+    "npz": "npz"
+}
+
+
+def available_formats() -> List[str]:
+    """Export formats usable with the installed libraries"""
+    formats = ["csv"]
+    if PYARROW_AVAILABLE:
+        formats += ["parquet", "arrow"]
+    if NUMPY_AVAILABLE:
+        formats.append("npz")
+    return formats
+
+
+def as_list(values) -> list:
+    """Return a column as a plain Python list (numpy arrays are converted in C)"""
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def _utc_offset_ms(ms: int, tz: Optional[tzinfo]) -> int:
+    """UTC offset in ms at a given instant (local time when tz is None)"""
+    moment = datetime.fromtimestamp(ms / 1000, tz)
+    offset = moment.utcoffset() if tz is not None else moment.astimezone().utcoffset()
+    return int(offset.total_seconds() * 1000)
+
+
+def format_times(ms_values, tz: Optional[tzinfo] = None) -> List[str]:
+    """
+    Format epoch-ms timestamps as "YYYY-MM-DD HH:MM:SS" wall-clock strings.
+
+    With numpy, a page that spans less than a week and has one UTC offset at
+    both ends (so no DST change inside) is formatted in a single vectorized
+    step. Otherwise each timestamp goes through datetime as before.
+
+    Args:
+        ms_values: Epoch milliseconds (list or numpy array)
+        tz: Timezone to format in (default: local time)
+    """
+    if not len(ms_values):
+        return []
+
+    first = int(ms_values[0])
+    last = int(ms_values[-1])
+    if NUMPY_AVAILABLE and last - first < 7 * 86400000:
+        offset = _utc_offset_ms(first, tz)
+        if offset == _utc_offset_ms(last, tz):
+            import numpy as np
+            local = np.asarray(ms_values, dtype=np.int64) + offset
+            text = np.datetime_as_string(local.astype("datetime64[ms]"), unit="s").tolist()
+            return [t[:10] + " " + t[11:] for t in text]
+
+    return [datetime.fromtimestamp(ms / 1000, tz).strftime("%Y-%m-%d %H:%M:%S") for ms in as_list(ms_values)]
+
+
+def checkpoint_path(filepath: str) -> str:
+    """Path of the resume checkpoint kept next to an export file"""
+    return filepath + ".checkpoint"
+
+
+def has_checkpoint(filepath: str) -> bool:
+    """True if an interrupted export of filepath can be resumed"""
+    return os.path.exists(checkpoint_path(filepath)) and os.path.exists(filepath + ".part")
+
+
+class _AtomicWriter:
+    """
+    Base for export writers: write to "<filepath>.part", rename on success.
+
+    Use as a context manager. If an error escapes the block the part file is
+    kept and filepath is not touched. An export that wrote no rows is
+    discarded. Subclasses implement _open, _write and _close.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.part_path = filepath + ".part"
+        self.checkpoint_path = checkpoint_path(filepath)
+        self.resume_after = None
+        self.rows_written = 0
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, columns: Dict[str, list]):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        self._open()
+        return self
+
+    def write_page(self, columns: Dict[str, list]):
+        """
+        Append one page of candles given as typed columns.
+
+        Args:
+            columns: Dict with every CANDLE_COLUMNS key mapping to an
+                equal-length sequence (lists or numpy arrays)
+        """
+        count = len(columns["open_time"])
+        if not count:
+            return
+        self._write(columns)
+        self.rows_written += count
+
+    def __exit__(self, exc_type, exc, tb):
+        self._close()
+        if exc_type is None:
+            if self.rows_written:
+                os.replace(self.part_path, self.filepath)
+            else:
+                os.remove(self.part_path)
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+        return False
+
+
+class StreamingCSVWriter(_AtomicWriter):
+    """
+    Write CSV rows incrementally and publish the file atomically.
+
+    When resume_key is given, every page written also updates
+    "<filepath>.checkpoint" with the page's last candle open time and the
+    committed file size. Opening the same export again with an identical
+    resume_key truncates any half-written tail and continues appending;
+    resume_after then holds the last committed open time (else None).
+
+    Args:
+        filepath: Final output path
+        fieldnames: CSV column names
+        resume_key: Describes the export (symbol, timeframe, range) so a
+            checkpoint is only reused for the exact same request
+        tz: Timezone used to format timestamps in write_page (default: local)
+    """
+
+    def __init__(self, filepath: str, fieldnames: List[str] = CSV_FIELDS,
+                 resume_key: Optional[Dict[str, Any]] = None, tz: Optional[tzinfo] = None):
+        super().__init__(filepath)
+        self.fieldnames = fieldnames
+        self.resume_key = resume_key
+        self.tz = tz
+        self._file = None
+        self._writer = None
+        self._row_writer = None
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Return the checkpoint if it belongs to this export and its part file"""
+        if self.resume_key is None or not has_checkpoint(self.filepath):
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("key") != self.resume_key:
+            return None
+        if os.path.getsize(self.part_path) < checkpoint.get("offset", 0):
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, last_open_time: int):
+        """Atomically record what has been committed so far"""
+        checkpoint = {
+            "key": self.resume_key,
+            "last_open_time": last_open_time,
+            "rows": self.rows_written,
+            "offset": self._file.tell()
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _open(self):
+        checkpoint = self._load_checkpoint()
+        if checkpoint:
+            # Drop anything written after the last checkpoint, then append
+            self._file = open(self.part_path, 'r+', newline='')
+            self._file.truncate(checkpoint["offset"])
+            self._file.seek(checkpoint["offset"])
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self.rows_written = checkpoint["rows"]
+            self.resume_after = checkpoint["last_open_time"]
+        else:
+            self._file = open(self.part_path, 'w', newline='')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+        self._row_writer = csv.writer(self._file)
+
+    def _write(self, columns: Dict[str, list]):
+        # Timestamps are formatted here, one vectorized call per column
+        self._row_writer.writerows(zip(
+            format_times(columns["open_time"], self.tz),
+            as_list(columns["open"]), as_list(columns["high"]), as_list(columns["low"]),
+            as_list(columns["close"]), as_list(columns["volume"]),
+            format_times(columns["close_time"], self.tz)
+        ))
+        self._file.flush()
+
+    def write_page(self, columns: Dict[str, list]):
+        """Append one page of candles and checkpoint it when resuming is enabled"""
+        super().write_page(columns)
+        if self.resume_key is not None and len(columns["open_time"]):
+            self._save_checkpoint(int(columns["open_time"][-1]))
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        """Append already formatted CSV rows (dicts keyed by fieldnames)"""
+        self._writer.writerows(rows)
+        self._file.flush()
+        self.rows_written += len(rows)
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetWriter(_AtomicWriter):
+    """Write candles to a Parquet file, one row group per page (needs pyarrow)"""
+
+    def _open(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([(name, getattr(pa, dtype)()) for name, dtype in CANDLE_COLUMNS.items()])
+        self._writer = pq.ParquetWriter(self.part_path, self._schema)
+
+    def _write(self, columns: Dict[str, list]):
+        self._writer.write_table(self._pa.table({name: columns[name] for name in CANDLE_COLUMNS}, schema=self._schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+class ArrowWriter(_AtomicWriter):
+    """Write candles to an Arrow IPC file, one record batch per page (needs pyarrow)"""
+
+    def _open(self):
+        import pyarrow as pa
+        import pyarrow.ipc
+        self._pa = pa
+        self._schema = pa.schema([(name, getattr(pa, dtype)()) for name, dtype in CANDLE_COLUMNS.items()])
+        self._sink = pa.OSFile(self.part_path, "wb")
+        self._writer = pyarrow.ipc.new_file(self._sink, self._schema)
+
+    def _write(self, columns: Dict[str, list]):
+        self._writer.write_batch(self._pa.record_batch([columns[name] for name in CANDLE_COLUMNS], schema=self._schema))
+
+    def _close(self):
+        self._writer.close()
+        self._sink.close()
+
+
+class NpzWriter(_AtomicWriter):
+    """
+    Write candles to an uncompressed NumPy .npz archive (needs numpy).
+
+    The zip format cannot be appended to column by column, so each page's
+    typed values are appended to one raw temporary file per column and the
+    archive is assembled from those on close, copying COPY_CHUNK bytes at a
+    time. Memory stays at about one page however long the export is.
+    """
+
+    COPY_CHUNK = 1 << 20
+
+    def _open(self):
+        import numpy as np
+        self._np = np
+        self._column_paths = {name: f"{self.part_path}.{name}" for name in CANDLE_COLUMNS}
+        self._columns = {name: open(path, "wb") for name, path in self._column_paths.items()}
+
+    def _write(self, columns: Dict[str, list]):
+        for name, dtype in CANDLE_COLUMNS.items():
+            self._np.asarray(columns[name], dtype=dtype).tofile(self._columns[name])
+
+    def _close(self):
+        import zipfile
+        np = self._np
+        try:
+            for f in self._columns.values():
+                f.close()
+            with zipfile.ZipFile(self.part_path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for name, dtype in CANDLE_COLUMNS.items():
+                    header = np.lib.format.header_data_from_array_1_0(np.empty(0, dtype=dtype))
+                    header["shape"] = (self.rows_written,)
+                    with archive.open(f"{name}.npy", "w", force_zip64=True) as entry, \
+                            open(self._column_paths[name], "rb") as column:
+                        np.lib.format.write_array_header_1_0(entry, header)
+                        while True:
+                            chunk = column.read(self.COPY_CHUNK)
+                            if not chunk:
+                                break
+                            entry.write(chunk)
+        finally:
+            for path in self._column_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def open_export_writer(filepath: str, fmt: str = "csv", resume_key: Optional[Dict[str, Any]] = None,
+                       tz: Optional[tzinfo] = None) -> _AtomicWriter:
+    """
+    Create the streaming writer for an export format.
+
+    Args:
+        filepath: Final output path
+        fmt: One of EXPORT_FORMATS ("csv", "parquet", "arrow", "npz")
+        resume_key: Enables checkpoint/resume (CSV only)
+        tz: Timezone for CSV timestamps (default: local time)
+
+    Raises:
+        ValueError: If the format is unknown or its library is not installed
+    """
+    if fmt == "csv":
+        return StreamingCSVWriter(filepath, resume_key=resume_key, tz=tz)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if fmt not in available_formats():
+        library = "numpy" if fmt == "npz" else "pyarrow"
+        raise ValueError(f"'{fmt}' export needs the '{library}' library. Install it with: pip install {library}")
+    if fmt == "parquet":
+        return ParquetWriter(filepath)
+    if fmt == "arrow":
+        return ArrowWriter(filepath)
+    return NpzWriter(filepath)